@@ -1,4 +1,6 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
 import os
 import uuid
 
@@ -7,6 +9,9 @@ from app.services.admin_metrics_service import AdminMetricsService
 from app.services.admin_settings_service import AdminSettingsService
 from app.services.admin_user_service import AdminUserService
 from app.repositories.admin_audit_repo import AdminAuditRepo
+from app.services.file_service import MAX_COMPLIANCE_EVIDENCE_BYTES, UploadTooLargeError
+from app.services.storage_manager import StorageManager
+from app.services.graph_export_service import GraphExportService, export_media
 from app.core.security import now_utc
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
@@ -616,21 +621,26 @@ async def admin_compliance_policy_ack(policy_id: str, payload: dict, admin=Depen
 
 @router.post("/compliance/evidence/upload")
 async def admin_compliance_upload_evidence(file: UploadFile = File(...), admin=Depends(get_current_admin)):
-    upload_dir = os.path.join(os.path.dirname(__file__), "..", "..", "uploads", "compliance")
-    os.makedirs(upload_dir, exist_ok=True)
     ext = os.path.splitext(file.filename or "")[1] or ".bin"
     name = f"{uuid.uuid4().hex}{ext}"
-    path = os.path.join(upload_dir, name)
-    content = await file.read()
-    with open(path, "wb") as f:
-        f.write(content)
-    url = f"/uploads/compliance/{name}"
+    try:
+        stored = await StorageManager().store(
+            file, "compliance", filename=name, max_bytes=MAX_COMPLIANCE_EVIDENCE_BYTES
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    url = f"/uploads/compliance/{stored['rel_path']}"
     audit = AdminAuditRepo()
     await audit.insert(
         {
             "admin_id": admin.get("_id"),
             "action": "compliance_upload_evidence",
-            "meta": {"filename": file.filename, "url": url},
+            "meta": {
+                "filename": file.filename,
+                "url": url,
+                "size": stored["size"],
+                "sha256": stored["sha256"],
+            },
             "created_at": now_utc(),
         }
     )
@@ -678,3 +688,33 @@ async def admin_export_user(user_id: str, admin=Depends(get_current_admin)):
         return await service.export_user_data(user_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/graph/export")
+async def admin_graph_export(
+    format: str = Query("graphml", pattern="^(graphml|ndjson)$"),
+    user_id: str | None = None,
+    subject: str | None = Query(None, min_length=1),
+    min_weight: float = Query(0.0, ge=0.0, le=1.0),
+    compress: bool = Query(True),
+    admin=Depends(get_current_admin),
+):
+    """Whole paper graph, or one user's / one subject's, streamed for analysis."""
+    if user_id is not None and not ObjectId.is_valid(user_id):
+        raise HTTPException(status_code=400, detail="Invalid user_id")
+    audit = AdminAuditRepo()
+    await audit.insert(
+        {
+            "admin_id": admin.get("_id"),
+            "action": "graph_export",
+            "meta": {"format": format, "user_id": user_id, "subject": subject, "min_weight": min_weight},
+            "created_at": now_utc(),
+        }
+    )
+    media_type, filename = export_media(format, compress)
+    service = GraphExportService()
+    return StreamingResponse(
+        service.stream(format, user_id=user_id, subject=subject, min_weight=min_weight, compress=compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
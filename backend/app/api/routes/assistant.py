@@ -1,4 +1,5 @@
 # app/api/routes/assistant.py
+import io
 import os
 from bson import ObjectId
 from fastapi import (
@@ -7,21 +8,65 @@ from fastapi import (
     UploadFile,
     File,
     HTTPException,
+    Header,
     Query,
     Path,
+    Request,
 )
+from fastapi.responses import StreamingResponse
 
 from app.api.deps import get_current_user
 from app.schemas.assistant import AnalyzeTextRequest, AnalyzeResponse
 from app.schemas.history import HistoryResponse
 
-from app.services.file_service import save_upload
-from app.services.pdf_service import extract_text_from_pdf
-from app.services.docx_service import extract_text_from_docx
+from app.services.assistant_job_service import TooManyJobsError
+from app.services.assistant_service import IdempotencyConflictError
+from app.services.bulk_ingest_service import BULK_INGEST_MAX_FILES
+from app.services.extraction_service import ExtractionTimeoutError
+from app.services.storage_manager import StorageManager
+from app.services.file_service import (
+    SUPPORTED_QUERY_EXTENSIONS,
+    MAX_QUERY_UPLOAD_BYTES,
+    UploadTooLargeError,
+)
 
 router = APIRouter(prefix="/assistant", tags=["Assistant"])
 
 
+def _check_extension(file: UploadFile) -> None:
+    ext = os.path.splitext(file.filename or "")[1].lower()
+    if ext not in SUPPORTED_QUERY_EXTENSIONS:
+        raise HTTPException(status_code=400, detail="Only PDF and DOCX supported")
+
+
+async def _save_upload(file: UploadFile) -> dict:
+    _check_extension(file)
+    try:
+        return await StorageManager().store(
+            file, "uploads", max_bytes=MAX_QUERY_UPLOAD_BYTES, content_addressed=True
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+
+
+async def _save_and_extract(file: UploadFile) -> tuple[dict, dict]:
+    """(stored upload, extracted-text document); repeat uploads hit the text cache."""
+    from app.main import assistant_service
+
+    stored = await _save_upload(file)
+    try:
+        doc = await assistant_service.document_text(stored)
+    except ExtractionTimeoutError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    text = doc.get("text")
+    if not text or len(text) < 10:
+        raise HTTPException(status_code=400, detail="Could not extract text from file")
+    return stored, doc
+
+
 # -----------------------------
 # 1) Quick analyze (top-k only)
 # -----------------------------
@@ -50,24 +95,10 @@ async def analyze_text(payload: AnalyzeTextRequest, user=Depends(get_current_use
 async def analyze_file(file: UploadFile = File(...), user=Depends(get_current_user)):
     from app.main import assistant_service
 
-    upload_dir = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "..", "storage", "uploads")
-    )
-    saved_path = save_upload(file, upload_dir)
-
-    ext = os.path.splitext(file.filename or "")[1].lower()
-
-    if ext == ".pdf":
-        text = extract_text_from_pdf(saved_path)
-    elif ext == ".docx":
-        text = extract_text_from_docx(saved_path)
-    else:
-        raise HTTPException(status_code=400, detail="Only PDF and DOCX supported")
-
-    if not text or len(text) < 10:
-        raise HTTPException(status_code=400, detail="Could not extract text from file")
+    stored, doc = await _save_and_extract(file)
+    text = doc["text"]
 
-    topics = assistant_service.analyze_text(text, top_k=5)
+    topics = await assistant_service.document_predictions(stored["sha256"], doc)
 
     saved_id = await assistant_service.record_quick_analysis(
         user_id=str(user["_id"]),
@@ -87,40 +118,137 @@ async def analyze_file(file: UploadFile = File(...), user=Depends(get_current_us
 # -----------------------------------
 # 2) Full assistant pipeline (NEW OK)
 # -----------------------------------
+def _idempotency_key(value: str | None) -> str | None:
+    value = (value or "").strip()
+    if len(value) > 255:
+        raise HTTPException(status_code=400, detail="Idempotency-Key too long")
+    return value or None
+
+
 @router.post("/query-text")
-async def query_text(payload: AnalyzeTextRequest, user=Depends(get_current_user)):
+async def query_text(
+    payload: AnalyzeTextRequest,
+    user=Depends(get_current_user),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+):
     from app.main import assistant_service
-    return await assistant_service.run_query(
-        user_id=str(user["_id"]),
-        text=payload.text,
-    )
+    try:
+        return await assistant_service.run_query(
+            user_id=str(user["_id"]),
+            text=payload.text,
+            idempotency_key=_idempotency_key(idempotency_key),
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
 
 @router.post("/query-file")
-async def query_file(file: UploadFile = File(...), user=Depends(get_current_user)):
+async def query_file(
+    file: UploadFile = File(...),
+    user=Depends(get_current_user),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+):
     from app.main import assistant_service
 
-    upload_dir = os.path.abspath(
-        os.path.join(os.path.dirname(__file__), "..", "..", "storage", "uploads")
-    )
-    saved_path = save_upload(file, upload_dir)
+    stored, doc = await _save_and_extract(file)
+    predictions = await assistant_service.document_predictions(stored["sha256"], doc)
 
-    ext = os.path.splitext(file.filename or "")[1].lower()
+    try:
+        return await assistant_service.run_query(
+            user_id=str(user["_id"]),
+            text=doc["text"][:20000],
+            input_type="file",
+            idempotency_key=_idempotency_key(idempotency_key),
+            predictions=predictions,
+        )
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
 
-    if ext == ".pdf":
-        text = extract_text_from_pdf(saved_path)
-    elif ext == ".docx":
-        text = extract_text_from_docx(saved_path)
-    else:
-        raise HTTPException(status_code=400, detail="Only PDF and DOCX supported")
 
-    if not text or len(text) < 10:
-        raise HTTPException(status_code=400, detail="Could not extract text from file")
+# -----------------------------------
+# 2b) File queries as background jobs
+# -----------------------------------
+@router.post("/query-file/jobs", status_code=202)
+async def create_query_file_job(
+    file: UploadFile = File(...),
+    user=Depends(get_current_user),
+    idempotency_key: str | None = Header(default=None, alias="Idempotency-Key"),
+):
+    """
+    Saves the upload and returns a job immediately; poll /jobs/{job_id}
+    or subscribe to /jobs/{job_id}/events for progress and the result.
+    """
+    from app.main import assistant_jobs
+
+    stored = await _save_upload(file)
+    try:
+        return await assistant_jobs.submit(
+            user_id=str(user["_id"]),
+            file_path=stored["path"],
+            sha256=stored["sha256"],
+            filename=file.filename,
+            content_type=file.content_type,
+            idempotency_key=_idempotency_key(idempotency_key),
+        )
+    except TooManyJobsError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, user=Depends(get_current_user)):
+    from app.main import assistant_jobs
+
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job_id")
+    job = await assistant_jobs.get(str(user["_id"]), job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/jobs/{job_id}/events")
+async def job_events(job_id: str, request: Request, user=Depends(get_current_user)):
+    from app.main import assistant_jobs
+
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job_id")
+    if not await assistant_jobs.get(str(user["_id"]), job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        assistant_jobs.events(str(user["_id"]), job_id, request.is_disconnected),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
-    return await assistant_service.run_query(
-        user_id=str(user["_id"]),
-        text=text[:20000],
-        input_type="file",
+
+# -----------------------------------
+# 2c) Bulk ingestion (files / ZIP)
+# -----------------------------------
+@router.post("/ingest")
+async def bulk_ingest_files(
+    files: list[UploadFile] = File(...),
+    user=Depends(get_current_user),
+):
+    """
+    Classifies several PDF/DOCX files or ZIP archives of them. Streams one
+    NDJSON line per document as it finishes, then a summary line.
+    """
+    from app.main import bulk_ingest
+
+    if len(files) > BULK_INGEST_MAX_FILES:
+        raise HTTPException(status_code=400, detail=f"Too many files (max {BULK_INGEST_MAX_FILES})")
+
+    # FastAPI closes form files when this handler returns, before the
+    # response streams; hand the spooled files over to the ingest stream.
+    uploads = []
+    for f in files:
+        uploads.append((os.path.basename(f.filename or "upload"), f.content_type, f.file))
+        f.file = io.BytesIO()
+
+    return StreamingResponse(
+        bulk_ingest.ingest(str(user["_id"]), uploads),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
 
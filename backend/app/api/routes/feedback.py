@@ -1,10 +1,12 @@
 import os
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Request
 
 from app.core.dependencies import get_current_user
+from app.core.file_serving import file_response
 from app.schemas.feedback import FeedbackCreateRequest, FeedbackResponse
 from app.services.feedback_service import FeedbackService
+from app.services.file_service import MAX_FEEDBACK_ATTACHMENT_BYTES, UploadTooLargeError
+from app.services.storage_manager import StorageManager
 
 router = APIRouter(prefix="/feedback", tags=["Feedback"])
 
@@ -31,19 +33,19 @@ async def create_feedback(payload: FeedbackCreateRequest, user=Depends(get_curre
 
 @router.post("/attachments")
 async def upload_attachment(file: UploadFile = File(...), user=Depends(get_current_user)):
-    uploads_dir = os.path.join(os.path.dirname(__file__), "..", "..", "uploads", "feedback")
-    os.makedirs(uploads_dir, exist_ok=True)
-    safe_name = f"{user['_id']}_{file.filename}"
-    path = os.path.abspath(os.path.join(uploads_dir, safe_name))
-    with open(path, "wb") as f:
-        f.write(await file.read())
+    safe_name = f"{user['_id']}_{os.path.basename(file.filename or 'attachment')}"
+    try:
+        await StorageManager().store(
+            file, "feedback", filename=safe_name, max_bytes=MAX_FEEDBACK_ATTACHMENT_BYTES
+        )
+    except UploadTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
     return {"filename": safe_name, "url": f"/feedback/attachments/{safe_name}"}
 
 
 @router.get("/attachments/{filename}")
-async def get_attachment(filename: str, user=Depends(get_current_user)):
-    uploads_dir = os.path.join(os.path.dirname(__file__), "..", "..", "uploads", "feedback")
-    path = os.path.abspath(os.path.join(uploads_dir, filename))
-    if not os.path.exists(path):
+async def get_attachment(filename: str, request: Request, user=Depends(get_current_user)):
+    path = StorageManager().resolve("feedback", filename)
+    if not path:
         raise HTTPException(status_code=404, detail="File not found")
-    return FileResponse(path)
+    return await file_response(request.headers, path)
@@ -1,90 +1,100 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from bson import ObjectId
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 
 from app.core.dependencies import get_current_user
-from app.schemas.graph import GraphResponse, GraphQueryResponse, GraphQueryNode, GraphQueryEdge
+from app.core.file_serving import is_not_modified
+from app.schemas.graph import GraphResponse, GraphQueryResponse
 from app.services.paper_graph_service import PaperGraphService
-from app.repositories.query_repo import QueryRepo
+from app.services.graph_export_service import GraphExportService, export_media
 
 router = APIRouter(prefix="/graph", tags=["Graph"])
 
 
+@router.get("/expand")
+async def graph_expand(
+    paper_id: str = Query(..., min_length=1),
+    depth: int = Query(2, ge=1, le=4),
+    fan_out: int = Query(10, ge=1, le=50),
+    min_weight: float = Query(0.0, ge=0.0, le=1.0),
+    max_nodes: int = Query(200, ge=1, le=1000),
+    layout: bool = Query(False),
+    user=Depends(get_current_user),
+):
+    service = PaperGraphService()
+    return await service.expand(
+        str(user["_id"]),
+        paper_id,
+        depth=depth,
+        fan_out=fan_out,
+        min_weight=min_weight,
+        max_nodes=max_nodes,
+        layout=layout,
+    )
+
+
+def _graph_error(e: ValueError) -> HTTPException:
+    detail = str(e)
+    if detail == "Query not found":
+        return HTTPException(status_code=404, detail=detail)
+    return HTTPException(status_code=400, detail=detail)
+
+
+def _cached_response(request: Request, payload: dict, etag: str) -> Response:
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if is_not_modified(request.headers, etag, ""):
+        return Response(status_code=304, headers=headers)
+    return JSONResponse(payload, headers=headers)
+
+
+@router.get("/export")
+async def graph_export(
+    format: str = Query("graphml", pattern="^(graphml|ndjson)$"),
+    subject: str | None = Query(None, min_length=1),
+    min_weight: float = Query(0.0, ge=0.0, le=1.0),
+    compress: bool = Query(True),
+    user=Depends(get_current_user),
+):
+    """
+    The user's paper graph as GraphML (Gephi, NetworkX) or NDJSON, streamed
+    and gzip-compressed unless compress=false.
+    """
+    media_type, filename = export_media(format, compress)
+    service = GraphExportService()
+    return StreamingResponse(
+        service.stream(format, user_id=str(user["_id"]), subject=subject, min_weight=min_weight, compress=compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+
 @router.get("/{query_id}", response_model=GraphQueryResponse)
-async def graph_for_query_simple(query_id: str, user=Depends(get_current_user)):
-    if not ObjectId.is_valid(query_id):
-        raise HTTPException(status_code=400, detail="Invalid query_id")
-
-    repo = QueryRepo()
-    doc = await repo.get_by_id(ObjectId(query_id), ObjectId(user["_id"]))
-    if not doc:
-        raise HTTPException(status_code=404, detail="Query not found")
-
-    papers = doc.get("papers") or []
-    nodes: list[GraphQueryNode] = []
-    seen = set()
-    for p in papers:
-        uid = p.get("paper_uid")
-        if not uid or uid in seen:
-            continue
-        seen.add(uid)
-        nodes.append(
-            GraphQueryNode(
-                id=uid,
-                title=p.get("title") or "Untitled",
-                year=p.get("year"),
-                venue=p.get("venue"),
-                authors=p.get("authors"),
-                source=p.get("source"),
-                url=p.get("url"),
-            )
-        )
-        if len(nodes) >= 100:
-            break
-
-    edges: list[GraphQueryEdge] = []
-    n = len(nodes)
-    for i in range(n):
-        a = nodes[i]
-        authors_a = {x.strip().lower() for x in (a.authors or []) if x and str(x).strip()}
-        venue_a = (a.venue or "").strip().lower()
-        year_a = a.year
-        for j in range(i + 1, n):
-            b = nodes[j]
-            authors_b = {x.strip().lower() for x in (b.authors or []) if x and str(x).strip()}
-            venue_b = (b.venue or "").strip().lower()
-            year_b = b.year
-
-            weight = 0.0
-            if authors_a and authors_b and authors_a.intersection(authors_b):
-                weight += 1.0
-            if venue_a and venue_b and venue_a == venue_b:
-                weight += 1.0
-            if year_a and year_b and abs(int(year_a) - int(year_b)) == 1:
-                weight += 1.0
-
-            if weight > 0:
-                edges.append(
-                    GraphQueryEdge(
-                        source=a.id,
-                        target=b.id,
-                        weight=weight,
-                        type="similarity",
-                    )
-                )
-
-    return GraphQueryResponse(nodes=nodes, edges=edges)
+async def graph_for_query_simple(
+    query_id: str,
+    request: Request,
+    layout: bool = Query(False),
+    user=Depends(get_current_user),
+):
+    service = PaperGraphService()
+    try:
+        payload, etag = await service.simple_graph(str(user["_id"]), query_id, layout=layout)
+    except ValueError as e:
+        raise _graph_error(e)
+    return _cached_response(request, payload, etag)
 
 
 @router.get("/query/{query_id}", response_model=GraphResponse)
-async def graph_for_query(query_id: str, user=Depends(get_current_user)):
+async def graph_for_query(
+    query_id: str,
+    request: Request,
+    layout: bool = Query(False),
+    user=Depends(get_current_user),
+):
     service = PaperGraphService()
     try:
-        return await service.build_from_query(str(user["_id"]), query_id)
+        payload, etag = await service.query_graph(str(user["_id"]), query_id, layout=layout)
     except ValueError as e:
-        detail = str(e)
-        if detail == "Query not found":
-            raise HTTPException(status_code=404, detail=detail)
-        raise HTTPException(status_code=400, detail=detail)
+        raise _graph_error(e)
+    return _cached_response(request, payload, etag)
 
 
 @router.get("/paper/{paper_id}", response_model=GraphResponse)
@@ -0,0 +1,140 @@
+# app/core/file_serving.py
+"""
+File responses for uploads and attachments.
+
+- Strong ETags from the SHA-256 of the content. Content-addressed files
+  carry the hash in their name; other files are hashed once and the result
+  is cached by (path, mtime, size), or seeded by the storage layer at
+  write time.
+- Conditional requests (If-None-Match / If-Modified-Since) answer 304.
+- Range / If-Range requests are served by Starlette's FileResponse.
+- Content-addressed files get long-lived immutable Cache-Control; all other
+  files must revalidate (cheap thanks to the 304s).
+"""
+import os
+import re
+import stat
+import hashlib
+import threading
+from collections import OrderedDict
+from email.utils import parsedate
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles, NotModifiedResponse
+from starlette.types import Scope
+
+FILE_ETAG_CACHE_SIZE = int(os.getenv("FILE_ETAG_CACHE_SIZE", "4096"))
+IMMUTABLE_MAX_AGE_SECONDS = 365 * 24 * 3600
+
+_HASH_NAME = re.compile(r"^[0-9a-f]{64}$")
+_ETAGS: "OrderedDict[tuple, str]" = OrderedDict()
+_ETAGS_LOCK = threading.Lock()
+
+
+def content_hash_from_name(path: str) -> str | None:
+    """SHA-256 when the file is named by its content hash (content-addressed)."""
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return stem if _HASH_NAME.match(stem) else None
+
+
+def _key(path: str, st: os.stat_result) -> tuple:
+    return (os.path.abspath(path), st.st_mtime_ns, st.st_size)
+
+
+def _cache_put(key: tuple, etag: str) -> None:
+    with _ETAGS_LOCK:
+        _ETAGS[key] = etag
+        _ETAGS.move_to_end(key)
+        while len(_ETAGS) > FILE_ETAG_CACHE_SIZE:
+            _ETAGS.popitem(last=False)
+
+
+def remember_etag(path: str, sha256: str) -> None:
+    """Seed the cache for a file whose hash is already known (just stored)."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return
+    _cache_put(_key(path, st), f'"{sha256}"')
+
+
+def content_etag(path: str, st: os.stat_result) -> str:
+    """Strong ETag for a file (blocking: hashes it on a cache miss)."""
+    sha = content_hash_from_name(path)
+    if sha:
+        return f'"{sha}"'
+    key = _key(path, st)
+    with _ETAGS_LOCK:
+        etag = _ETAGS.get(key)
+        if etag:
+            _ETAGS.move_to_end(key)
+            return etag
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    etag = f'"{digest.hexdigest()}"'
+    _cache_put(key, etag)
+    return etag
+
+
+def is_not_modified(request_headers: Headers, etag: str, last_modified: str) -> bool:
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match wins over If-Modified-Since (RFC 9110 13.1.3)
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags or f"W/{etag}" in tags
+    since = request_headers.get("if-modified-since")
+    if since:
+        since_t, modified_t = parsedate(since), parsedate(last_modified)
+        return since_t is not None and modified_t is not None and since_t >= modified_t
+    return False
+
+
+def _cache_control(path: str, private: bool) -> str:
+    scope = "private" if private else "public"
+    if content_hash_from_name(path):
+        return f"{scope}, max-age={IMMUTABLE_MAX_AGE_SECONDS}, immutable"
+    return f"{scope}, no-cache"
+
+
+async def file_response(
+    request_headers: Headers,
+    path: str,
+    st: os.stat_result | None = None,
+    private: bool = True,
+    filename: str | None = None,
+) -> Response:
+    """FileResponse with a strong ETag, caching headers and 304 handling."""
+    if st is None:
+        st = await anyio.to_thread.run_sync(os.stat, path)
+    etag = await anyio.to_thread.run_sync(content_etag, path, st)
+    response = FileResponse(
+        path,
+        stat_result=st,
+        filename=filename,
+        headers={"etag": etag, "cache-control": _cache_control(path, private), "accept-ranges": "bytes"},
+    )
+    if is_not_modified(request_headers, etag, response.headers["last-modified"]):
+        return NotModifiedResponse(response.headers)
+    return response
+
+
+class CachedStaticFiles(StaticFiles):
+    """StaticFiles serving through file_response() (content ETags, immutable hashes)."""
+
+    def __init__(self, *args, private: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.private = private
+
+    async def get_response(self, path: str, scope: Scope) -> Response:
+        if scope["method"] in ("GET", "HEAD"):
+            try:
+                full_path, st = await anyio.to_thread.run_sync(self.lookup_path, path)
+            except OSError:
+                full_path, st = "", None
+            if st and stat.S_ISREG(st.st_mode):
+                return await file_response(Headers(scope=scope), full_path, st, private=self.private)
+        return await super().get_response(path, scope)
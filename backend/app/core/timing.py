@@ -0,0 +1,105 @@
+# app/core/timing.py
+"""
+Lightweight stage timers.
+
+    with span("search"):
+        papers = await ...
+
+Each span is appended to the current request's timing list (emitted as a
+Server-Timing header by ServerTimingMiddleware) and folded into per-process
+latency histograms exposed via /metrics and the admin model-performance view.
+Spans outside a request (background prefetch, workers) are not recorded.
+"""
+import re
+import time
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+# upper bounds in ms; the last bucket is open-ended
+STAGE_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+_request_timings: ContextVar[list | None] = ContextVar("request_timings", default=None)
+_STATS: dict[str, dict] = {}
+# spans also close in threadpool workers
+_STATS_LOCK = threading.Lock()
+_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+
+
+def stage_name(name: str) -> str:
+    return _NAME_RE.sub("_", name.strip().lower()).strip("_") or "stage"
+
+
+def start_request_timings() -> list:
+    timings: list = []
+    _request_timings.set(timings)
+    return timings
+
+
+def record(name: str, duration_ms: float) -> None:
+    timings = _request_timings.get()
+    if timings is None:
+        return
+    name = stage_name(name)
+    timings.append((name, duration_ms))
+
+    bucket = next((i for i, upper in enumerate(STAGE_BUCKETS_MS) if duration_ms <= upper), len(STAGE_BUCKETS_MS))
+    with _STATS_LOCK:
+        stat = _STATS.get(name)
+        if stat is None:
+            stat = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "buckets": [0] * (len(STAGE_BUCKETS_MS) + 1)}
+            _STATS[name] = stat
+        stat["count"] += 1
+        stat["total_ms"] += duration_ms
+        stat["max_ms"] = max(stat["max_ms"], duration_ms)
+        stat["buckets"][bucket] += 1
+
+
+@contextmanager
+def span(name: str):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def server_timing_header(timings: list) -> str:
+    return ", ".join(f"{name};dur={ms:.1f}" for name, ms in timings)
+
+
+def _percentile(buckets: list[int], count: int, q: float) -> float | None:
+    if not count:
+        return None
+    target = count * q
+    running = 0
+    for i, c in enumerate(buckets):
+        running += c
+        if running >= target:
+            return float(STAGE_BUCKETS_MS[i]) if i < len(STAGE_BUCKETS_MS) else None
+    return None
+
+
+def stage_stats() -> list[dict]:
+    with _STATS_LOCK:
+        snapshot = {name: dict(s, buckets=list(s["buckets"])) for name, s in _STATS.items()}
+    out = []
+    for name, s in sorted(snapshot.items()):
+        count = s["count"]
+        out.append(
+            {
+                "stage": name,
+                "count": count,
+                "avg_ms": round(s["total_ms"] / count, 2) if count else 0.0,
+                "max_ms": round(s["max_ms"], 2),
+                # bucket upper bounds; None means above the largest bucket
+                "p50_ms": _percentile(s["buckets"], count, 0.5),
+                "p95_ms": _percentile(s["buckets"], count, 0.95),
+                "p99_ms": _percentile(s["buckets"], count, 0.99),
+                "histogram": [
+                    {"le_ms": STAGE_BUCKETS_MS[i] if i < len(STAGE_BUCKETS_MS) else None, "count": c}
+                    for i, c in enumerate(s["buckets"])
+                ],
+            }
+        )
+    return out
@@ -70,9 +70,132 @@ COLLECTION_SCHEMAS: Dict[str, Dict[str, Any]] = {
             "gpt_answer": {"bsonType": ["string", "null"]},
             "file": {"bsonType": ["object", "null"]},
             "predicted_topics": {"bsonType": "array"},
+            "text_fingerprint": {"bsonType": "string"},
+            "idempotency_key": {"bsonType": "string"},
+            "bulk": {"bsonType": "bool"},
             "created_at": {"bsonType": "date"},
         },
     ),
+    "assistant_jobs": _schema(
+        required=["user_id", "status", "created_at"],
+        properties={
+            "user_id": {"bsonType": "objectId"},
+            "kind": {"bsonType": "string"},
+            "status": {"enum": ["queued", "running", "done", "failed"]},
+            "stage": {"bsonType": "string"},
+            "progress": {"bsonType": "int"},
+            "attempts": {"bsonType": "int"},
+            "file_path": {"bsonType": "string"},
+            "sha256": {"bsonType": "string"},
+            "file": {"bsonType": ["object", "null"]},
+            "idempotency_key": {"bsonType": ["string", "null"]},
+            "worker_id": {"bsonType": "string"},
+            "lease_until": {"bsonType": "date"},
+            "query_id": {"bsonType": ["string", "null"]},
+            "result": {"bsonType": ["object", "null"]},
+            "error": {"bsonType": ["string", "null"]},
+            "created_at": {"bsonType": "date"},
+            "updated_at": {"bsonType": "date"},
+            "started_at": {"bsonType": "date"},
+            "finished_at": {"bsonType": "date"},
+            "expires_at": {"bsonType": "date"},
+        },
+    ),
+    "extracted_texts": _schema(
+        required=["text", "created_at"],
+        properties={
+            "_id": {"bsonType": "string"},
+            "text": {"bsonType": "string"},
+            "pages": {"bsonType": ["int", "null"]},
+            "pages_read": {"bsonType": ["int", "null"]},
+            "truncated": {"bsonType": "bool"},
+            "ext": {"bsonType": ["string", "null"]},
+            "extractor_version": {"bsonType": "int"},
+            "predictions": {"bsonType": ["object", "null"]},
+            "hits": {"bsonType": "int"},
+            "created_at": {"bsonType": "date"},
+            "last_used_at": {"bsonType": "date"},
+        },
+    ),
+    "graph_cache": _schema(
+        required=["user_id", "query_id", "kind", "payload", "etag", "expires_at"],
+        properties={
+            "_id": {"bsonType": "string"},
+            "user_id": {"bsonType": "objectId"},
+            "query_id": {"bsonType": "objectId"},
+            "kind": {"bsonType": "string"},
+            "payload": {"bsonType": "object"},
+            "etag": {"bsonType": "string"},
+            "created_at": {"bsonType": "date"},
+            "expires_at": {"bsonType": "date"},
+        },
+    ),
+    "paper_centrality": _schema(
+        required=["pagerank", "pagerank_pct", "computed_at"],
+        properties={
+            "_id": {"bsonType": "string"},
+            "pagerank": {"bsonType": "double"},
+            "pagerank_pct": {"bsonType": "double"},
+            "degree": {"bsonType": "double"},
+            "computed_at": {"bsonType": "date"},
+        },
+    ),
+    "paper_graph": _schema(
+        required=["neighbors"],
+        properties={
+            "_id": {"bsonType": "string"},
+            "neighbors": {
+                "bsonType": "array",
+                "items": {
+                    "bsonType": "object",
+                    "required": ["id", "weight"],
+                    "properties": {
+                        "id": {"bsonType": "string"},
+                        "weight": {"bsonType": "double"},
+                        "relation": {"bsonType": ["string", "null"]},
+                    },
+                },
+            },
+            "created_at": {"bsonType": "date"},
+            "updated_at": {"bsonType": "date"},
+        },
+    ),
+    "paper_features": _schema(
+        required=["vec", "v"],
+        properties={
+            "_id": {"bsonType": "string"},
+            "vec": {"bsonType": "binData"},
+            "lsh": {"bsonType": "array"},
+            "terms": {"bsonType": "binData"},
+            "authors": {"bsonType": "binData"},
+            "year": {"bsonType": ["int", "null"]},
+            "v": {"bsonType": "int"},
+            "created_at": {"bsonType": "date"},
+            "updated_at": {"bsonType": "date"},
+        },
+    ),
+    "upload_blobs": _schema(
+        required=["area", "rel_path", "size", "last_used_at"],
+        properties={
+            "_id": {"bsonType": "string"},
+            "area": {"bsonType": "string"},
+            "rel_path": {"bsonType": "string"},
+            "sha256": {"bsonType": "string"},
+            "size": {"bsonType": ["int", "long"]},
+            "created_at": {"bsonType": "date"},
+            "last_used_at": {"bsonType": "date"},
+        },
+    ),
+    "storage_ledger": _schema(
+        properties={
+            "_id": {"bsonType": "string"},
+            "bytes": {"bsonType": ["int", "long"]},
+            "files": {"bsonType": ["int", "long"]},
+            "gc_cursor": {"bsonType": ["string", "null"]},
+            "baseline_at": {"bsonType": "date"},
+            "updated_at": {"bsonType": "date"},
+        },
+    ),
     "papers": _schema(
         required=["user_id", "title", "created_at"],
         properties={
@@ -93,6 +216,25 @@ COLLECTION_SCHEMAS: Dict[str, Dict[str, Any]] = {
             "created_at": {"bsonType": "date"},
         },
     ),
+    "paper_catalog": _schema(
+        required=["title_key", "title", "last_seen_at"],
+        properties={
+            "title_key": {"bsonType": "string"},
+            "title": {"bsonType": "string"},
+            "abstract": {"bsonType": ["string", "null"]},
+            "url": {"bsonType": ["string", "null"]},
+            "authors": {"bsonType": "array"},
+            "year": {"bsonType": ["int", "null"]},
+            "venue": {"bsonType": ["string", "null"]},
+            "source": {"bsonType": ["string", "null"]},
+            "paper_uid": {"bsonType": ["string", "null"]},
+            "subject_areas": {"bsonType": "array"},
+            "seen_count": {"bsonType": "int"},
+            "first_seen_at": {"bsonType": "date"},
+            "last_seen_at": {"bsonType": "date"},
+            "fetched_at": {"bsonType": "date"},
+        },
+    ),
     "collections": _schema(
         required=["user_id", "name", "created_at"],
         properties={
@@ -279,6 +421,37 @@ COLLECTION_INDEXES: Dict[str, List[Dict[str, Any]]] = {
     ],
     "queries": [
         {"keys": [("user_id", 1), ("created_at", -1)]},
+        {"keys": [("user_id", 1), ("text_fingerprint", 1), ("created_at", -1)]},
+        {
+            "keys": [("user_id", 1), ("idempotency_key", 1)],
+            "unique": True,
+            "partialFilterExpression": {"idempotency_key": {"$type": "string"}},
+        },
+    ],
+    "assistant_jobs": [
+        {"keys": [("status", 1), ("created_at", 1)]},
+        {"keys": [("user_id", 1), ("status", 1)]},
+        {"keys": [("status", 1), ("lease_until", 1)]},
+        {"keys": [("expires_at", 1)], "expireAfterSeconds": 0},
+    ],
+    "extracted_texts": [
+        {"keys": [("last_used_at", 1)]},
+    ],
+    "graph_cache": [
+        {"keys": [("user_id", 1), ("query_id", 1)]},
+        {"keys": [("expires_at", 1)], "expireAfterSeconds": 0},
+    ],
+    "paper_features": [
+        {"keys": [("lsh", 1)]},
+    ],
+    "paper_graph": [
+        {"keys": [("updated_at", 1)]},
+    ],
+    "paper_centrality": [
+        {"keys": [("computed_at", 1)]},
+    ],
+    "upload_blobs": [
+        {"keys": [("area", 1), ("last_used_at", 1)]},
     ],
     "papers": [
         {"keys": [("user_id", 1)]},
@@ -287,6 +460,17 @@ COLLECTION_INDEXES: Dict[str, List[Dict[str, Any]]] = {
         {"keys": [("user_id", 1), ("kind", 1), ("created_at", -1)]},
         {"keys": [("user_id", 1), ("query_id", 1), ("rank", 1)]},
     ],
+    "paper_catalog": [
+        {"keys": [("title_key", 1)], "unique": True},
+        {"keys": [("last_seen_at", -1)]},
+        {"keys": [("fetched_at", -1)]},
+        {"keys": [("paper_uid", 1)]},
+        {
+            "keys": [("title", "text"), ("abstract", "text")],
+            "weights": {"title": 3, "abstract": 1},
+            "name": "paper_catalog_text",
+        },
+    ],
     "collections": [
         {"keys": [("user_id", 1)]},
         {"keys": [("user_id", 1), ("position", 1)]},
@@ -0,0 +1,175 @@
+# app/db/write_behind.py
+"""
+Write-behind queue for non-critical Mongo writes (analytics events, paper
+catalog rows). Writes are queued on the request path and flushed in batches
+by a background loop started in app.main.
+
+With REDIS_URL set the queue is a Redis list: a batch is read, written and
+only then trimmed (under a short lock), so writes survive a worker restart.
+Every queued insert carries its own `_id`, which makes a replayed batch
+idempotent (duplicates are rejected by Mongo and ignored); queued upserts
+must be idempotent themselves ($set / $max, never $inc). Without Redis the
+queue is process memory and is flushed on shutdown.
+
+A batch that fails WRITE_BEHIND_MAX_ATTEMPTS flushes in a row is written
+one operation at a time; the operations that still fail are moved to the
+`write_behind:dead` list (or dropped and logged without Redis), so one poison
+operation cannot block the queue.
+"""
+import os
+import uuid
+import asyncio
+import logging
+from bson import ObjectId, json_util
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+try:
+    import redis.asyncio as redis
+except Exception:  # pragma: no cover
+    redis = None
+
+from app.db.mongo import get_db
+
+logger = logging.getLogger(__name__)
+
+WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "0") == "1"
+_FLUSH_BATCH = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "500"))
+_MAX_ATTEMPTS = int(os.getenv("WRITE_BEHIND_MAX_ATTEMPTS", "5"))
+_QUEUE_KEY = "write_behind:queue"
+_LOCK_KEY = "write_behind:lock"
+_FAILURES_KEY = "write_behind:failures"
+_DEAD_KEY = "write_behind:dead"
+
+_REDIS = None
+_REDIS_URL = os.getenv("REDIS_URL", "").strip()
+if _REDIS_URL and redis:
+    _REDIS = redis.from_url(_REDIS_URL, decode_responses=True)
+
+
+class WriteBehindQueue:
+    def __init__(self, redis_client=None, db=None):
+        self._redis = redis_client
+        self._db = db
+        self._pending: list[dict] = []
+        self._failures = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_db()
+
+    async def insert(self, collection: str, doc: dict) -> None:
+        doc.setdefault("_id", ObjectId())
+        await self._push({"c": collection, "op": "insert", "doc": doc})
+
+    async def upsert(self, collection: str, filter_doc: dict, update: dict) -> None:
+        await self._push({"c": collection, "op": "upsert", "filter": filter_doc, "update": update})
+
+    async def _push(self, item: dict) -> None:
+        if self._redis:
+            try:
+                await self._redis.rpush(_QUEUE_KEY, json_util.dumps(item))
+                return
+            except Exception:
+                logger.warning("Write-behind Redis push failed; buffering in memory", exc_info=True)
+        self._pending.append(item)
+
+    async def flush(self, max_items: int | None = None) -> int:
+        """Write up to `max_items` queued operations. Returns how many were written."""
+        max_items = max_items or _FLUSH_BATCH
+        async with self._lock:
+            written = 0
+            if self._pending:
+                batch = self._pending[:max_items]
+                try:
+                    await self._write(batch)
+                except Exception:
+                    self._failures += 1
+                    if self._failures < _MAX_ATTEMPTS:
+                        raise
+                    dead = await self._write_each(batch, lambda item: item)
+                    if dead:
+                        logger.error("Write-behind dropped %s operations that keep failing", len(dead))
+                self._failures = 0
+                del self._pending[: len(batch)]
+                written += len(batch)
+            if self._redis and written < max_items:
+                written += await self._flush_redis(max_items - written)
+            return written
+
+    async def _flush_redis(self, max_items: int) -> int:
+        token = uuid.uuid4().hex
+        try:
+            if not await self._redis.set(_LOCK_KEY, token, nx=True, px=30000):
+                return 0
+            try:
+                raw = await self._redis.lrange(_QUEUE_KEY, 0, max_items - 1)
+                if not raw:
+                    return 0
+                try:
+                    await self._write([json_util.loads(r) for r in raw])
+                except Exception:
+                    if int(await self._redis.incr(_FAILURES_KEY)) < _MAX_ATTEMPTS:
+                        raise
+                    dead = await self._write_each(raw, json_util.loads)
+                    if dead:
+                        await self._redis.rpush(_DEAD_KEY, *dead)
+                        logger.error("Write-behind moved %s operations to %s", len(dead), _DEAD_KEY)
+                await self._redis.ltrim(_QUEUE_KEY, len(raw), -1)
+                await self._redis.delete(_FAILURES_KEY)
+                return len(raw)
+            finally:
+                if await self._redis.get(_LOCK_KEY) == token:
+                    await self._redis.delete(_LOCK_KEY)
+        except Exception:
+            logger.exception("Write-behind Redis flush failed")
+            return 0
+
+    async def _write_each(self, items: list, decode) -> list:
+        """Write queued operations one at a time; returns the ones that fail."""
+        failed = []
+        for item in items:
+            try:
+                await self._write([decode(item)])
+            except Exception:
+                failed.append(item)
+        return failed
+
+    async def _write(self, batch: list[dict]) -> None:
+        by_collection: dict[str, list] = {}
+        for item in batch:
+            by_collection.setdefault(item["c"], []).append(item)
+
+        for name, items in by_collection.items():
+            if name == "analytics_events":
+                items = await self._drop_opted_out(items)
+            ops = [
+                InsertOne(i["doc"]) if i["op"] == "insert"
+                else UpdateOne(i["filter"], i["update"], upsert=True)
+                for i in items
+            ]
+            if not ops:
+                continue
+            try:
+                await self.db[name].bulk_write(ops, ordered=False)
+            except BulkWriteError as e:
+                # replayed inserts hit duplicate _ids (code 11000): already written.
+                # Anything else is retried, then dead-lettered (see flush()).
+                errors = [w for w in e.details.get("writeErrors", []) if w.get("code") != 11000]
+                if errors:
+                    logger.error("Write-behind flush to %s had %s errors", name, len(errors))
+                    raise
+
+    async def _drop_opted_out(self, items: list[dict]) -> list[dict]:
+        # one query per batch instead of a users.find_one per event
+        user_ids = list({i["doc"].get("user_id") for i in items if i["doc"].get("user_id")})
+        if not user_ids:
+            return items
+        cursor = self.db["users"].find(
+            {"_id": {"$in": user_ids}, "analytics_opt_out": True}, {"_id": 1}
+        )
+        opted_out = {u["_id"] for u in await cursor.to_list(length=None)}
+        return [i for i in items if i["doc"].get("user_id") not in opted_out]
+
+
+write_behind = WriteBehindQueue(redis_client=_REDIS)
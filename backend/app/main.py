@@ -5,16 +5,17 @@ from datetime import datetime
 import httpx
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.core.config import settings
 from app.core.logger import setup_logging   # OK FIX: correct function name
 from app.core.time_utils import now_ist
+from app.core.timing import stage_stats
 
 from app.db.indexes import ensure_indexes
 from app.db.schema_and_indexes import ensure_schema_and_indexes
 from app.db.mongo import get_db
+from app.db.write_behind import write_behind
 
 from app.api.routes.auth import router as auth_router
 from app.api.routes.assistant import router as assistant_router
@@ -23,6 +24,10 @@ from app.api.routes.papers import router as papers_router   # OK include papers
 from app.services.vectorizer_service import VectorizerService
 from app.services.model_service import ModelService
 from app.services.assistant_service import AssistantService
+from app.services.assistant_job_service import AssistantJobService
+from app.services.bulk_ingest_service import BulkIngestService
+from app.core.file_serving import CachedStaticFiles
+from app.services.graph_adjacency_cache import adjacency_cache
 from app.api.routes import chatbot
 from app.api.routes import analytics
 from app.api.routes import graph
@@ -38,6 +43,21 @@ from app.api.routes import admin_sessions
 from app.api.routes import admin_auth
 from app.api.routes import admin_metrics
 from app.services.admin_metrics_service import AdminMetricsService
+from app.services.paper_prefetch_service import PaperPrefetchService
+from app.services.storage_manager import StorageManager
+from app.services.graph_centrality_service import GraphCentralityService
+from app.services.extraction_service import extraction_service
+from app.services.file_service import (
+    upload_stats,
+    MAX_QUERY_UPLOAD_BYTES,
+    MAX_FEEDBACK_ATTACHMENT_BYTES,
+    MAX_COMPLIANCE_EVIDENCE_BYTES,
+    MAX_BULK_INGEST_BYTES,
+)
+from app.middleware.block_ip import BlockIpMiddleware
+from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.server_timing import ServerTimingMiddleware
+from app.middleware.upload_limit import UploadLimitMiddleware
 
 
 
@@ -80,6 +100,20 @@ async def lifespan(app: FastAPI):
             await asyncio.sleep(interval)
 
     app.state.health_task = asyncio.create_task(_snapshot_loop())
+
+    flush_interval = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "2"))
+
+    async def _write_behind_loop():
+        while True:
+            try:
+                await write_behind.flush()
+            except Exception:
+                logger.exception("Failed to flush write-behind queue")
+            await asyncio.sleep(flush_interval)
+
+    app.state.write_behind_task = asyncio.create_task(_write_behind_loop())
+    if os.getenv("ASSISTANT_JOBS_ENABLED", "1") == "1":
+        assistant_jobs.start()
     scheduler = None
     try:
         from apscheduler.schedulers.asyncio import AsyncIOScheduler
@@ -92,6 +126,63 @@ async def lifespan(app: FastAPI):
                 logger.exception("Failed to process compliance jobs")
 
         scheduler.add_job(_compliance_job_tick, "interval", seconds=60)
+
+        if os.getenv("PAPER_PREFETCH_ENABLED", "1") == "1":
+            prefetch = PaperPrefetchService(assistant_service.paper_search)
+            prefetch_interval = int(os.getenv("PAPER_PREFETCH_INTERVAL_SECONDS", "1800"))
+
+            async def _paper_prefetch_tick():
+                try:
+                    await prefetch.run_once()
+                except Exception:
+                    logger.exception("Failed to prefetch popular paper searches")
+
+            scheduler.add_job(
+                _paper_prefetch_tick,
+                "interval",
+                seconds=max(60, prefetch_interval),
+                max_instances=1,
+                coalesce=True,
+            )
+
+        if os.getenv("STORAGE_GC_ENABLED", "1") == "1":
+            storage = StorageManager()
+            gc_interval = int(os.getenv("STORAGE_GC_INTERVAL_SECONDS", "3600"))
+
+            async def _storage_gc_tick():
+                try:
+                    stats = await storage.run_gc()
+                    if stats["expired"] or stats["orphans"]:
+                        logger.info("Storage GC removed %s", stats)
+                except Exception:
+                    logger.exception("Failed to run storage GC")
+
+            scheduler.add_job(
+                _storage_gc_tick,
+                "interval",
+                seconds=max(60, gc_interval),
+                max_instances=1,
+                coalesce=True,
+            )
+
+        if os.getenv("GRAPH_CENTRALITY_ENABLED", "1") == "1":
+            centrality = GraphCentralityService()
+            centrality_interval = int(os.getenv("GRAPH_CENTRALITY_INTERVAL_SECONDS", "21600"))
+
+            async def _graph_centrality_tick():
+                try:
+                    stats = await centrality.run()
+                    logger.info("Graph centrality updated: %s", stats)
+                except Exception:
+                    logger.exception("Failed to compute graph centrality")
+
+            scheduler.add_job(
+                _graph_centrality_tick,
+                "interval",
+                seconds=max(300, centrality_interval),
+                max_instances=1,
+                coalesce=True,
+            )
         scheduler.start()
         app.state.compliance_scheduler = scheduler
     except Exception:
@@ -114,13 +205,28 @@ async def lifespan(app: FastAPI):
     sched = getattr(app.state, "compliance_scheduler", None)
     if sched:
         sched.shutdown(wait=False)
+    await assistant_jobs.stop()
+    extraction_service.shutdown()
+    wb_task = getattr(app.state, "write_behind_task", None)
+    if wb_task:
+        wb_task.cancel()
+        try:
+            await wb_task
+        except BaseException:
+            pass
+    try:
+        while await write_behind.flush():
+            pass
+    except Exception:
+        logger.exception("Failed to drain write-behind queue on shutdown")
 
 
 app = FastAPI(title=settings.APP_NAME, lifespan=lifespan)
 app.state.started_at = None
 UPLOADS_DIR = os.path.join(os.path.dirname(__file__), "uploads")
 os.makedirs(UPLOADS_DIR, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=UPLOADS_DIR), name="uploads")
+# user evidence: cacheable by the browser only, never by shared caches
+app.mount("/uploads", CachedStaticFiles(directory=UPLOADS_DIR, private=True), name="uploads")
 
 # OK 2) middleware
 allow_all = os.getenv("CORS_ALLOW_ALL", "").lower() in {"1", "true", "yes"} or settings.ENV == "dev"
@@ -137,12 +243,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
-from app.middleware.block_ip import BlockIpMiddleware
 app.add_middleware(
     BlockIpMiddleware,
     exclude_paths=["/healthz", "/healthz/ready", "/metrics"],
 )
-from app.middleware.rate_limit import RateLimitMiddleware
 app.add_middleware(
     RateLimitMiddleware,
     max_requests=200,
@@ -153,8 +257,21 @@ app.add_middleware(
         "/graph/query",
         "/graph/paper",
         "/graph/neighbors",
+        "/graph/expand",
+        "/graph/export",
     ],
 )
+app.add_middleware(ServerTimingMiddleware)
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/assistant/analyze-file": MAX_QUERY_UPLOAD_BYTES,
+        "/assistant/query-file": MAX_QUERY_UPLOAD_BYTES,
+        "/assistant/ingest": MAX_BULK_INGEST_BYTES,
+        "/feedback/attachments": MAX_FEEDBACK_ATTACHMENT_BYTES,
+        "/admin/compliance/evidence/upload": MAX_COMPLIANCE_EVIDENCE_BYTES,
+    },
+)
 
 # OK 3) routers
 app.include_router(auth_router)
@@ -180,6 +297,8 @@ ARTIFACTS_DIR = os.path.join(os.path.dirname(__file__), "artifacts")
 vectorizer_service = VectorizerService(ARTIFACTS_DIR)
 model_service = ModelService(ARTIFACTS_DIR)
 assistant_service = AssistantService(model_service, vectorizer_service)
+assistant_jobs = AssistantJobService(assistant_service)
+bulk_ingest = BulkIngestService(assistant_service)
 
 
 async def _log_gemini_status():
@@ -244,4 +363,7 @@ def metrics():
     return {
         "app": settings.APP_NAME,
         "uptime_seconds": uptime_seconds,
+        "stages": stage_stats(),
+        "uploads": upload_stats(),
+        "graph_cache": adjacency_cache.stats(),
     }
@@ -0,0 +1,25 @@
+# app/middleware/server_timing.py
+import time
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import Response
+
+from app.core.timing import start_request_timings, server_timing_header
+
+
+class ServerTimingMiddleware(BaseHTTPMiddleware):
+    """
+    Collects the stage spans recorded while handling a request and returns
+    them in a `Server-Timing` header (plus the total handler time).
+    """
+
+    async def dispatch(self, request: Request, call_next):
+        timings = start_request_timings()
+        start = time.perf_counter()
+        response: Response = await call_next(request)
+        total_ms = (time.perf_counter() - start) * 1000
+        if timings:
+            response.headers["Server-Timing"] = server_timing_header(
+                timings + [("total", total_ms)]
+            )
+        return response
@@ -0,0 +1,59 @@
+# app/middleware/upload_limit.py
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+
+class UploadLimitMiddleware:
+    """
+    Per-path request body limits for upload endpoints.
+
+    A declared Content-Length over the limit is rejected with 413 before the
+    body is read. Bodies without a length (chunked) are counted while the
+    endpoint reads them, and reading stops with a 413 once the limit is passed.
+    """
+
+    def __init__(self, app, limits: dict[str, int], overhead_bytes: int = 64 * 1024):
+        self.app = app
+        # longest prefix first; multipart framing gets a small allowance
+        self.limits = sorted(
+            ((p, n + overhead_bytes) for p, n in limits.items()),
+            key=lambda x: len(x[0]),
+            reverse=True,
+        )
+
+    def _limit_for(self, path: str) -> int | None:
+        for prefix, limit in self.limits:
+            if path.startswith(prefix):
+                return limit
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("method") not in {"POST", "PUT", "PATCH"}:
+            return await self.app(scope, receive, send)
+        limit = self._limit_for(scope.get("path", ""))
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        for name, value in scope.get("headers", []):
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    declared = 0
+                if declared > limit:
+                    response = JSONResponse({"detail": "Upload too large"}, status_code=413)
+                    return await response(scope, receive, send)
+                break
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail="Upload too large")
+            return message
+
+        return await self.app(scope, limited_receive, send)
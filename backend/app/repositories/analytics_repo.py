@@ -3,6 +3,7 @@ from app.core.time_utils import now_ist
 import os
 import asyncio
 from app.db.mongo import get_db
+from app.db.write_behind import write_behind
 
 
 class AnalyticsRepo:
@@ -29,7 +30,16 @@ class AnalyticsRepo:
         }
         return await self.events.insert_one(doc)
 
-    async def emit(self, user_id, event: str, meta: dict | None = None):
+    async def emit(self, user_id, event: str, meta: dict | None = None, defer: bool = False):
+        if defer:
+            # opt-out is checked per batch when the queue is flushed
+            doc = {
+                "user_id": user_id,
+                "event": event,
+                "meta": meta or {},
+                "created_at": now_ist(),
+            }
+            return await write_behind.insert(self.events.name, doc)
         if os.getenv("ANALYTICS_ASYNC", "0") == "1":
             try:
                 asyncio.create_task(self.track_event(user_id, event, meta))
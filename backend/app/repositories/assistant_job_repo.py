@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from app.core.time_utils import now_ist
+from app.repositories.base_repo import BaseRepo
+
+
+def now_utc():
+    return now_ist()
+
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class AssistantJobRepo(BaseRepo):
+    """
+    Background assistant jobs (file queries). Workers claim queued jobs
+    atomically and hold a lease that is renewed on every progress update;
+    jobs whose lease expired (worker died, process restarted) are re-queued.
+    """
+
+    collection_name = "assistant_jobs"
+
+    async def get_for_user(self, job_id, user_id):
+        return await self.find_one({"_id": job_id, "user_id": user_id})
+
+    async def count_active_for_user(self, user_id) -> int:
+        return await self.count({"user_id": user_id, "status": {"$in": [JOB_QUEUED, JOB_RUNNING]}})
+
+    async def saturated_users(self, max_running: int) -> list:
+        pipeline = [
+            {"$match": {"status": JOB_RUNNING}},
+            {"$group": {"_id": "$user_id", "count": {"$sum": 1}}},
+            {"$match": {"count": {"$gte": max_running}}},
+        ]
+        rows = await self.col.aggregate(pipeline).to_list(None)
+        return [r["_id"] for r in rows]
+
+    async def claim_next(self, worker_id: str, lease_seconds: int, exclude_users: list | None = None):
+        now = now_utc()
+        match = {"status": JOB_QUEUED}
+        if exclude_users:
+            match["user_id"] = {"$nin": exclude_users}
+        return await self.col.find_one_and_update(
+            match,
+            {
+                "$set": {
+                    "status": JOB_RUNNING,
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now,
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def running_before(self, job: dict) -> int:
+        """Running jobs of the job's user that were claimed before it."""
+        return await self.count(
+            {
+                "user_id": job["user_id"],
+                "status": JOB_RUNNING,
+                "_id": {"$ne": job["_id"]},
+                "$or": [
+                    {"started_at": {"$lt": job["started_at"]}},
+                    {"started_at": job["started_at"], "_id": {"$lt": job["_id"]}},
+                ],
+            }
+        )
+
+    async def release(self, job: dict, worker_id: str) -> None:
+        """Hand a claimed job back to the queue without counting the attempt."""
+        await self.update_one(
+            {"_id": job["_id"], "status": JOB_RUNNING, "worker_id": worker_id},
+            {
+                "$set": {"status": JOB_QUEUED, "updated_at": now_utc()},
+                "$unset": {"lease_until": "", "worker_id": "", "started_at": ""},
+                "$inc": {"attempts": -1},
+            },
+        )
+
+    async def set_progress(self, job_id, stage: str, progress: int, lease_seconds: int):
+        now = now_utc()
+        await self.update_one(
+            {"_id": job_id, "status": JOB_RUNNING},
+            {
+                "$set": {
+                    "stage": stage,
+                    "progress": progress,
+                    "lease_until": now + timedelta(seconds=lease_seconds),
+                    "updated_at": now,
+                }
+            },
+        )
+
+    async def finish(self, job_id, status: str, expires_at: datetime, result=None, error=None):
+        now = now_utc()
+        fields = {
+            "status": status,
+            "stage": status,
+            "updated_at": now,
+            "finished_at": now,
+            "expires_at": expires_at,
+            "error": error,
+        }
+        if status == JOB_DONE:
+            fields["progress"] = 100
+            fields["result"] = result
+            fields["query_id"] = (result or {}).get("query_id")
+        await self.update_one({"_id": job_id}, {"$set": fields, "$unset": {"lease_until": ""}})
+
+    async def requeue_stale(self, max_attempts: int, expires_at: datetime) -> int:
+        """Re-queue running jobs whose lease expired; fail those out of attempts."""
+        now = now_utc()
+        stale = {"status": JOB_RUNNING, "lease_until": {"$lt": now}}
+        failed = await self.col.update_many(
+            {**stale, "attempts": {"$gte": max_attempts}},
+            {
+                "$set": {
+                    "status": JOB_FAILED,
+                    "stage": JOB_FAILED,
+                    "error": "Job interrupted too many times",
+                    "finished_at": now,
+                    "updated_at": now,
+                    "expires_at": expires_at,
+                },
+                "$unset": {"lease_until": ""},
+            },
+        )
+        requeued = await self.col.update_many(
+            stale,
+            {
+                "$set": {"status": JOB_QUEUED, "stage": JOB_QUEUED, "progress": 0, "updated_at": now},
+                "$unset": {"lease_until": "", "worker_id": ""},
+            },
+        )
+        return int(requeued.modified_count) + int(failed.modified_count)
@@ -0,0 +1,38 @@
+from app.core.time_utils import now_ist
+from app.repositories.base_repo import BaseRepo
+
+
+def now_utc():
+    return now_ist()
+
+
+class ExtractedTextRepo(BaseRepo):
+    """
+    Extracted document text keyed by the upload's SHA-256 (`_id`), plus
+    the cached top predictions for the model version that produced them.
+    """
+
+    collection_name = "extracted_texts"
+
+    async def get(self, sha256: str):
+        return await self.col.find_one_and_update(
+            {"_id": sha256},
+            {"$set": {"last_used_at": now_utc()}, "$inc": {"hits": 1}},
+        )
+
+    async def save(self, sha256: str, doc: dict):
+        now = now_utc()
+        await self.update_one(
+            {"_id": sha256},
+            {
+                "$set": {**doc, "last_used_at": now},
+                "$setOnInsert": {"created_at": now, "hits": 0},
+            },
+            upsert=True,
+        )
+
+    async def save_predictions(self, sha256: str, model_version: str, predictions: list):
+        await self.update_one(
+            {"_id": sha256},
+            {"$set": {"predictions": {"model_version": model_version, "top": predictions}}},
+        )
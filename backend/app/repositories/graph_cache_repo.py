@@ -0,0 +1,45 @@
+from app.core.time_utils import now_ist
+from app.repositories.base_repo import BaseRepo
+
+
+def now_utc():
+    return now_ist()
+
+
+class GraphCacheRepo(BaseRepo):
+    """
+    Computed graph payloads per (user, query, graph kind, algorithm version).
+    `_id` is built by key(); rows expire through a TTL index on expires_at.
+    """
+
+    collection_name = "graph_cache"
+
+    @staticmethod
+    def key(user_id, query_id, kind: str, version: int) -> str:
+        return f"{user_id}:{query_id}:{kind}:v{version}"
+
+    async def get(self, key: str):
+        return await self.find_one({"_id": key, "expires_at": {"$gt": now_utc()}})
+
+    async def save(self, key: str, user_id, query_id, kind: str, payload: dict, etag: str, expires_at):
+        await self.update_one(
+            {"_id": key},
+            {
+                "$set": {
+                    "user_id": user_id,
+                    "query_id": query_id,
+                    "kind": kind,
+                    "payload": payload,
+                    "etag": etag,
+                    "created_at": now_utc(),
+                    "expires_at": expires_at,
+                }
+            },
+            upsert=True,
+        )
+
+    async def invalidate(self, user_id, query_id=None):
+        query = {"user_id": user_id}
+        if query_id is not None:
+            query["query_id"] = query_id
+        return await self.delete_many(query)
@@ -1,4 +1,6 @@
+import os
 from datetime import datetime
+from pymongo import UpdateOne
 from app.core.time_utils import now_ist
 from app.repositories.base_repo import BaseRepo
 
@@ -7,58 +9,162 @@ def now_utc():
     return now_ist()
 
 
+PAPER_GRAPH_MAX_NEIGHBORS = int(os.getenv("PAPER_GRAPH_MAX_NEIGHBORS", "100"))
+
+
+def _edge(paper_id: str, n: dict) -> dict:
+    return {
+        "paper_id": paper_id,
+        "related_paper_id": n.get("id"),
+        "weight": n.get("weight", 0.0),
+        "relation_type": n.get("relation"),
+    }
+
+
 class GraphRepo(BaseRepo):
+    """
+    One document per paper: `_id` is the paper id and `neighbors` its
+    strongest edges, [{id, weight, relation}] sorted by weight descending and
+    capped at PAPER_GRAPH_MAX_NEIGHBORS. Reads still hand out edge dicts
+    (paper_id, related_paper_id, weight, relation_type).
+    """
+
     collection_name = "paper_graph"
 
+    @staticmethod
+    def merge_ops(paper_id: str, neighbors: list, created_at=None) -> list:
+        """
+        One pipeline update (atomic per document, so concurrent linkers cannot
+        interleave): existing entries for the incoming ids are replaced by the
+        heavier of the two, then the array is re-sorted and bounded.
+        """
+        now = now_utc()
+        incoming = [{"id": n["id"], "weight": float(n["weight"]), "relation": n.get("relation")} for n in neighbors]
+        current = {"$ifNull": ["$neighbors", []]}
+        merged = {
+            "$map": {
+                "input": {"$literal": incoming},
+                "as": "m",
+                "in": {
+                    "$let": {
+                        "vars": {
+                            "old": {
+                                "$first": {
+                                    "$filter": {"input": current, "as": "n", "cond": {"$eq": ["$$n.id", "$$m.id"]}}
+                                }
+                            }
+                        },
+                        "in": {"$cond": [{"$gt": ["$$old.weight", "$$m.weight"]}, "$$old", "$$m"]},
+                    }
+                },
+            }
+        }
+        kept = {
+            "$filter": {
+                "input": current,
+                "as": "n",
+                "cond": {"$not": [{"$in": ["$$n.id", {"$literal": [n["id"] for n in incoming]}]}]},
+            }
+        }
+        return [
+            UpdateOne(
+                {"_id": paper_id},
+                [
+                    {
+                        "$set": {
+                            "created_at": {"$ifNull": ["$created_at", created_at or now]},
+                            "updated_at": now,
+                            "neighbors": {
+                                "$slice": [
+                                    {"$sortArray": {"input": {"$concatArrays": [kept, merged]}, "sortBy": {"weight": -1}}},
+                                    PAPER_GRAPH_MAX_NEIGHBORS,
+                                ]
+                            },
+                        }
+                    }
+                ],
+                upsert=True,
+            )
+        ]
+
     async def add_edge(self, paper_id: str, related_paper_id: str, relation_type: str, weight: float):
-        return await self.col.update_one(
-            {
-                "paper_id": paper_id,
-                "related_paper_id": related_paper_id,
-            },
-            {
-                "$setOnInsert": {
+        return await self.bulk_insert(
+            [
+                {
                     "paper_id": paper_id,
                     "related_paper_id": related_paper_id,
-                    "created_at": now_utc(),
-                },
-                "$set": {"relation_type": relation_type},
-                "$max": {"weight": weight},
-            },
-            upsert=True,
+                    "relation_type": relation_type,
+                    "weight": weight,
+                }
+            ]
         )
 
     async def bulk_insert(self, edges: list):
+        """Upsert directed edges, grouped into one neighbour-array update per source paper."""
         if not edges:
             return None
-        ops = []
+        rows: dict = {}
         for e in edges:
-            ops.append(
-                {
-                    "updateOne": {
-                        "filter": {
-                            "paper_id": e["paper_id"],
-                            "related_paper_id": e["related_paper_id"],
-                        },
-                        "update": {
-                            "$setOnInsert": {
-                                "paper_id": e["paper_id"],
-                                "related_paper_id": e["related_paper_id"],
-                                "created_at": e.get("created_at") or now_utc(),
-                            },
-                            "$set": {"relation_type": e["relation_type"]},
-                            "$max": {"weight": e["weight"]},
-                        },
-                        "upsert": True,
-                    }
+            row = rows.setdefault(e["paper_id"], {})
+            prev = row.get(e["related_paper_id"])
+            if prev is None or e["weight"] > prev["weight"]:
+                row[e["related_paper_id"]] = {
+                    "id": e["related_paper_id"],
+                    "weight": e["weight"],
+                    "relation": e["relation_type"],
                 }
-            )
-        return await self.col.bulk_write(ops, ordered=False)
+        ops = []
+        for paper_id, row in rows.items():
+            ops.extend(self.merge_ops(paper_id, list(row.values())))
+        return await self.col.bulk_write(ops, ordered=True)
 
     async def get_related(self, paper_id: str, limit: int = 50):
-        cursor = (
-            self.col.find({"paper_id": paper_id})
-            .sort("weight", -1)
-            .limit(limit)
-        )
-        return await cursor.to_list(length=limit)
+        doc = await self.col.find_one({"_id": paper_id}, {"neighbors": {"$slice": limit}})
+        return [_edge(paper_id, n) for n in (doc or {}).get("neighbors") or []]
+
+    async def edge_count(self) -> int:
+        """Total stored edges (sum of the neighbour array sizes)."""
+        rows = await self.col.aggregate(
+            [{"$group": {"_id": None, "edges": {"$sum": {"$size": {"$ifNull": ["$neighbors", []]}}}}}]
+        ).to_list(length=1)
+        return int(rows[0]["edges"]) if rows else 0
+
+    def iter_nodes(self, since=None, batch_size: int = 1000):
+        """Cursor over {_id, neighbors}, optionally only nodes updated after `since`."""
+        query = {"updated_at": {"$gt": since}} if since is not None else {}
+        return self.col.find(query, {"neighbors": 1}, batch_size=batch_size)
+
+    def nodes_by_ids(self, paper_ids: list[str]):
+        """Cursor over {_id, neighbors} for the given papers."""
+        return self.col.find({"_id": {"$in": list(paper_ids)}}, {"neighbors": 1})
+
+    async def neighborhood(self, paper_id: str, depth: int, min_weight: float, fan_out: int, limit: int):
+        """
+        Edges within `depth` hops of `paper_id`, fetched one hop at a time
+        (used when the in-process adjacency cache cannot answer). Each visited
+        node contributes its top `fan_out` edges of weight >= `min_weight`, and
+        only those edges are followed; at most `limit` node documents are read.
+        """
+        seen = {paper_id}
+        frontier = [paper_id]
+        edges = []
+        for _ in range(depth):
+            frontier = frontier[:limit]
+            if not frontier:
+                break
+            limit -= len(frontier)
+            docs = {}
+            async for doc in self.col.find({"_id": {"$in": frontier}}, {"neighbors": {"$slice": fan_out}}):
+                docs[doc["_id"]] = doc
+            nxt = []
+            # frontier order, so a truncated next hop keeps the strongest paths
+            for node in frontier:
+                for n in (docs.get(node) or {}).get("neighbors") or []:
+                    if not n.get("id") or (n.get("weight") or 0.0) < min_weight:
+                        continue
+                    edges.append(_edge(node, n))
+                    if n["id"] not in seen:
+                        seen.add(n["id"])
+                        nxt.append(n["id"])
+            frontier = nxt
+        return edges
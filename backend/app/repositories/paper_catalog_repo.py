@@ -0,0 +1,106 @@
+from datetime import datetime
+from app.core.time_utils import now_ist
+from pymongo import UpdateOne
+from app.repositories.base_repo import BaseRepo
+
+
+def now_utc():
+    return now_ist()
+
+
+def catalog_key(title: str | None) -> str:
+    return " ".join((title or "").strip().lower().split())
+
+
+class PaperCatalogRepo(BaseRepo):
+    """
+    Deduplicated paper corpus (one document per normalized title),
+    searchable through the `paper_catalog` text index. `fetched_at` is the
+    last time a provider returned the paper; re-saving a catalog hit only
+    moves `last_seen_at`.
+    """
+
+    collection_name = "paper_catalog"
+
+    def build_upserts(
+        self,
+        papers: list[dict],
+        subject_area: str | None = None,
+        fetched_keys: set[str] | None = None,
+    ) -> list[tuple]:
+        """
+        (filter, update) pairs; also queued as-is by the write-behind path,
+        which may replay a batch, so updates must be idempotent ($set / $max,
+        no $inc). Papers whose key is in `fetched_keys` (just returned by a
+        provider) also move `fetched_at`.
+        """
+        now = now_utc()
+        upserts = []
+        for p in papers:
+            key = catalog_key(p.get("title"))
+            if not key:
+                continue
+            set_fields = {"title": (p.get("title") or "").strip()}
+            seen = {"last_seen_at": now}
+            for field in ("url", "year", "venue", "source"):
+                if p.get(field) is not None:
+                    set_fields[field] = p.get(field)
+            if p.get("authors"):
+                set_fields["authors"] = p.get("authors")
+            if fetched_keys and key in fetched_keys:
+                seen["fetched_at"] = now
+            abstract = (p.get("abstract") or "").strip()
+            if abstract and abstract != "NOT_AVAILABLE":
+                set_fields["abstract"] = abstract
+            update = {
+                "$set": set_fields,
+                # a replayed (older) write never moves the timestamps back
+                "$max": seen,
+                "$setOnInsert": {
+                    "title_key": key,
+                    "paper_uid": p.get("paper_uid"),
+                    "first_seen_at": now,
+                },
+            }
+            if subject_area:
+                update["$addToSet"] = {"subject_areas": subject_area}
+            upserts.append(({"title_key": key}, update))
+        return upserts
+
+    async def upsert_papers(
+        self,
+        papers: list[dict],
+        subject_area: str | None = None,
+        fetched_keys: set[str] | None = None,
+    ):
+        ops = [
+            UpdateOne(f, u, upsert=True)
+            for f, u in self.build_upserts(papers, subject_area=subject_area, fetched_keys=fetched_keys)
+        ]
+        if not ops:
+            return None
+        return await self.col.bulk_write(ops, ordered=False)
+
+    async def search_text(
+        self,
+        query: str,
+        limit: int = 10,
+        fresh_since: datetime | None = None,
+        min_score: float = 0.0,
+    ) -> list[dict]:
+        match = {"$text": {"$search": query}}
+        if fresh_since:
+            match["fetched_at"] = {"$gte": fresh_since}
+        cursor = (
+            self.col.find(match, {"score": {"$meta": "textScore"}})
+            .sort([("score", {"$meta": "textScore"})])
+            .limit(limit)
+        )
+        rows = await cursor.to_list(length=limit)
+        return [r for r in rows if float(r.get("score") or 0.0) >= min_score]
+
+    async def titles_by_uid(self, paper_uids: list[str]) -> dict:
+        if not paper_uids:
+            return {}
+        cursor = self.col.find({"paper_uid": {"$in": list(paper_uids)}}, {"paper_uid": 1, "title": 1})
+        return {d["paper_uid"]: d.get("title") for d in await cursor.to_list(length=None)}
@@ -0,0 +1,49 @@
+from pymongo import UpdateOne
+from app.core.time_utils import now_ist
+from app.repositories.base_repo import BaseRepo
+
+
+def now_utc():
+    return now_ist()
+
+
+class PaperCentralityRepo(BaseRepo):
+    """
+    Graph centrality per paper (`_id` is the paper key), written in bulk by
+    the centrality job: pagerank, its percentile among all papers
+    (`pagerank_pct`, 0..1) and weighted degree.
+    """
+
+    collection_name = "paper_centrality"
+
+    async def write_batch(self, rows: list[dict], computed_at):
+        ops = [
+            UpdateOne(
+                {"_id": r["_id"]},
+                {
+                    "$set": {
+                        "pagerank": r["pagerank"],
+                        "pagerank_pct": r["pagerank_pct"],
+                        "degree": r["degree"],
+                        "computed_at": computed_at,
+                    }
+                },
+                upsert=True,
+            )
+            for r in rows
+        ]
+        if not ops:
+            return None
+        return await self.col.bulk_write(ops, ordered=False)
+
+    async def prune(self, computed_before):
+        """Drop papers that were not part of the latest run."""
+        return await self.delete_many({"computed_at": {"$lt": computed_before}})
+
+    async def percentiles(self, keys: list[str]) -> dict:
+        """{paper key: pagerank_pct} for the keys that have been scored."""
+        keys = [k for k in set(keys) if k]
+        if not keys:
+            return {}
+        cursor = self.col.find({"_id": {"$in": keys}}, {"pagerank_pct": 1})
+        return {d["_id"]: float(d.get("pagerank_pct") or 0.0) for d in await cursor.to_list(length=None)}
@@ -0,0 +1,64 @@
+from pymongo import UpdateOne
+from app.core.time_utils import now_ist
+from app.repositories.base_repo import BaseRepo
+from app.utils.graph_scoring import FEATURE_VERSION, encode_paper_features, paper_key
+
+
+def now_utc():
+    return now_ist()
+
+
+class PaperFeatureRepo(BaseRepo):
+    """Precomputed graph-scoring features per paper (`_id` is the paper key)."""
+
+    collection_name = "paper_features"
+
+    def build_upserts(self, papers: list[dict]) -> list[tuple]:
+        """(filter, update) pairs; also queued as-is by the write-behind path."""
+        now = now_utc()
+        upserts = []
+        for p in papers:
+            key = paper_key(p)
+            if not key:
+                continue
+            upserts.append(
+                (
+                    {"_id": key},
+                    {
+                        "$set": {**encode_paper_features(p), "updated_at": now},
+                        "$setOnInsert": {"created_at": now},
+                    },
+                )
+            )
+        return upserts
+
+    async def upsert_many(self, papers: list[dict]):
+        ops = [UpdateOne(f, u, upsert=True) for f, u in self.build_upserts(papers)]
+        if not ops:
+            return None
+        return await self.col.bulk_write(ops, ordered=False)
+
+    async def get_many(self, keys: list[str]) -> dict:
+        """Current-version feature docs by paper key (missing keys are absent)."""
+        if not keys:
+            return {}
+        cursor = self.col.find({"_id": {"$in": list(keys)}, "v": FEATURE_VERSION})
+        return {d["_id"]: d for d in await cursor.to_list(length=None)}
+
+    async def candidates(self, buckets: list[str], exclude: list[str], scan_limit: int, limit: int) -> list[dict]:
+        """
+        Papers sharing at least one LSH bucket, most shared buckets first.
+        At most `scan_limit` bucket matches are examined, which bounds the
+        cost however large the collection grows.
+        """
+        if not buckets:
+            return []
+        pipeline = [
+            {"$match": {"lsh": {"$in": buckets}, "_id": {"$nin": list(exclude)}, "v": FEATURE_VERSION}},
+            {"$limit": scan_limit},
+            {"$addFields": {"_hits": {"$size": {"$setIntersection": ["$lsh", buckets]}}}},
+            {"$sort": {"_hits": -1}},
+            {"$limit": limit},
+            {"$project": {"_hits": 0}},
+        ]
+        return await self.col.aggregate(pipeline).to_list(length=limit)
@@ -1,5 +1,12 @@
+import hashlib
 from app.repositories.base_repo import BaseRepo
 
+
+def text_fingerprint(text: str | None) -> str:
+    normalized = " ".join((text or "").strip().lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
 class QueryRepo(BaseRepo):
     collection_name = "queries"
 
@@ -41,3 +48,54 @@ class QueryRepo(BaseRepo):
 
     async def get_by_id(self, query_id, user_id):
         return await self.find_one({"_id": query_id, "user_id": user_id})
+
+    async def find_duplicate(self, user_id, fingerprint=None, since=None, idempotency_key=None):
+        """
+        Query of `user_id` stored under `idempotency_key`; when the key has no
+        row (or none is given), the most recent query with the same text
+        fingerprint created at/after `since`.
+        """
+        if idempotency_key:
+            row = await self.find_one({"user_id": user_id, "idempotency_key": idempotency_key})
+            if row:
+                return row
+        if not fingerprint or since is None:
+            return None
+        match = {"user_id": user_id, "text_fingerprint": fingerprint, "created_at": {"$gte": since}}
+        rows = await self.col.find(match).sort("created_at", -1).limit(1).to_list(1)
+        return rows[0] if rows else None
+
+    async def top_subjects_since(self, since, limit=6):
+        pipeline = [
+            {"$match": {"subject_area": {"$ne": None}, "created_at": {"$gte": since}}},
+            {"$group": {"_id": "$subject_area", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit},
+        ]
+        rows = await self.col.aggregate(pipeline).to_list(limit)
+        return [{"subject": r["_id"], "count": r["count"]} for r in rows if r["_id"]]
+
+    async def frequent_texts_since(self, since, limit=10, min_count=2):
+        pipeline = [
+            {
+                "$match": {
+                    "created_at": {"$gte": since},
+                    "subject_area": {"$ne": None},
+                    "text": {"$type": "string"},
+                }
+            },
+            {
+                "$group": {
+                    "_id": {"subject": "$subject_area", "text": "$text"},
+                    "count": {"$sum": 1},
+                }
+            },
+            {"$match": {"count": {"$gte": min_count}}},
+            {"$sort": {"count": -1}},
+            {"$limit": limit},
+        ]
+        rows = await self.col.aggregate(pipeline).to_list(limit)
+        return [
+            {"subject": r["_id"]["subject"], "text": r["_id"]["text"], "count": r["count"]}
+            for r in rows
+        ]
@@ -0,0 +1,78 @@
+from pymongo import ReturnDocument
+from app.core.time_utils import now_ist
+from app.repositories.base_repo import BaseRepo
+
+
+def now_utc():
+    return now_ist()
+
+
+class UploadBlobRepo(BaseRepo):
+    """One document per stored file: `_id` is "<area>/<relative path>"."""
+
+    collection_name = "upload_blobs"
+
+    async def register(self, area: str, rel_path: str, sha256: str, size: int):
+        """Upsert the blob and mark it used. Returns the previous document (None if new)."""
+        now = now_utc()
+        return await self.col.find_one_and_update(
+            {"_id": f"{area}/{rel_path}"},
+            {
+                "$set": {"sha256": sha256, "size": int(size), "last_used_at": now},
+                "$setOnInsert": {"area": area, "rel_path": rel_path, "created_at": now},
+            },
+            upsert=True,
+            return_document=ReturnDocument.BEFORE,
+        )
+
+    async def touch(self, area: str, rel_path: str):
+        await self.update_one({"_id": f"{area}/{rel_path}"}, {"$set": {"last_used_at": now_utc()}})
+
+    async def get(self, area: str, rel_path: str):
+        return await self.find_one({"_id": f"{area}/{rel_path}"})
+
+    async def expired(self, area: str, before, limit: int) -> list[dict]:
+        cursor = (
+            self.col.find({"area": area, "last_used_at": {"$lt": before}})
+            .sort("last_used_at", 1)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit)
+
+    async def known_paths(self, area: str, rel_paths: list[str]) -> set[str]:
+        ids = [f"{area}/{p}" for p in rel_paths]
+        cursor = self.col.find({"_id": {"$in": ids}}, {"rel_path": 1})
+        return {d["rel_path"] for d in await cursor.to_list(length=None)}
+
+    async def remove(self, area: str, rel_path: str):
+        return await self.col.find_one_and_delete({"_id": f"{area}/{rel_path}"})
+
+
+class StorageLedgerRepo(BaseRepo):
+    """Running byte/file totals per storage area (`_id` is the area)."""
+
+    collection_name = "storage_ledger"
+
+    async def add(self, area: str, bytes_delta: int, files_delta: int):
+        await self.update_one(
+            {"_id": area},
+            {
+                "$inc": {"bytes": int(bytes_delta), "files": int(files_delta)},
+                "$set": {"updated_at": now_utc()},
+            },
+            upsert=True,
+        )
+
+    async def set_baseline(self, area: str, total_bytes: int, files: int):
+        now = now_utc()
+        await self.update_one(
+            {"_id": area},
+            {"$set": {"bytes": int(total_bytes), "files": int(files), "baseline_at": now, "updated_at": now}},
+            upsert=True,
+        )
+
+    async def set_cursor(self, area: str, cursor: str | None):
+        await self.update_one({"_id": area}, {"$set": {"gc_cursor": cursor}}, upsert=True)
+
+    async def all(self) -> list[dict]:
+        return await self.col.find({}).to_list(length=None)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 from typing import List, Optional, Dict, Any
 
 
@@ -24,6 +24,8 @@ class PaperItem(BaseModel):
     year: Optional[int] = None
     venue: Optional[str] = None
     source: Optional[str] = None
+    # internal provenance (not serialized): came from a provider, not the catalog
+    _from_provider: bool = PrivateAttr(default=False)
 
 class AssistantTextRequest(BaseModel):
     text: str = Field(..., min_length=3, max_length=20000)
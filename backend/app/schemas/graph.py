@@ -7,6 +7,8 @@ class GraphNode(BaseModel):
     id: str
     label: str
     type: str = "paper"
+    x: Optional[float] = None
+    y: Optional[float] = None
 
 
 class GraphEdge(BaseModel):
@@ -31,6 +33,8 @@ class GraphQueryNode(BaseModel):
     authors: Optional[List[str]] = None
     source: Optional[str] = None
     url: Optional[str] = None
+    x: Optional[float] = None
+    y: Optional[float] = None
 
 
 class GraphQueryEdge(BaseModel):
@@ -6,8 +6,10 @@ from bson import ObjectId
 from app.db.mongo import get_db
 from app.core.security import now_utc
 from app.core.time_utils import now_ist
+from app.core.timing import stage_stats
 from app.core.config import settings
 from app.services.admin_settings_service import AdminSettingsService
+from app.services.storage_manager import StorageManager
 import httpx
 import os
 import shutil
@@ -724,6 +726,8 @@ class AdminMetricsService:
             "latency_p95_ms": latency_p95_ms,
             "latency_p99_ms": latency_p99_ms,
             "latency_histogram": latency_histogram,
+            # per-process pipeline stage timings (app.core.timing)
+            "stage_latency": stage_stats(),
             "error_rate": error_rate,
             "errors_daily": errors_daily,
             "status_breakdown": status_breakdown,
@@ -1106,6 +1110,8 @@ class AdminMetricsService:
                 "disk_used": ss.get("disk_used"),
                 "disk_free": ss.get("disk_free"),
                 "uploads_bytes": ss.get("uploads_bytes"),
+                "uploads_files": ss.get("uploads_files"),
+                "storage_areas": ss.get("storage_areas"),
                 "artifacts_bytes": ss.get("artifacts_bytes"),
                 "source": ss.get("source"),
                 "created_at": ss.get("created_at"),
@@ -1364,6 +1370,8 @@ class AdminMetricsService:
             "disk_used": payload.get("disk_used"),
             "disk_free": payload.get("disk_free"),
             "uploads_bytes": payload.get("uploads_bytes"),
+            "uploads_files": payload.get("uploads_files"),
+            "storage_areas": payload.get("storage_areas"),
             "artifacts_bytes": payload.get("artifacts_bytes"),
             "source": payload.get("source") or "manual",
             "created_at": now_utc(),
@@ -1899,7 +1907,6 @@ class AdminMetricsService:
 
     async def run_storage_scan(self, source: str = "manual"):
         repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
-        uploads_dir = os.path.join(os.path.dirname(__file__), "..", "uploads")
         artifacts_dir = os.path.join(os.path.dirname(__file__), "..", "artifacts")
         try:
             usage = shutil.disk_usage(repo_root)
@@ -1908,11 +1915,17 @@ class AdminMetricsService:
             disk_free = int(usage.free)
         except Exception:
             disk_total = disk_used = disk_free = None
+        # upload totals come from the incrementally maintained ledger
+        storage = StorageManager(db=self._db)
+        await storage.ensure_baselines()
+        uploads = await storage.usage()
         payload = {
             "disk_total": disk_total,
             "disk_used": disk_used,
             "disk_free": disk_free,
-            "uploads_bytes": self._dir_size(os.path.abspath(uploads_dir)),
+            "uploads_bytes": uploads["bytes"],
+            "uploads_files": uploads["files"],
+            "storage_areas": uploads["areas"],
             "artifacts_bytes": self._dir_size(os.path.abspath(artifacts_dir)),
             "source": source,
         }
@@ -0,0 +1,262 @@
+# app/services/assistant_job_service.py
+"""
+Background job mode for file queries.
+
+The upload is saved and a job document is queued; a pool of asyncio workers
+runs extraction -> classification -> search -> persistence and records the
+stage/progress on the job. Clients poll the job or subscribe to its SSE
+stream. Jobs live in Mongo, so a restart only interrupts the running ones:
+their lease expires and they are re-queued (the job id doubles as the
+run_query idempotency key, so a re-run never duplicates the query).
+"""
+import os
+import json
+import socket
+import asyncio
+import logging
+from datetime import timedelta
+from bson import ObjectId
+
+from app.core.time_utils import now_ist
+from app.repositories.assistant_job_repo import (
+    AssistantJobRepo,
+    JOB_QUEUED,
+    JOB_DONE,
+    JOB_FAILED,
+)
+
+logger = logging.getLogger(__name__)
+
+ASSISTANT_JOB_WORKERS = int(os.getenv("ASSISTANT_JOB_WORKERS", "4"))
+ASSISTANT_JOB_MAX_RUNNING_PER_USER = int(os.getenv("ASSISTANT_JOB_MAX_RUNNING_PER_USER", "2"))
+ASSISTANT_JOB_MAX_ACTIVE_PER_USER = int(os.getenv("ASSISTANT_JOB_MAX_ACTIVE_PER_USER", "20"))
+_LEASE_SECONDS = int(os.getenv("ASSISTANT_JOB_LEASE_SECONDS", "120"))
+_POLL_SECONDS = float(os.getenv("ASSISTANT_JOB_POLL_SECONDS", "2"))
+_EVENTS_POLL_SECONDS = float(os.getenv("ASSISTANT_JOB_EVENTS_POLL_SECONDS", "1"))
+_MAX_ATTEMPTS = int(os.getenv("ASSISTANT_JOB_MAX_ATTEMPTS", "3"))
+_TTL_DAYS = int(os.getenv("ASSISTANT_JOB_TTL_DAYS", "7"))
+
+STAGE_PROGRESS = {
+    JOB_QUEUED: 0,
+    "extracting": 10,
+    "classifying": 40,
+    "searching": 60,
+    "saving": 90,
+}
+FINISHED = {JOB_DONE, JOB_FAILED}
+
+
+def now_utc():
+    return now_ist()
+
+
+class TooManyJobsError(ValueError):
+    pass
+
+
+class AssistantJobService:
+    def __init__(self, assistant_service, db=None):
+        self.assistant = assistant_service
+        self.jobs = AssistantJobRepo(db=db)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._wake = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    # -------------------------------------------------
+    # API
+    # -------------------------------------------------
+    async def submit(
+        self,
+        user_id: str,
+        file_path: str,
+        sha256: str,
+        filename: str | None,
+        content_type: str | None,
+        idempotency_key: str | None = None,
+    ) -> dict:
+        uid = ObjectId(user_id)
+        if await self.jobs.count_active_for_user(uid) >= ASSISTANT_JOB_MAX_ACTIVE_PER_USER:
+            raise TooManyJobsError("Too many pending jobs")
+        now = now_utc()
+        doc = {
+            "_id": ObjectId(),
+            "user_id": uid,
+            "kind": "query_file",
+            "status": JOB_QUEUED,
+            "stage": JOB_QUEUED,
+            "progress": 0,
+            "attempts": 0,
+            "file_path": file_path,
+            "sha256": sha256,
+            "file": {"filename": filename, "content_type": content_type},
+            "idempotency_key": idempotency_key,
+            "created_at": now,
+            "updated_at": now,
+        }
+        await self.jobs.insert(doc)
+        self._wake.set()
+        return self.public(doc)
+
+    async def get(self, user_id: str, job_id: str) -> dict | None:
+        doc = await self.jobs.get_for_user(ObjectId(job_id), ObjectId(user_id))
+        return self.public(doc) if doc else None
+
+    async def events(self, user_id: str, job_id: str, is_disconnected):
+        """
+        Server-sent events: a `progress` event whenever the stage changes,
+        then a final `done` or `failed` event carrying the job.
+        """
+        last = None
+        idle = 0.0
+        while True:
+            if await is_disconnected():
+                return
+            job = await self.get(user_id, job_id)
+            if not job:
+                yield _sse("failed", {"job_id": job_id, "error": "Job not found"})
+                return
+            state = (job["status"], job["stage"], job["progress"])
+            if state != last:
+                last = state
+                idle = 0.0
+                event = job["status"] if job["status"] in FINISHED else "progress"
+                yield _sse(event, job)
+                if job["status"] in FINISHED:
+                    return
+            elif idle >= 15:
+                idle = 0.0
+                yield ": keep-alive\n\n"
+            await asyncio.sleep(_EVENTS_POLL_SECONDS)
+            idle += _EVENTS_POLL_SECONDS
+
+    @staticmethod
+    def public(doc: dict) -> dict:
+        out = {
+            "job_id": str(doc["_id"]),
+            "status": doc.get("status"),
+            "stage": doc.get("stage"),
+            "progress": int(doc.get("progress") or 0),
+            "file": doc.get("file"),
+            "query_id": doc.get("query_id"),
+            "error": doc.get("error"),
+            "created_at": _iso(doc.get("created_at")),
+            "updated_at": _iso(doc.get("updated_at")),
+        }
+        if doc.get("status") == JOB_DONE:
+            out["result"] = doc.get("result")
+        return out
+
+    # -------------------------------------------------
+    # Workers
+    # -------------------------------------------------
+    def start(self, workers: int | None = None) -> None:
+        workers = max(1, workers or ASSISTANT_JOB_WORKERS)
+        self._tasks = [asyncio.create_task(self._worker_loop()) for _ in range(workers)]
+        self._tasks.append(asyncio.create_task(self._recovery_loop()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _recovery_loop(self):
+        while True:
+            try:
+                expires_at = now_utc() + timedelta(days=_TTL_DAYS)
+                if await self.jobs.requeue_stale(_MAX_ATTEMPTS, expires_at):
+                    self._wake.set()
+            except Exception:
+                logger.exception("Failed to re-queue stale assistant jobs")
+            await asyncio.sleep(max(5, _LEASE_SECONDS // 2))
+
+    async def _worker_loop(self):
+        while True:
+            self._wake.clear()
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Failed to claim assistant job")
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), timeout=_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+            # a finished job may unblock another job of the same user
+            self._wake.set()
+
+    async def _claim(self):
+        """
+        Claim the oldest queued job of a user below the running cap. The cap
+        is re-checked after the claim (another worker may have claimed a job
+        of the same user meanwhile): the later claim backs off.
+        """
+        saturated = await self.jobs.saturated_users(ASSISTANT_JOB_MAX_RUNNING_PER_USER)
+        for _ in range(3):
+            job = await self.jobs.claim_next(self.worker_id, _LEASE_SECONDS, exclude_users=saturated)
+            if job is None or await self.jobs.running_before(job) < ASSISTANT_JOB_MAX_RUNNING_PER_USER:
+                return job
+            await self.jobs.release(job, self.worker_id)
+            saturated.append(job["user_id"])
+        return None
+
+    async def _heartbeat(self, job_id, state: dict):
+        while True:
+            await asyncio.sleep(max(1, _LEASE_SECONDS // 3))
+            try:
+                await self.jobs.set_progress(
+                    job_id, state["stage"], STAGE_PROGRESS.get(state["stage"], 0), _LEASE_SECONDS
+                )
+            except Exception:
+                logger.warning("Failed to renew lease for job %s", job_id, exc_info=True)
+
+    async def _run(self, job: dict) -> None:
+        job_id = job["_id"]
+        state = {"stage": "extracting"}
+
+        async def progress(stage: str):
+            state["stage"] = stage
+            await self.jobs.set_progress(job_id, stage, STAGE_PROGRESS.get(stage, 0), _LEASE_SECONDS)
+
+        heartbeat = asyncio.create_task(self._heartbeat(job_id, state))
+        expires_at = now_utc() + timedelta(days=_TTL_DAYS)
+        try:
+            await progress("extracting")
+            stored = {"sha256": job["sha256"], "path": job["file_path"]}
+            doc = await self.assistant.document_text(stored)
+            text = doc.get("text")
+            if not text or len(text) < 10:
+                raise ValueError("Could not extract text from file")
+
+            await progress("classifying")
+            predictions = await self.assistant.document_predictions(job["sha256"], doc)
+            result = await self.assistant.run_query(
+                user_id=str(job["user_id"]),
+                text=text[:20000],
+                input_type="file",
+                idempotency_key=job.get("idempotency_key") or f"job:{job_id}",
+                progress=progress,
+                predictions=predictions,
+            )
+            await self.jobs.finish(job_id, JOB_DONE, expires_at, result=result)
+        except asyncio.CancelledError:
+            # shutdown: leave the job running; its lease expires and it is re-queued
+            raise
+        except (ValueError, FileNotFoundError) as e:
+            await self.jobs.finish(job_id, JOB_FAILED, expires_at, error=str(e) or "Job failed")
+        except Exception:
+            logger.exception("Assistant job %s failed", job_id)
+            await self.jobs.finish(job_id, JOB_FAILED, expires_at, error="Job failed")
+        finally:
+            heartbeat.cancel()
+
+
+def _iso(value):
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
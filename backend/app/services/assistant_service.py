@@ -1,20 +1,34 @@
 # app/services/assistant_service.py
+import os
+import asyncio
 import numpy as np
-from datetime import datetime
+from datetime import datetime, timedelta
 from app.core.time_utils import now_ist
-from typing import Dict, Any, List
+from app.core.timing import span
+from typing import Dict, Any, List, Callable, Awaitable
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 
-from app.repositories.query_repo import QueryRepo
+from app.db.write_behind import WRITE_BEHIND_ENABLED
+from app.repositories.query_repo import QueryRepo, text_fingerprint
 from app.repositories.analytics_repo import AnalyticsRepo
 from app.services.paper_aggregator_service import PaperAggregatorService
 from app.services.paper_service import PaperService
+from app.services.document_text_service import DocumentTextService
+from app.services.paper_graph_service import PaperGraphService
+
+
+QUERY_DEDUP_WINDOW_SECONDS = int(os.getenv("QUERY_DEDUP_WINDOW_SECONDS", "300"))
 
 
 def now_utc() -> datetime:
     return now_ist()
 
 
+class IdempotencyConflictError(ValueError):
+    pass
+
+
 class AssistantService:
     """
     CORE Assistant Pipeline (FREE / EXTENSIBLE)
@@ -35,28 +49,56 @@ class AssistantService:
     def __init__(self, model_service, vectorizer_service, db=None):
         self.model_service = model_service
         self.vectorizer_service = vectorizer_service
-        self.paper_search = PaperAggregatorService()
+        self.paper_search = PaperAggregatorService(db=db, vectorizer_service=vectorizer_service)
         self.labels = getattr(model_service, "labels", None)
         self.queries = QueryRepo(db=db)
         self.analytics = AnalyticsRepo(db=db)
         self.papers = PaperService(db=db)
+        self.documents = DocumentTextService(db=db)
+        self.graph = PaperGraphService(db=db)
 
     # -------------------------------------------------
     # Prediction
     # -------------------------------------------------
+    @property
+    def model_version(self) -> str | None:
+        return getattr(self.model_service, "version", None)
+
     def analyze_text(self, text: str, top_k: int = 5) -> List[Dict[str, Any]]:
-        x = self.vectorizer_service.transform([text])
-        preds = self.model_service.predict(x)[0]
+        return self.analyze_texts([text], top_k=top_k)[0]
 
-        idx = np.argsort(preds)[-top_k:][::-1]
+    def analyze_texts(self, texts: List[str], top_k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Top-k predictions for each text, vectorized and inferred as one batch."""
+        with span("vectorize"):
+            x = self.vectorizer_service.transform(list(texts))
+        with span("inference"):
+            preds = np.asarray(self.model_service.predict(x))
 
-        return [
-            {
-                "label": self._decode_label(int(i)),
-                "score": float(preds[i]),
-            }
-            for i in idx
-        ]
+        out = []
+        for row in preds:
+            idx = np.argsort(row)[-top_k:][::-1]
+            out.append(
+                [
+                    {
+                        "label": self._decode_label(int(i)),
+                        "score": float(row[i]),
+                    }
+                    for i in idx
+                ]
+            )
+        return out
+
+    async def document_text(self, stored: dict) -> dict:
+        """Extracted text for a content-addressed upload (cached by SHA-256)."""
+        return await self.documents.get_text(stored["sha256"], stored["path"])
+
+    async def document_predictions(self, sha256: str, doc: dict, top_k: int = 5) -> List[Dict[str, Any]]:
+        """Cached top predictions for this document and model version, else inference."""
+        preds = self.documents.cached_predictions(doc, self.model_version)
+        if preds is None:
+            preds = self.analyze_text(doc["text"], top_k=top_k)
+            await self.documents.save_predictions(sha256, self.model_version, preds)
+        return preds
 
     def _decode_label(self, idx: int) -> str:
         if hasattr(self.model_service, "decode_index"):
@@ -78,66 +120,106 @@ class AssistantService:
         user_id: str,
         text: str,
         input_type: str = "text",
+        idempotency_key: str | None = None,
+        progress: Callable[[str], Awaitable[None]] | None = None,
+        predictions: List[Dict[str, Any]] | None = None,
     ) -> Dict[str, Any]:
+        """
+        Returns the stored result instead of recomputing when the same user
+        already sent this `idempotency_key`, or the same normalized text
+        within QUERY_DEDUP_WINDOW_SECONDS. Reusing a key for different text
+        raises IdempotencyConflictError.
+        `progress` is awaited with the stage name ("classifying", "searching",
+        "saving") as the pipeline advances (used by background jobs).
+        `predictions` (cached top predictions for this text) skips inference.
+        """
 
         text = (text or "").strip()
         if len(text) < 3:
             raise ValueError("Query text too short")
 
+        # 0) Dedup (retries, double submits)
+        uid = ObjectId(user_id)
+        fingerprint = text_fingerprint(text)
+        since = (
+            now_utc() - timedelta(seconds=QUERY_DEDUP_WINDOW_SECONDS)
+            if QUERY_DEDUP_WINDOW_SECONDS > 0
+            else None
+        )
+        with span("query_dedup"):
+            existing = await self.queries.find_duplicate(
+                uid, fingerprint=fingerprint, since=since, idempotency_key=idempotency_key
+            )
+        if existing:
+            return self._replay(existing, fingerprint)
+
         # 1) Predict
-        top_preds = self.analyze_text(text, top_k=5)
+        if progress and not predictions:
+            await progress("classifying")
+        top_preds = predictions or self.analyze_text(text, top_k=5)
         subject_area = top_preds[0]["label"]
         confidence = top_preds[0]["score"]
 
         # 2) Paper search
-        papers = await self.paper_search.search_all(
-            query=f"{subject_area} {text[:250]}",
-            limit=10,
-        )
+        if progress:
+            await progress("searching")
+        with span("search"):
+            papers = await self.paper_search.search_all(
+                query=f"{subject_area} {text[:250]}",
+                limit=10,
+                rerank_text=text[:2000],
+            )
 
-        # 3) Persist query
+        # dump once; reused for the query doc, paper rows and the response
+        paper_dicts = [p.model_dump() for p in papers]
+
+        # 3) Persist query, result papers and analytics event.
+        if progress:
+            await progress("saving")
+        # The id is assigned client-side so the three writes are independent.
+        query_oid = ObjectId()
+        query_id = str(query_oid)
         doc = {
-            "user_id": ObjectId(user_id),
+            "_id": query_oid,
+            "user_id": uid,
             "input_type": input_type,
             "text": text[:20000],
+            "text_fingerprint": fingerprint,
             "subject_area": subject_area,
             "confidence": float(confidence),
             "top_predictions": top_preds,
-            "papers": [p.model_dump() for p in papers],
+            "papers": paper_dicts,
             "gpt_answer": None,
             "created_at": now_utc(),
         }
+        if idempotency_key:
+            doc["idempotency_key"] = idempotency_key
+        try:
+            with span("persist"):
+                await self._persist_query(
+                    doc, user_id, query_id, subject_area, paper_dicts, self.paper_search.fetched_keys(papers)
+                )
+        except DuplicateKeyError:
+            # a concurrent request with the same idempotency key won the insert
+            existing = await self.queries.find_duplicate(uid, idempotency_key=idempotency_key)
+            if not existing:
+                raise
+            return self._replay(existing, fingerprint)
 
-        result = await self.queries.insert(doc)
-        query_id = str(result.inserted_id)
-        await self.papers.save_query_papers(
-            user_id=user_id,
-            query_id=query_id,
-            query_created_at=doc["created_at"],
-            subject_area=subject_area,
-            papers=[p.model_dump() for p in papers],
-        )
+        # new papers join the global graph in the background
+        self.graph.schedule_link(paper_dicts)
 
-        # 4) Analytics event
-        await self.analytics.emit(
-            ObjectId(user_id),
-            "query_created",
-            {
-                "query_id": ObjectId(query_id),
-                "input_type": input_type,
-                "subject_area": subject_area,
-                "confidence": float(confidence),
-            },
-        )
+        # 4) Response
+        return self._query_response(doc)
 
-        # 5) Response
+    def _query_response(self, doc: dict, deduplicated: bool = False) -> Dict[str, Any]:
         return {
-            "query_id": query_id,
-            "subject_area": subject_area,
-            "model_confidence": float(confidence),
-            "top_predictions": top_preds,
-            "top_papers": [p.model_dump() for p in papers],
-            "gpt_answer": None,
+            "query_id": str(doc["_id"]),
+            "subject_area": doc.get("subject_area"),
+            "model_confidence": float(doc.get("confidence") or 0.0),
+            "top_predictions": doc.get("top_predictions") or [],
+            "top_papers": doc.get("papers") or [],
+            "gpt_answer": doc.get("gpt_answer"),
             "features": {
                 "summaries_enabled": True,
                 "chatbot_enabled": True,
@@ -146,7 +228,8 @@ class AssistantService:
             },
             "meta": {
                 "saved": True,
-                "input_type": input_type,
+                "deduplicated": deduplicated,
+                "input_type": doc.get("input_type"),
                 "papers_source": [
                     "SemanticScholar",
                     "Crossref",
@@ -156,6 +239,57 @@ class AssistantService:
             },
         }
 
+    def _replay(self, existing: dict, fingerprint: str) -> Dict[str, Any]:
+        stored = existing.get("text_fingerprint")
+        if stored and stored != fingerprint:
+            raise IdempotencyConflictError("Idempotency-Key was already used with a different query")
+        return self._query_response(existing, deduplicated=True)
+
+    async def _persist_query(
+        self,
+        doc: dict,
+        user_id: str,
+        query_id: str,
+        subject_area: str,
+        paper_dicts: list[dict],
+        fetched_keys: set[str] | None = None,
+    ) -> None:
+        """
+        The query document is inserted first, so a failed insert (e.g. a
+        duplicate idempotency key) never leaves orphan paper rows or events.
+        Paper rows, catalog upserts and the analytics event then run
+        concurrently, or are queued and flushed in batches when write-behind
+        is enabled (WRITE_BEHIND_ENABLED=1).
+        """
+        defer = WRITE_BEHIND_ENABLED
+        paper_write = self.papers.save_query_papers(
+            user_id=user_id,
+            query_id=query_id,
+            query_created_at=doc["created_at"],
+            subject_area=subject_area,
+            papers=paper_dicts,
+            defer=defer,
+            fetched_keys=fetched_keys,
+        )
+        event_write = self.analytics.emit(
+            ObjectId(user_id),
+            "query_created",
+            {
+                "query_id": ObjectId(query_id),
+                "input_type": doc["input_type"],
+                "subject_area": subject_area,
+                "confidence": doc["confidence"],
+            },
+            defer=defer,
+        )
+        try:
+            await self.queries.insert(doc)
+        except Exception:
+            paper_write.close()
+            event_write.close()
+            raise
+        await asyncio.gather(paper_write, event_write)
+
     # -------------------------------------------------
     # History
     # -------------------------------------------------
@@ -204,9 +338,13 @@ class AssistantService:
         return str(res.inserted_id)
 
     async def delete_history_item(self, user_id: str, history_id: ObjectId):
-        return await self.queries.delete_one(
+        res = await self.queries.delete_one(
             {"_id": history_id, "user_id": ObjectId(user_id)}
         )
+        await self.graph.invalidate(user_id, str(history_id))
+        return res
 
     async def delete_all_history(self, user_id: str):
-        return await self.queries.delete_many({"user_id": ObjectId(user_id)})
+        res = await self.queries.delete_many({"user_id": ObjectId(user_id)})
+        await self.graph.invalidate(user_id)
+        return res
@@ -22,6 +22,7 @@ from app.repositories.password_reset_repo import PasswordResetRepo
 from app.repositories.collection_repo import CollectionRepo
 from app.repositories.collection_item_repo import CollectionItemRepo
 from app.repositories.query_repo import QueryRepo
+from app.repositories.graph_cache_repo import GraphCacheRepo
 from app.repositories.paper_repo import PaperRepo
 from app.repositories.summary_repo import SummaryRepository
 from app.repositories.note_repo import NoteRepo
@@ -394,6 +395,7 @@ class AuthService:
         collections = CollectionRepo(db=db)
         collection_items = CollectionItemRepo(db=db)
         queries = QueryRepo(db=db)
+        graph_cache = GraphCacheRepo(db=db)
         papers = PaperRepo(db=db)
         summaries = SummaryRepository(db=db)
         notes = NoteRepo(db=db)
@@ -415,6 +417,7 @@ class AuthService:
 
         await collections.delete_many({"user_id": uid})
         await queries.delete_many({"user_id": uid})
+        await graph_cache.invalidate(uid)
         await papers.delete_many({"user_id": uid})
         await summaries.delete_many({"user_id": uid})
         await notes.delete_many({"user_id": uid})
@@ -444,6 +447,7 @@ class AuthService:
         collections = CollectionRepo(db=db)
         collection_items = CollectionItemRepo(db=db)
         queries = QueryRepo(db=db)
+        graph_cache = GraphCacheRepo(db=db)
         papers = PaperRepo(db=db)
         summaries = SummaryRepository(db=db)
         notes = NoteRepo(db=db)
@@ -466,6 +470,7 @@ class AuthService:
 
         await collections.delete_many({"user_id": uid})
         await queries.delete_many({"user_id": uid})
+        await graph_cache.invalidate(uid)
         await papers.delete_many({"user_id": uid})
         await summaries.delete_many({"user_id": uid})
         await notes.delete_many({"user_id": uid})
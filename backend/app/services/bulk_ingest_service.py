@@ -0,0 +1,274 @@
+# app/services/bulk_ingest_service.py
+"""
+Bulk ingestion: classify many PDF/DOCX files (uploaded individually or in
+ZIP archives) in one request.
+
+Entries are read straight from the spooled upload / archive into memory
+(nothing is extracted to disk) and flow through a three-stage pipeline:
+
+    reader -> N extraction workers -> batching classifier
+
+Extraction goes through the shared extraction process pool and text cache,
+with enough workers to keep every pool process busy. The classifier
+vectorizes and scores up to BULK_INGEST_BATCH_SIZE documents per model call
+and saves each batch with one insert_many. Results are streamed back as
+NDJSON lines as soon as their batch is done.
+"""
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import zipfile
+from typing import AsyncIterator
+
+from bson import ObjectId
+from starlette.concurrency import run_in_threadpool
+
+from app.core.time_utils import now_ist
+from app.services.extraction_service import extraction_service
+from app.services.file_service import MAX_QUERY_UPLOAD_BYTES, SUPPORTED_QUERY_EXTENSIONS
+
+logger = logging.getLogger(__name__)
+
+BULK_INGEST_MAX_FILES = int(os.getenv("BULK_INGEST_MAX_FILES", "200"))
+BULK_INGEST_MAX_TOTAL_BYTES = int(os.getenv("BULK_INGEST_MAX_TOTAL_MB", "500")) * 1024 * 1024
+BULK_INGEST_BATCH_SIZE = int(os.getenv("BULK_INGEST_BATCH_SIZE", "16"))
+# 0 = two in-flight documents per extraction worker
+BULK_INGEST_CONCURRENCY = int(os.getenv("BULK_INGEST_CONCURRENCY", "0"))
+
+
+def now_utc():
+    return now_ist()
+
+
+def _line(payload: dict) -> str:
+    return json.dumps(payload, default=str) + "\n"
+
+
+def _iter_entries(fileobj, filename: str):
+    """
+    Yields (name, ext, bytes | None, error | None) for an upload: the file
+    itself, or each member of a ZIP archive read without touching disk.
+    """
+    ext = os.path.splitext(filename or "")[1].lower()
+    if ext != ".zip":
+        if ext not in SUPPORTED_QUERY_EXTENSIONS:
+            yield filename, ext, None, "Only PDF and DOCX supported"
+            return
+        fileobj.seek(0)
+        data = fileobj.read(MAX_QUERY_UPLOAD_BYTES + 1)
+        if len(data) > MAX_QUERY_UPLOAD_BYTES:
+            yield filename, ext, None, "File too large"
+        else:
+            yield filename, ext, data, None
+        return
+
+    try:
+        archive = zipfile.ZipFile(fileobj)
+    except zipfile.BadZipFile:
+        yield filename, ext, None, "Invalid ZIP archive"
+        return
+    with archive:
+        for info in archive.infolist():
+            name = info.filename
+            if info.is_dir() or name.startswith("__MACOSX/") or os.path.basename(name).startswith("."):
+                continue
+            member = f"{filename}/{name}"
+            member_ext = os.path.splitext(name)[1].lower()
+            if member_ext not in SUPPORTED_QUERY_EXTENSIONS:
+                yield member, member_ext, None, "Only PDF and DOCX supported"
+                continue
+            if info.file_size > MAX_QUERY_UPLOAD_BYTES:
+                yield member, member_ext, None, "File too large"
+                continue
+            try:
+                with archive.open(info) as f:
+                    # the declared size can lie; never read past the limit
+                    data = f.read(MAX_QUERY_UPLOAD_BYTES + 1)
+            except (zipfile.BadZipFile, RuntimeError, NotImplementedError) as e:
+                yield member, member_ext, None, f"Could not read archive entry: {e}"
+                continue
+            if len(data) > MAX_QUERY_UPLOAD_BYTES:
+                yield member, member_ext, None, "File too large"
+                continue
+            yield member, member_ext, data, None
+
+
+class BulkIngestService:
+    def __init__(self, assistant_service, concurrency: int | None = None, batch_size: int | None = None):
+        self.assistant = assistant_service
+        workers = max(1, getattr(extraction_service, "workers", 1))
+        self.concurrency = concurrency or BULK_INGEST_CONCURRENCY or workers * 2
+        self.batch_size = batch_size or BULK_INGEST_BATCH_SIZE
+
+    async def ingest(self, user_id: str, uploads: list[tuple[str, str | None, object]]) -> AsyncIterator[str]:
+        """
+        `uploads` are (filename, content_type, file object) triples; the
+        file objects are closed when the stream ends. Yields one NDJSON
+        "result" line per document and a final "summary" line.
+        """
+        started = time.perf_counter()
+        entries: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        extracted: asyncio.Queue = asyncio.Queue(maxsize=self.batch_size * 2)
+        results: asyncio.Queue = asyncio.Queue()
+        counts = {"total": 0, "ok": 0, "failed": 0}
+
+        async def fail(index, name, error):
+            counts["failed"] += 1
+            await results.put(_line({"type": "result", "index": index, "filename": name, "status": "error", "error": error}))
+
+        async def read_entries():
+            index = 0
+            total_bytes = 0
+            try:
+                for filename, content_type, fileobj in uploads:
+                    it = _iter_entries(fileobj, filename)
+                    while True:
+                        item = await run_in_threadpool(next, it, None)
+                        if item is None:
+                            break
+                        name, ext, data, error = item
+                        counts["total"] += 1
+                        if index >= BULK_INGEST_MAX_FILES:
+                            await fail(index, name, f"Too many files (max {BULK_INGEST_MAX_FILES})")
+                        elif error:
+                            await fail(index, name, error)
+                        elif total_bytes + len(data) > BULK_INGEST_MAX_TOTAL_BYTES:
+                            await fail(index, name, "Total upload size limit reached")
+                        else:
+                            total_bytes += len(data)
+                            await entries.put((index, name, ext, content_type, data))
+                        index += 1
+            except Exception:
+                logger.exception("Bulk ingest failed while reading uploads")
+            finally:
+                for _ in range(self.concurrency):
+                    await entries.put(None)
+
+        async def extract_worker():
+            try:
+                while True:
+                    item = await entries.get()
+                    if item is None:
+                        break
+                    index, name, ext, content_type, data = item
+                    try:
+                        sha256 = await asyncio.to_thread(lambda: hashlib.sha256(data).hexdigest())
+                        doc = await self.assistant.documents.get_text(sha256, data, ext=ext)
+                    except ValueError as e:
+                        await fail(index, name, str(e))
+                        continue
+                    except Exception:
+                        # e.g. a crashed pool process: report the file, keep the worker alive
+                        logger.exception("Bulk ingest extraction failed for %s", name)
+                        await fail(index, name, "Extraction failed")
+                        continue
+                    text = doc.get("text") or ""
+                    if len(text) < 10:
+                        await fail(index, name, "Could not extract text from file")
+                        continue
+                    await extracted.put((index, name, content_type, sha256, doc))
+            finally:
+                await extracted.put(None)
+
+        async def classify():
+            remaining = self.concurrency
+            try:
+                while remaining:
+                    batch = []
+                    item = await extracted.get()
+                    while True:
+                        if item is None:
+                            remaining -= 1
+                        else:
+                            batch.append(item)
+                        if len(batch) >= self.batch_size or not remaining or extracted.empty():
+                            break
+                        item = extracted.get_nowait()
+                    if batch:
+                        await self._classify_batch(user_id, batch, results, counts)
+            finally:
+                await results.put(None)
+
+        tasks = [asyncio.create_task(read_entries()), asyncio.create_task(classify())]
+        tasks += [asyncio.create_task(extract_worker()) for _ in range(self.concurrency)]
+        try:
+            while True:
+                line = await results.get()
+                if line is None:
+                    break
+                yield line
+            seconds = time.perf_counter() - started
+            yield _line(
+                {
+                    "type": "summary",
+                    **counts,
+                    "seconds": round(seconds, 3),
+                    "docs_per_second": round(counts["ok"] / seconds, 2) if seconds else None,
+                }
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+            for _, _, fileobj in uploads:
+                try:
+                    fileobj.close()
+                except Exception:
+                    pass
+
+    async def _classify_batch(self, user_id: str, batch: list, results: asyncio.Queue, counts: dict) -> None:
+        model_version = self.assistant.model_version
+        topics: list = [self.assistant.documents.cached_predictions(doc, model_version) for *_, doc in batch]
+        pending = [i for i, t in enumerate(topics) if t is None]
+        try:
+            if pending:
+                fresh = await asyncio.to_thread(
+                    self.assistant.analyze_texts, [batch[i][4]["text"] for i in pending], 5
+                )
+                for i, preds in zip(pending, fresh):
+                    topics[i] = preds
+                    await self.assistant.documents.save_predictions(batch[i][3], model_version, preds)
+
+            now = now_utc()
+            docs = [
+                {
+                    "user_id": ObjectId(user_id),
+                    "input_type": "file",
+                    "input_text": doc["text"][:20000],
+                    "file": {"filename": name, "content_type": content_type, "sha256": sha256},
+                    "predicted_topics": preds,
+                    "bulk": True,
+                    "created_at": now,
+                }
+                for (index, name, content_type, sha256, doc), preds in zip(batch, topics)
+            ]
+            res = await self.assistant.queries.insert_many(docs)
+        except Exception:
+            logger.exception("Bulk ingest batch failed")
+            for index, name, *_ in batch:
+                counts["failed"] += 1
+                await results.put(
+                    _line({"type": "result", "index": index, "filename": name, "status": "error", "error": "Classification failed"})
+                )
+            return
+
+        for (index, name, _, sha256, doc), preds, saved_id in zip(batch, topics, res.inserted_ids):
+            counts["ok"] += 1
+            await results.put(
+                _line(
+                    {
+                        "type": "result",
+                        "index": index,
+                        "filename": name,
+                        "status": "ok",
+                        "sha256": sha256,
+                        "pages": doc.get("pages"),
+                        "truncated": bool(doc.get("truncated")),
+                        "cached": bool(doc.get("cached")),
+                        "predicted_topics": preds,
+                        "saved_query_id": str(saved_id),
+                    }
+                )
+            )
@@ -1,6 +1,7 @@
 import os
 from datetime import datetime
 from app.core.time_utils import now_ist
+from app.core.timing import span
 from typing import List
 
 from bson import ObjectId
@@ -8,6 +9,7 @@ from bson import ObjectId
 from app.repositories.chat_repo import ChatSessionRepo, ChatMessageRepo
 from app.repositories.summary_repo import SummaryRepository
 from app.repositories.graph_repo import GraphRepo
+from app.services.graph_centrality_service import GraphCentralityService
 from app.repositories.paper_repo import PaperRepo
 from app.repositories.query_repo import QueryRepo
 from app.repositories.note_repo import NoteRepo
@@ -32,6 +34,7 @@ class ChatbotService:
         self.messages = ChatMessageRepo(db=db)
         self.summaries = SummaryRepository(db=db)
         self.graph = GraphRepo(db=db)
+        self.centrality = GraphCentralityService(db=db)
         self.papers = PaperRepo(db=db)
         self.queries = QueryRepo(db=db)
         self.notes = NoteRepo(db=db)
@@ -130,41 +133,44 @@ class ChatbotService:
         if msg_count >= self.max_session_messages:
             raise ValueError("Session message limit reached")
 
-        prompt, context_papers = await self._build_context(
-            user_id=user_id,
-            session_id=session_id,
-            message=message,
-            paper_ids=paper_ids or [],
-        )
+        with span("chat_context"):
+            prompt, context_papers = await self._build_context(
+                user_id=user_id,
+                session_id=session_id,
+                message=message,
+                paper_ids=paper_ids or [],
+            )
 
         start = now_utc()
-        answer = await self.llm.generate(
-            prompt=prompt,
-            fallback_text="Insufficient information in current papers.",
-        )
-        if answer.strip() == "Insufficient information in current papers.":
-            fallback_prompt = (
-                "You are a helpful research assistant. Answer the user's question clearly and concisely.\n\n"
-                f"User: {message.strip()}"
-            )
+        with span("chat_llm"):
             answer = await self.llm.generate(
-                prompt=fallback_prompt,
-                fallback_text="Sorry, I can't answer that right now.",
+                prompt=prompt,
+                fallback_text="Insufficient information in current papers.",
             )
+            if answer.strip() == "Insufficient information in current papers.":
+                fallback_prompt = (
+                    "You are a helpful research assistant. Answer the user's question clearly and concisely.\n\n"
+                    f"User: {message.strip()}"
+                )
+                answer = await self.llm.generate(
+                    prompt=fallback_prompt,
+                    fallback_text="Sorry, I can't answer that right now.",
+                )
         end = now_utc()
 
-        await self._persist_message(user_id, session_id, "user", message)
-        await self._persist_message(
-            user_id, session_id, "assistant", answer, meta={"context_papers": context_papers}
-        )
+        with span("chat_persist"):
+            await self._persist_message(user_id, session_id, "user", message)
+            await self._persist_message(
+                user_id, session_id, "assistant", answer, meta={"context_papers": context_papers}
+            )
 
-        await self._log_analytics(
-            user_id=user_id,
-            session_id=session_id,
-            context_papers=context_papers,
-            prompt=prompt,
-            response=answer,
-        )
+            await self._log_analytics(
+                user_id=user_id,
+                session_id=session_id,
+                context_papers=context_papers,
+                prompt=prompt,
+                response=answer,
+            )
         latency_ms = max(0, int((end - start).total_seconds() * 1000))
         tokens = len(prompt) + len(answer)
         await self._log_api_usage(
@@ -212,7 +218,8 @@ class ChatbotService:
         if paper_ids:
             primary_id = paper_ids[0]
             primary_uid = paper_uids.get(primary_id) or primary_id
-            related = await self.graph.get_related(primary_uid, limit=10)
+            related = await self.graph.get_related(primary_uid, limit=20)
+            related = await self.centrality.rerank(related, limit=10)
             related_edges = related or []
             for r in related_edges:
                 rid = r.get("related_paper_id")
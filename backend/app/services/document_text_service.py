@@ -0,0 +1,58 @@
+# app/services/document_text_service.py
+import os
+
+from app.core.timing import span
+from app.repositories.extracted_text_repo import ExtractedTextRepo
+from app.services.extraction_service import extraction_service
+
+# bump when extraction output changes so stale cache rows are re-extracted
+EXTRACTOR_VERSION = 1
+
+
+class DocumentTextService:
+    """
+    Text for a content-addressed upload: served from `extracted_texts` when
+    this content was seen before, otherwise extracted and cached.
+    """
+
+    def __init__(self, db=None, extractor=None):
+        self.cache = ExtractedTextRepo(db=db)
+        self.extractor = extractor or extraction_service
+
+    async def get_text(self, sha256: str, source, ext: str | None = None) -> dict:
+        """
+        `source` is a path or the raw bytes (pass `ext` for bytes). Returns the
+        cache document (text, pages, truncated, predictions?, cached).
+        """
+        ext = (ext or os.path.splitext(str(source))[1]).lower()
+        with span("text_cache"):
+            doc = await self.cache.get(sha256)
+        if doc and doc.get("extractor_version") == EXTRACTOR_VERSION:
+            doc["cached"] = True
+            return doc
+
+        with span("extract"):
+            res = await self.extractor.extract(source, ext=ext)
+        doc = {
+            "text": res["text"],
+            "pages": res.get("pages"),
+            "pages_read": res.get("pages_read"),
+            "truncated": bool(res.get("truncated")),
+            "ext": ext,
+            "extractor_version": EXTRACTOR_VERSION,
+            "predictions": None,
+        }
+        await self.cache.save(sha256, doc)
+        doc["cached"] = False
+        return doc
+
+    @staticmethod
+    def cached_predictions(doc: dict, model_version: str | None) -> list | None:
+        preds = (doc or {}).get("predictions") or {}
+        if model_version and preds.get("model_version") == model_version:
+            return preds.get("top")
+        return None
+
+    async def save_predictions(self, sha256: str, model_version: str | None, predictions: list):
+        if model_version and predictions:
+            await self.cache.save_predictions(sha256, model_version, predictions)
@@ -1,6 +1,6 @@
-from docx import Document
+from app.services.extraction_service import extract_document
 
 
 def extract_text_from_docx(path: str) -> str:
-    doc = Document(path)
-    return "\n".join([p.text for p in doc.paragraphs]).strip()
+    """Synchronous helper; request paths should use extraction_service."""
+    return extract_document(path, ".docx")["text"]
@@ -0,0 +1,230 @@
+# app/services/extraction_service.py
+"""
+Text extraction for uploaded documents (PDF, DOCX, TXT).
+
+Parsing runs in a process pool so a pathological file cannot pin the event
+loop or a request worker: each document has a timeout (the pool is torn
+down and replaced when one expires), workers run under an address-space
+limit, and PDFs are read page by page only until the page or character
+budget is reached.
+
+This module is imported by the pool workers, so keep its imports light.
+"""
+import io
+import os
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_WORKERS = int(os.getenv("EXTRACTION_WORKERS", "2"))
+EXTRACTION_TIMEOUT_SECONDS = float(os.getenv("EXTRACTION_TIMEOUT_SECONDS", "30"))
+EXTRACTION_MAX_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "50"))
+EXTRACTION_MAX_CHARS = int(os.getenv("EXTRACTION_MAX_CHARS", "20000"))
+EXTRACTION_MEMORY_LIMIT_MB = int(os.getenv("EXTRACTION_MEMORY_LIMIT_MB", "1024"))
+
+SUPPORTED_EXTENSIONS = {".pdf", ".docx", ".txt"}
+
+
+class ExtractionError(ValueError):
+    pass
+
+
+class ExtractionTimeoutError(ExtractionError):
+    pass
+
+
+# -------------------------------------------------
+# Parsers (run inside the pool workers)
+# -------------------------------------------------
+def _open(source):
+    return io.BytesIO(source) if isinstance(source, (bytes, bytearray)) else source
+
+
+def _extract_pdf(source, max_pages: int, max_chars: int) -> dict:
+    from pypdf import PdfReader
+
+    reader = PdfReader(_open(source))
+    total_pages = len(reader.pages)
+    parts, chars, read = [], 0, 0
+    for page in reader.pages[:max_pages]:
+        read += 1
+        txt = page.extract_text() or ""
+        if txt.strip():
+            parts.append(txt)
+            chars += len(txt) + 1
+        if chars >= max_chars:
+            break
+    text = "\n".join(parts).strip()
+    return {
+        "text": text[:max_chars],
+        "pages": total_pages,
+        "pages_read": read,
+        "truncated": read < total_pages or len(text) > max_chars,
+    }
+
+
+def _extract_docx(source, max_chars: int) -> dict:
+    from docx import Document
+
+    doc = Document(_open(source))
+    parts, chars = [], 0
+    truncated = False
+    for p in doc.paragraphs:
+        if chars >= max_chars:
+            truncated = True
+            break
+        if p.text and p.text.strip():
+            parts.append(p.text)
+            chars += len(p.text) + 1
+    text = "\n".join(parts).strip()
+    return {"text": text[:max_chars], "pages": None, "pages_read": None, "truncated": truncated or len(text) > max_chars}
+
+
+def _extract_txt(source, max_chars: int) -> dict:
+    if isinstance(source, (bytes, bytearray)):
+        raw = bytes(source[: max_chars * 4])
+    else:
+        with open(source, "rb") as f:
+            raw = f.read(max_chars * 4)
+    text = raw.decode("utf-8", errors="ignore").strip()
+    return {"text": text[:max_chars], "pages": None, "pages_read": None, "truncated": len(text) > max_chars}
+
+
+def extract_document(source, ext: str, max_pages: int | None = None, max_chars: int | None = None) -> dict:
+    """
+    Synchronous extraction of a path or bytes. Returns
+    {"text", "pages", "pages_read", "truncated"}.
+    """
+    max_pages = max_pages or EXTRACTION_MAX_PAGES
+    max_chars = max_chars or EXTRACTION_MAX_CHARS
+    ext = (ext or "").lower()
+    if ext == ".pdf":
+        return _extract_pdf(source, max_pages, max_chars)
+    if ext == ".docx":
+        return _extract_docx(source, max_chars)
+    if ext == ".txt":
+        return _extract_txt(source, max_chars)
+    raise ExtractionError("Only PDF and DOCX supported")
+
+
+def _init_worker(memory_limit_bytes: int) -> None:
+    if memory_limit_bytes <= 0:
+        return
+    try:
+        import resource
+
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, memory_limit_bytes))
+    except Exception:  # pragma: no cover - not available on every platform
+        pass
+
+
+# -------------------------------------------------
+# Service
+# -------------------------------------------------
+class ExtractionService:
+    def __init__(
+        self,
+        workers: int | None = None,
+        timeout: float | None = None,
+        max_pages: int | None = None,
+        max_chars: int | None = None,
+        memory_limit_mb: int | None = None,
+    ):
+        self.workers = EXTRACTION_WORKERS if workers is None else workers
+        self.timeout = timeout or EXTRACTION_TIMEOUT_SECONDS
+        self.max_pages = max_pages or EXTRACTION_MAX_PAGES
+        self.max_chars = max_chars or EXTRACTION_MAX_CHARS
+        self.memory_limit_mb = EXTRACTION_MEMORY_LIMIT_MB if memory_limit_mb is None else memory_limit_mb
+        self._pool: ProcessPoolExecutor | None = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # spawn: never fork the API process (model and event loop state)
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.memory_limit_mb * 1024 * 1024,),
+            )
+        return self._pool
+
+    def _reset_pool(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        for proc in list(getattr(pool, "_processes", {}).values()):
+            try:
+                proc.terminate()
+            except Exception:
+                pass
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self) -> None:
+        self._reset_pool()
+
+    async def extract(
+        self,
+        source,
+        ext: str | None = None,
+        max_chars: int | None = None,
+        max_pages: int | None = None,
+    ) -> dict:
+        """
+        Extract a path (extension taken from it) or raw bytes (pass `ext`).
+        Raises ExtractionTimeoutError / ExtractionError (both ValueError).
+        """
+        if ext is None:
+            ext = os.path.splitext(str(source))[1]
+        ext = ext.lower()
+        if ext not in SUPPORTED_EXTENSIONS:
+            raise ExtractionError("Only PDF and DOCX supported")
+        args = (source, ext, max_pages or self.max_pages, max_chars or self.max_chars)
+
+        if self.workers <= 0:
+            return await self._run_inline(args)
+
+        for attempt in range(2):
+            pool = self._get_pool()
+            loop = asyncio.get_running_loop()
+            try:
+                return await asyncio.wait_for(
+                    loop.run_in_executor(pool, extract_document, *args), timeout=self.timeout
+                )
+            except asyncio.TimeoutError:
+                logger.warning("Extraction timed out after %.0fs; restarting pool", self.timeout)
+                if self._pool is pool:
+                    self._reset_pool()
+                raise ExtractionTimeoutError("Document took too long to process")
+            except BrokenProcessPool:
+                # a worker died (memory limit, crash, or another document's
+                # timeout tore the pool down): retry once on a fresh pool
+                if self._pool is pool:
+                    self._reset_pool()
+                if attempt:
+                    raise ExtractionError("Could not extract text from file")
+            except ExtractionError:
+                raise
+            except Exception as e:
+                logger.info("Extraction failed: %s", e)
+                raise ExtractionError("Could not extract text from file")
+
+    async def _run_inline(self, args) -> dict:
+        try:
+            return await asyncio.wait_for(asyncio.to_thread(extract_document, *args), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            raise ExtractionTimeoutError("Document took too long to process")
+        except ExtractionError:
+            raise
+        except Exception as e:
+            logger.info("Extraction failed: %s", e)
+            raise ExtractionError("Could not extract text from file")
+
+    async def extract_text(self, source, ext: str | None = None, max_chars: int | None = None) -> str:
+        return (await self.extract(source, ext=ext, max_chars=max_chars))["text"]
+
+
+extraction_service = ExtractionService()
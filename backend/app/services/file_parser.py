@@ -1,30 +1,23 @@
 # app/services/file_parser.py
-import io
 from typing import Tuple
-from pypdf import PdfReader
-from docx import Document
+
+from app.services.extraction_service import extract_document
 
 
 class FileParser:
+    """Bytes-based facade over app.services.extraction_service (synchronous)."""
+
     @staticmethod
     def parse_pdf(file_bytes: bytes) -> str:
-        reader = PdfReader(io.BytesIO(file_bytes))
-        parts = []
-        for page in reader.pages:
-            txt = page.extract_text() or ""
-            if txt.strip():
-                parts.append(txt)
-        return "\n".join(parts).strip()
+        return extract_document(file_bytes, ".pdf")["text"]
 
     @staticmethod
     def parse_docx(file_bytes: bytes) -> str:
-        doc = Document(io.BytesIO(file_bytes))
-        parts = [p.text for p in doc.paragraphs if p.text and p.text.strip()]
-        return "\n".join(parts).strip()
+        return extract_document(file_bytes, ".docx")["text"]
 
     @staticmethod
     def parse_txt(file_bytes: bytes) -> str:
-        return file_bytes.decode("utf-8", errors="ignore").strip()
+        return extract_document(file_bytes, ".txt")["text"]
 
     @staticmethod
     def parse(filename: str, file_bytes: bytes) -> Tuple[str, str]:
@@ -1,16 +1,155 @@
 import os
+import time
 import uuid
+import hashlib
 from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
 
+from app.core.timing import span
 
-def save_upload(file: UploadFile, upload_dir: str) -> str:
-    os.makedirs(upload_dir, exist_ok=True)
+_MB = 1024 * 1024
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE_BYTES", str(_MB)))
+
+# per-endpoint limits; also enforced on the request body by UploadLimitMiddleware
+MAX_QUERY_UPLOAD_BYTES = int(os.getenv("MAX_QUERY_UPLOAD_MB", "25")) * _MB
+MAX_FEEDBACK_ATTACHMENT_BYTES = int(os.getenv("MAX_FEEDBACK_ATTACHMENT_MB", "10")) * _MB
+MAX_COMPLIANCE_EVIDENCE_BYTES = int(os.getenv("MAX_COMPLIANCE_EVIDENCE_MB", "50")) * _MB
+MAX_BULK_INGEST_BYTES = int(os.getenv("MAX_BULK_INGEST_MB", "200")) * _MB
+
+_UPLOAD_STATS = {"count": 0, "bytes": 0, "seconds": 0.0, "rejected": 0, "deduplicated": 0}
+
+
+class UploadTooLargeError(ValueError):
+    pass
+
+
+def _copy_to_disk(src, path: str, max_bytes: int | None) -> tuple[int, str]:
+    """Chunked copy into `path` (via a per-writer .part file). Returns (size, sha256 hex)."""
+    digest = hashlib.sha256()
+    size = 0
+    # unique per writer: concurrent uploads of the same content must not share it
+    tmp = f"{path}.{uuid.uuid4().hex}.part"
+    try:
+        with open(tmp, "wb") as out:
+            while True:
+                chunk = src.read(UPLOAD_CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(f"File exceeds {max_bytes // _MB} MB limit")
+                digest.update(chunk)
+                out.write(chunk)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return size, digest.hexdigest()
+
+
+def _hash_stream(src, max_bytes: int | None) -> tuple[int, str]:
+    digest = hashlib.sha256()
+    size = 0
+    while True:
+        chunk = src.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        size += len(chunk)
+        if max_bytes is not None and size > max_bytes:
+            raise UploadTooLargeError(f"File exceeds {max_bytes // _MB} MB limit")
+        digest.update(chunk)
+    return size, digest.hexdigest()
+
+
+def shard_dir(root: str, key: str) -> str:
+    """Two-level fan-out (256 x 256 directories) keyed by a hex digest."""
+    return os.path.join(root, key[:2], key[2:4])
 
+
+def _store_content_addressed(src, upload_dir: str, ext: str, max_bytes: int | None, sharded: bool):
+    """Hash the spooled upload first; only write it if that content is new."""
+    size, sha256 = _hash_stream(src, max_bytes)
+    filename = f"{sha256}{ext}"
+    target_dir = shard_dir(upload_dir, sha256) if sharded else upload_dir
+    path = os.path.join(target_dir, filename)
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return path, filename, size, sha256, True
+    os.makedirs(target_dir, exist_ok=True)
+    src.seek(0)
+    try:
+        size, sha256 = _copy_to_disk(src, path, max_bytes)
+    except UploadTooLargeError:
+        raise
+    except OSError:
+        # lost a race with another writer of the same content
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            return path, filename, size, sha256, True
+        raise
+    return path, filename, size, sha256, False
+
+
+async def store_upload(
+    file: UploadFile,
+    upload_dir: str,
+    filename: str | None = None,
+    max_bytes: int | None = None,
+    content_addressed: bool = False,
+    sharded: bool = False,
+) -> dict:
+    """
+    Stream an upload to `upload_dir` in UPLOAD_CHUNK_SIZE chunks on a worker
+    thread, hashing as it goes. Raises UploadTooLargeError past `max_bytes`.
+    With `content_addressed` the file is named by its SHA-256 and an
+    identical existing file is reused without writing. `sharded` places the
+    file under shard_dir() (keyed by the content hash, or by the hash of
+    `filename` for named files).
+    Returns {"path", "filename", "size", "sha256", "existing"}.
+    """
+    os.makedirs(upload_dir, exist_ok=True)
     ext = os.path.splitext(file.filename or "")[1].lower()
-    fname = f"{uuid.uuid4().hex}{ext}"
-    path = os.path.join(upload_dir, fname)
 
-    with open(path, "wb") as f:
-        f.write(file.file.read())
+    start = time.perf_counter()
+    existing = False
+    try:
+        with span("upload"):
+            await file.seek(0)
+            if content_addressed:
+                path, filename, size, sha256, existing = await run_in_threadpool(
+                    _store_content_addressed, file.file, upload_dir, ext, max_bytes, sharded
+                )
+            else:
+                filename = filename or f"{uuid.uuid4().hex}{ext}"
+                target_dir = shard_dir(upload_dir, name_key(filename)) if sharded else upload_dir
+                os.makedirs(target_dir, exist_ok=True)
+                path = os.path.join(target_dir, filename)
+                size, sha256 = await run_in_threadpool(_copy_to_disk, file.file, path, max_bytes)
+    except UploadTooLargeError:
+        _UPLOAD_STATS["rejected"] += 1
+        raise
+    _UPLOAD_STATS["count"] += 1
+    _UPLOAD_STATS["bytes"] += size
+    _UPLOAD_STATS["seconds"] += time.perf_counter() - start
+    if existing:
+        _UPLOAD_STATS["deduplicated"] += 1
+    return {"path": path, "filename": filename, "size": size, "sha256": sha256, "existing": existing}
+
+
+def name_key(filename: str) -> str:
+    return hashlib.sha1(filename.encode("utf-8")).hexdigest()
+
+
+def upload_stats() -> dict:
+    s = _UPLOAD_STATS
+    return {
+        "count": s["count"],
+        "bytes": s["bytes"],
+        "rejected": s["rejected"],
+        "deduplicated": s["deduplicated"],
+        "avg_bytes": int(s["bytes"] / s["count"]) if s["count"] else 0,
+        "throughput_mb_s": round(s["bytes"] / _MB / s["seconds"], 2) if s["seconds"] else None,
+    }
+
+
+SUPPORTED_QUERY_EXTENSIONS = {".pdf", ".docx"}
 
-    return path
@@ -0,0 +1,293 @@
+# app/services/graph_adjacency_cache.py
+"""
+In-process adjacency cache of `paper_graph` for multi-hop traversal.
+
+The graph is held in CSR form: node ids are interned to ints, and each
+node's out-edges are a slice of `indices` / `weights` / `relations`
+(`indptr[i]:indptr[i + 1]`), sorted by weight descending. Node documents
+written after the last refresh (by `updated_at`) replace their row in a
+small overlay that is merged into the arrays once it grows past
+GRAPH_CACHE_MAX_OVERLAY. New arrays are built in a worker thread and
+swapped in on the event loop as one CSR object, so readers never see a mix.
+
+The build and refreshes run in the background; until it is ready, for nodes the
+cache does not know, and while the graph holds more than
+GRAPH_CACHE_MAX_EDGES edges, callers fall back to the database. An
+oversized graph is checked again every GRAPH_CACHE_RECHECK_SECONDS.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Callable, Iterable, NamedTuple
+
+import numpy as np
+
+from app.core.time_utils import now_ist
+from app.repositories.graph_repo import GraphRepo
+from app.utils.graph_scoring import RELATIONS
+
+logger = logging.getLogger(__name__)
+
+GRAPH_CACHE_ENABLED = os.getenv("GRAPH_CACHE_ENABLED", "1") == "1"
+GRAPH_CACHE_MAX_EDGES = int(os.getenv("GRAPH_CACHE_MAX_EDGES", "5000000"))
+GRAPH_CACHE_REFRESH_SECONDS = float(os.getenv("GRAPH_CACHE_REFRESH_SECONDS", "30"))
+GRAPH_CACHE_MAX_OVERLAY = int(os.getenv("GRAPH_CACHE_MAX_OVERLAY", "100000"))
+GRAPH_CACHE_RECHECK_SECONDS = float(os.getenv("GRAPH_CACHE_RECHECK_SECONDS", "600"))
+# nodes updated while a refresh runs are picked up again by the next one
+_WATERMARK_SLACK = timedelta(seconds=5)
+
+_RELATION_CODES = {r: k for k, r in enumerate(RELATIONS)}
+
+
+class CSR(NamedTuple):
+    indptr: np.ndarray
+    indices: np.ndarray
+    weights: np.ndarray
+    relations: np.ndarray
+
+
+_EMPTY_CSR = CSR(
+    np.zeros(1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int8)
+)
+
+
+def build_csr(n: int, src, dst, w, rel) -> CSR:
+    """CSR arrays for nodes 0..n-1 from parallel edge lists."""
+    src = np.asarray(src, dtype=np.int64)
+    dst = np.asarray(dst, dtype=np.int32)
+    w = np.asarray(w, dtype=np.float32)
+    rel = np.asarray(rel, dtype=np.int8)
+    if len(src):
+        # one edge per (src, dst): keep the heaviest
+        order = np.lexsort((-w, dst, src))
+        src, dst, w, rel = src[order], dst[order], w[order], rel[order]
+        first = np.ones(len(src), dtype=bool)
+        first[1:] = (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])
+        src, dst, w, rel = src[first], dst[first], w[first], rel[first]
+        # rows ordered by weight descending
+        order = np.lexsort((-w, src))
+        src, dst, w, rel = src[order], dst[order], w[order], rel[order]
+    counts = np.bincount(src, minlength=n) if len(src) else np.zeros(n, dtype=np.int64)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return CSR(indptr, dst, w, rel)
+
+
+def merge_overlay(csr: CSR, overlay: dict, n: int) -> CSR:
+    """A new CSR for `n` nodes in which the overlay rows replace their CSR rows."""
+    n_rows = len(csr.indptr) - 1
+    src = np.repeat(np.arange(n_rows, dtype=np.int64), np.diff(csr.indptr))
+    keep = ~np.isin(src, np.fromiter(overlay.keys(), dtype=np.int64, count=len(overlay)))
+    o_src, o_dst, o_w, o_rel = [], [], [], []
+    for s, row in overlay.items():
+        for d, (w, r) in row.items():
+            o_src.append(s)
+            o_dst.append(d)
+            o_w.append(w)
+            o_rel.append(r)
+    return build_csr(
+        n,
+        np.concatenate([src[keep], np.asarray(o_src, dtype=np.int64)]),
+        np.concatenate([csr.indices[keep], np.asarray(o_dst, dtype=np.int32)]),
+        np.concatenate([csr.weights[keep], np.asarray(o_w, dtype=np.float32)]),
+        np.concatenate([csr.relations[keep], np.asarray(o_rel, dtype=np.int8)]),
+    )
+
+
+def bfs(
+    neighbors: Callable[[str], Iterable[tuple]],
+    seed: str,
+    depth: int,
+    fan_out: int,
+    min_weight: float,
+    max_nodes: int,
+) -> tuple[dict, list]:
+    """
+    Breadth-first expansion from `seed`. `neighbors(node)` yields
+    (node, weight, relation) sorted by weight descending; each node follows
+    at most `fan_out` edges of weight >= `min_weight`.
+    Returns ({node: hop}, [edge dicts]).
+    """
+    seen = {seed: 0}
+    edges = []
+    frontier = [seed]
+    for hop in range(1, depth + 1):
+        nxt = []
+        for node in frontier:
+            taken = 0
+            for other, weight, relation in neighbors(node):
+                if weight < min_weight or taken >= fan_out:
+                    break
+                if other in seen and seen[other] < hop:
+                    continue
+                if other not in seen:
+                    if len(seen) >= max_nodes:
+                        break
+                    seen[other] = hop
+                    nxt.append(other)
+                taken += 1
+                edges.append({"from": node, "to": other, "weight": round(float(weight), 4), "relation": relation})
+        frontier = nxt
+        if not frontier:
+            break
+    return seen, edges
+
+
+class AdjacencyCache:
+    def __init__(self, db=None):
+        self.repo = GraphRepo(db=db)
+        self.ids: list[str] = []
+        self.index: dict[str, int] = {}
+        self.csr = _EMPTY_CSR
+        self.overlay: dict[int, dict[int, tuple[float, int]]] = {}
+        self.overlay_size = 0
+        self.ready = False
+        self.disabled = not GRAPH_CACHE_ENABLED
+        # monotonic time of the last build skipped for exceeding GRAPH_CACHE_MAX_EDGES
+        self.too_large_at: float | None = None
+        self.watermark = None
+        self.refreshed_at = 0.0
+        self._lock = asyncio.Lock()
+        self._build_task: asyncio.Task | None = None
+        self._refresh_task: asyncio.Task | None = None
+
+    # -------------------------------------------------
+    # Lookup
+    # -------------------------------------------------
+    def _intern(self, node: str) -> int:
+        idx = self.index.get(node)
+        if idx is None:
+            idx = len(self.ids)
+            self.index[node] = idx
+            self.ids.append(node)
+        return idx
+
+    def knows(self, node: str) -> bool:
+        return self.ready and node in self.index
+
+    def neighbors(self, node: str) -> list[tuple]:
+        idx = self.index.get(node)
+        if idx is None:
+            return []
+        csr = self.csr
+        row = self.overlay.get(idx)
+        if row is not None:
+            ranked = sorted(row.items(), key=lambda x: -x[1][0])
+        elif idx + 1 < len(csr.indptr):
+            lo, hi = csr.indptr[idx], csr.indptr[idx + 1]
+            ranked = zip(
+                csr.indices[lo:hi].tolist(),
+                zip(csr.weights[lo:hi].tolist(), csr.relations[lo:hi].tolist()),
+            )
+        else:
+            return []
+        return [(self.ids[j], w, RELATIONS[r] if 0 <= r < len(RELATIONS) else None) for j, (w, r) in ranked]
+
+    def stats(self) -> dict:
+        csr, overlay = self.csr, self.overlay
+        rows = np.fromiter(overlay.keys(), dtype=np.int64, count=len(overlay))
+        rows = rows[rows < len(csr.indptr) - 1]
+        # overlay rows replace their CSR rows rather than adding to them
+        superseded = int((csr.indptr[rows + 1] - csr.indptr[rows]).sum())
+        return {
+            "ready": self.ready,
+            "disabled": self.disabled,
+            "too_large": self.too_large_at is not None,
+            "nodes": len(self.ids),
+            "edges": int(len(csr.indices)) - superseded + self.overlay_size,
+            "overlay": self.overlay_size,
+        }
+
+    # -------------------------------------------------
+    # Build / refresh
+    # -------------------------------------------------
+    async def ensure_fresh(self) -> bool:
+        """True when the cache can serve lookups; starts/refreshes it as needed."""
+        if self.disabled:
+            return False
+        if not self.ready:
+            if self.too_large_at is not None and time.monotonic() - self.too_large_at < GRAPH_CACHE_RECHECK_SECONDS:
+                return False
+            if self._build_task is None or self._build_task.done():
+                self._build_task = asyncio.create_task(self._build())
+            return False
+        if (
+            time.monotonic() - self.refreshed_at >= GRAPH_CACHE_REFRESH_SECONDS
+            and not self._lock.locked()
+            and (self._refresh_task is None or self._refresh_task.done())
+        ):
+            self._refresh_task = asyncio.create_task(self._refresh_in_background())
+        return True
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            await self.refresh()
+        except Exception:
+            logger.exception("Graph cache refresh failed")
+
+    async def _build(self) -> None:
+        async with self._lock:
+            try:
+                if await self.repo.edge_count() > GRAPH_CACHE_MAX_EDGES:
+                    self._skip_oversized()
+                    return
+                started = now_ist()
+                src, dst, w, rel = [], [], [], []
+                async for doc in self.repo.iter_nodes():
+                    s = self._intern(doc["_id"])
+                    for d, (weight, code) in self._row(doc).items():
+                        src.append(s)
+                        dst.append(d)
+                        w.append(weight)
+                        rel.append(code)
+                    # the graph may have grown since it was counted
+                    if len(src) > GRAPH_CACHE_MAX_EDGES:
+                        self._skip_oversized()
+                        return
+                self.csr = await asyncio.to_thread(build_csr, len(self.ids), src, dst, w, rel)
+                self.overlay, self.overlay_size = {}, 0
+                self.watermark = started - _WATERMARK_SLACK
+                self.refreshed_at = time.monotonic()
+                self.too_large_at = None
+                self.ready = True
+                logger.info("Graph cache built: %s", self.stats())
+            except Exception:
+                logger.exception("Graph cache build failed")
+
+    def _skip_oversized(self) -> None:
+        logger.info(
+            "paper_graph exceeds GRAPH_CACHE_MAX_EDGES; checking again in %ss", GRAPH_CACHE_RECHECK_SECONDS
+        )
+        self.ids, self.index = [], {}
+        self.too_large_at = time.monotonic()
+
+    def _row(self, doc: dict) -> dict:
+        return {
+            self._intern(n["id"]): (float(n.get("weight") or 0.0), _RELATION_CODES.get(n.get("relation"), -1))
+            for n in doc.get("neighbors") or []
+            if n.get("id")
+        }
+
+    async def refresh(self) -> int:
+        """Replace the rows of nodes updated since the last refresh (overlay)."""
+        async with self._lock:
+            started = now_ist()
+            added = 0
+            async for doc in self.repo.iter_nodes(since=self.watermark):
+                s = self._intern(doc["_id"])
+                row = self._row(doc)
+                self.overlay_size += len(row) - len(self.overlay.get(s) or ())
+                self.overlay[s] = row
+                added += 1
+            self.watermark = started - _WATERMARK_SLACK
+            self.refreshed_at = time.monotonic()
+            if self.overlay_size > GRAPH_CACHE_MAX_OVERLAY:
+                # nothing else touches the overlay while the lock is held
+                csr = await asyncio.to_thread(merge_overlay, self.csr, self.overlay, len(self.ids))
+                self.csr, self.overlay, self.overlay_size = csr, {}, 0
+            return added
+
+
+adjacency_cache = AdjacencyCache()
@@ -0,0 +1,178 @@
+# app/services/graph_centrality_service.py
+"""
+Batch centrality over `paper_graph`.
+
+The job streams node documents in batches, interns paper ids to ints and
+appends each batch's edges to int32 / float32 chunks, so memory is the edge
+arrays plus the id table, not the documents. It then runs weighted
+power-iteration PageRank and weighted in-degree with NumPy (edges are kept in
+CSR order, so a step is a gather and a bincount) and writes the scores back
+to `paper_centrality` in bulk.
+
+`pagerank_pct` (the percentile of a paper's PageRank) is what rankers
+blend in: it is scale-free, so it mixes with edge weights and BM25 scores.
+"""
+import os
+import asyncio
+import logging
+from typing import List
+
+import numpy as np
+
+from app.core.time_utils import now_ist
+from app.repositories.graph_repo import GraphRepo
+from app.repositories.paper_centrality_repo import PaperCentralityRepo
+
+logger = logging.getLogger(__name__)
+
+GRAPH_CENTRALITY_DAMPING = float(os.getenv("GRAPH_CENTRALITY_DAMPING", "0.85"))
+GRAPH_CENTRALITY_MAX_ITER = int(os.getenv("GRAPH_CENTRALITY_MAX_ITER", "100"))
+GRAPH_CENTRALITY_TOL = float(os.getenv("GRAPH_CENTRALITY_TOL", "1e-6"))
+GRAPH_CENTRALITY_BATCH_SIZE = int(os.getenv("GRAPH_CENTRALITY_BATCH_SIZE", "2000"))
+# share of the ranking key taken by centrality when re-ranking related papers
+GRAPH_CENTRALITY_BLEND = float(os.getenv("GRAPH_CENTRALITY_BLEND", "0.2"))
+
+
+def pagerank(
+    indptr: np.ndarray,
+    indices: np.ndarray,
+    weights: np.ndarray,
+    damping: float = GRAPH_CENTRALITY_DAMPING,
+    max_iter: int = GRAPH_CENTRALITY_MAX_ITER,
+    tol: float = GRAPH_CENTRALITY_TOL,
+) -> np.ndarray:
+    """
+    Weighted PageRank over a CSR graph (row i's out-edges are
+    indices / weights[indptr[i]:indptr[i + 1]]). Dangling nodes spread their
+    rank uniformly. Returns scores summing to 1.
+    """
+    n = len(indptr) - 1
+    if n <= 0:
+        return np.zeros(0)
+    src = np.repeat(np.arange(n), np.diff(indptr))
+    weights = np.asarray(weights, dtype=np.float64)
+    out_w = np.bincount(src, weights=weights, minlength=n)
+    inv_out = np.divide(1.0, out_w, out=np.zeros(n), where=out_w > 0)
+    dangling = out_w == 0
+
+    rank = np.full(n, 1.0 / n)
+    for _ in range(max_iter):
+        spread = np.bincount(indices, weights=(rank * inv_out)[src] * weights, minlength=n)
+        new = (1.0 - damping) / n + damping * (spread + rank[dangling].sum() / n)
+        delta = np.abs(new - rank).sum()
+        rank = new
+        if delta < tol:
+            break
+    return rank / rank.sum()
+
+
+def percentile_ranks(values: np.ndarray) -> np.ndarray:
+    """0 for the smallest value, 1 for the largest (ties share the lower rank)."""
+    n = len(values)
+    if n < 2:
+        return np.ones(n)
+    order = np.argsort(values, kind="stable")
+    ranks = np.empty(n)
+    # ties: everyone takes the rank of the first of their group
+    sorted_vals = values[order]
+    first = np.r_[True, sorted_vals[1:] != sorted_vals[:-1]]
+    ranks[order] = np.maximum.accumulate(np.where(first, np.arange(n), 0))
+    return ranks / (n - 1)
+
+
+class GraphCentralityService:
+    def __init__(self, db=None):
+        self.graph = GraphRepo(db=db)
+        self.scores = PaperCentralityRepo(db=db)
+
+    async def load_csr(self) -> tuple[list, np.ndarray, np.ndarray, np.ndarray]:
+        """(ids, indptr, indices, weights) streamed from paper_graph."""
+        ids: List[str] = []
+        index: dict = {}
+
+        def intern(node: str) -> int:
+            k = index.get(node)
+            if k is None:
+                k = index[node] = len(ids)
+                ids.append(node)
+            return k
+
+        src_chunks, dst_chunks, w_chunks = [], [], []
+        src, dst, w = [], [], []
+
+        def flush():
+            if src:
+                src_chunks.append(np.asarray(src, dtype=np.int32))
+                dst_chunks.append(np.asarray(dst, dtype=np.int32))
+                w_chunks.append(np.asarray(w, dtype=np.float32))
+                src.clear()
+                dst.clear()
+                w.clear()
+
+        async for doc in self.graph.iter_nodes(batch_size=GRAPH_CENTRALITY_BATCH_SIZE):
+            s = intern(doc["_id"])
+            for nb in doc.get("neighbors") or []:
+                if nb.get("id"):
+                    src.append(s)
+                    dst.append(intern(nb["id"]))
+                    w.append(max(float(nb.get("weight") or 0.0), 0.0))
+            if len(src) >= GRAPH_CENTRALITY_BATCH_SIZE * 50:
+                flush()
+        flush()
+
+        n = len(ids)
+        if not src_chunks:
+            return ids, np.zeros(n + 1, dtype=np.int64), np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.float32)
+        src_a = np.concatenate(src_chunks)
+        order = np.argsort(src_a, kind="stable")
+        indices = np.concatenate(dst_chunks)[order]
+        weights = np.concatenate(w_chunks)[order]
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src_a, minlength=n), out=indptr[1:])
+        return ids, indptr, indices, weights
+
+    async def run(self) -> dict:
+        """Recompute and store PageRank / degree for every paper in the graph."""
+        started = now_ist()
+        ids, indptr, indices, weights = await self.load_csr()
+        if not ids:
+            return {"nodes": 0, "edges": 0}
+
+        rank = await asyncio.to_thread(pagerank, indptr, indices, weights)
+        pct = percentile_ranks(rank)
+        # weighted in-degree: how strongly the rest of the graph links to a paper
+        degree = np.bincount(indices, weights=weights, minlength=len(ids))
+
+        for lo in range(0, len(ids), GRAPH_CENTRALITY_BATCH_SIZE):
+            hi = min(lo + GRAPH_CENTRALITY_BATCH_SIZE, len(ids))
+            await self.scores.write_batch(
+                [
+                    {
+                        "_id": ids[k],
+                        "pagerank": float(rank[k]),
+                        "pagerank_pct": round(float(pct[k]), 6),
+                        "degree": round(float(degree[k]), 6),
+                    }
+                    for k in range(lo, hi)
+                ],
+                started,
+            )
+        await self.scores.prune(started)
+        return {"nodes": len(ids), "edges": int(len(indices))}
+
+    async def rerank(self, edges: list, limit: int | None = None) -> list:
+        """
+        Related-paper edges ordered by (1 - blend) * weight + blend * the
+        related paper's PageRank percentile.
+        """
+        if GRAPH_CENTRALITY_BLEND <= 0 or len(edges) < 2:
+            return edges[:limit] if limit else edges
+        pct = await self.scores.percentiles([e.get("related_paper_id") for e in edges])
+        ranked = sorted(
+            edges,
+            key=lambda e: -(
+                (1.0 - GRAPH_CENTRALITY_BLEND) * float(e.get("weight") or 0.0)
+                + GRAPH_CENTRALITY_BLEND * pct.get(e.get("related_paper_id"), 0.0)
+            ),
+        )
+        return ranked[:limit] if limit else ranked
@@ -0,0 +1,222 @@
+# app/services/graph_export_service.py
+"""
+Streaming export of the paper graph as GraphML or NDJSON (optionally gzip).
+
+Nothing is materialized: node and edge records are read from Mongo cursors
+in batches of GRAPH_EXPORT_BATCH_SIZE, serialized, compressed and yielded
+batch by batch.
+
+- Scoped exports (a user and/or a subject) take their nodes from `papers`
+  (one per paper_uid, grouped server-side) and keep only edges between
+  exported nodes. That membership check holds the exported ids in memory;
+  nothing else grows with the graph.
+- The global export walks `paper_graph` node documents directly, labels
+  them from `paper_catalog` and needs no membership set.
+
+Edges are directed, as stored (see GraphRepo).
+"""
+import os
+import re
+import json
+import zlib
+from typing import AsyncIterator, Iterable
+from xml.sax.saxutils import escape, quoteattr
+
+from bson import ObjectId
+
+from app.repositories.graph_repo import GraphRepo
+from app.repositories.paper_catalog_repo import PaperCatalogRepo
+from app.repositories.paper_repo import PaperRepo
+
+GRAPH_EXPORT_BATCH_SIZE = int(os.getenv("GRAPH_EXPORT_BATCH_SIZE", "1000"))
+GRAPH_EXPORT_FORMATS = ("graphml", "ndjson")
+
+_NODE_KEYS = (("label", "string"), ("year", "int"), ("venue", "string"), ("subject", "string"))
+_EDGE_KEYS = (("weight", "double"), ("relation", "string"))
+
+_GRAPHML_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<graphml xmlns="http://graphml.graphdrawing.org/xmlns">\n'
+    + "".join(f'  <key id="{k}" for="node" attr.name="{k}" attr.type="{t}"/>\n' for k, t in _NODE_KEYS)
+    + "".join(f'  <key id="{k}" for="edge" attr.name="{k}" attr.type="{t}"/>\n' for k, t in _EDGE_KEYS)
+    + '  <graph id="papers" edgedefault="directed">\n'
+)
+_GRAPHML_TAIL = "  </graph>\n</graphml>\n"
+# characters XML 1.0 does not allow, even escaped
+_XML_INVALID = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _graphml_data(record: dict, keys) -> str:
+    return "".join(
+        f'<data key="{k}">{escape(_XML_INVALID.sub("", str(record[k])))}</data>'
+        for k, _ in keys
+        if record.get(k) is not None
+    )
+
+
+def graphml_record(record: dict) -> str:
+    if record["type"] == "node":
+        node_id = quoteattr(_XML_INVALID.sub("", record["id"]))
+        return f"    <node id={node_id}>{_graphml_data(record, _NODE_KEYS)}</node>\n"
+    return (
+        f'    <edge source={quoteattr(_XML_INVALID.sub("", record["source"]))}'
+        f' target={quoteattr(_XML_INVALID.sub("", record["target"]))}>'
+        f"{_graphml_data(record, _EDGE_KEYS)}</edge>\n"
+    )
+
+
+def ndjson_record(record: dict) -> str:
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+def export_media(fmt: str, compress: bool) -> tuple[str, str]:
+    """(media type, download filename) of an export."""
+    if compress:
+        return "application/gzip", f"paper_graph.{fmt}.gz"
+    if fmt == "graphml":
+        return "application/graphml+xml", "paper_graph.graphml"
+    return "application/x-ndjson", "paper_graph.ndjson"
+
+
+def _year(value):
+    try:
+        return int(value) if value else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _edge(source: str, n: dict) -> dict:
+    return {
+        "type": "edge",
+        "source": source,
+        "target": n["id"],
+        "weight": round(float(n.get("weight") or 0.0), 4),
+        "relation": n.get("relation"),
+    }
+
+
+class GraphExportService:
+    def __init__(self, db=None):
+        self.graph = GraphRepo(db=db)
+        self.papers = PaperRepo(db=db)
+        self.catalog = PaperCatalogRepo(db=db)
+
+    # -------------------------------------------------
+    # Records
+    # -------------------------------------------------
+    async def records(
+        self,
+        user_id: str | None = None,
+        subject: str | None = None,
+        min_weight: float = 0.0,
+    ) -> AsyncIterator[list]:
+        """Batches of node / edge records (dicts with a "type" field)."""
+        if user_id is None and subject is None:
+            async for batch in self._global_records(min_weight):
+                yield batch
+            return
+
+        match = {"paper_uid": {"$type": "string"}}
+        if user_id is not None:
+            match["user_id"] = ObjectId(user_id)
+        if subject:
+            match["subject_area"] = subject
+        pipeline = [
+            {"$match": match},
+            {
+                "$group": {
+                    "_id": "$paper_uid",
+                    "title": {"$first": "$title"},
+                    "year": {"$first": "$year"},
+                    "venue": {"$first": "$venue"},
+                    "subject_area": {"$first": "$subject_area"},
+                }
+            },
+        ]
+        members: list = []
+        batch: list = []
+        cursor = self.papers.col.aggregate(pipeline, allowDiskUse=True, batchSize=GRAPH_EXPORT_BATCH_SIZE)
+        async for p in cursor:
+            members.append(p["_id"])
+            batch.append(
+                {
+                    "type": "node",
+                    "id": p["_id"],
+                    "label": p.get("title"),
+                    "year": _year(p.get("year")),
+                    "venue": p.get("venue"),
+                    "subject": p.get("subject_area"),
+                }
+            )
+            if len(batch) >= GRAPH_EXPORT_BATCH_SIZE:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+        member_set = set(members)
+        for lo in range(0, len(members), GRAPH_EXPORT_BATCH_SIZE):
+            batch = []
+            async for doc in self.graph.nodes_by_ids(members[lo : lo + GRAPH_EXPORT_BATCH_SIZE]):
+                batch.extend(
+                    _edge(doc["_id"], n)
+                    for n in doc.get("neighbors") or []
+                    if n.get("id") in member_set and (n.get("weight") or 0.0) >= min_weight
+                )
+            if batch:
+                yield batch
+
+    async def _global_records(self, min_weight: float) -> AsyncIterator[list]:
+        docs: list = []
+
+        async def _emit(docs: list) -> list:
+            titles = await self.catalog.titles_by_uid([d["_id"] for d in docs])
+            out = [{"type": "node", "id": d["_id"], "label": titles.get(d["_id"])} for d in docs]
+            for d in docs:
+                out.extend(
+                    _edge(d["_id"], n)
+                    for n in d.get("neighbors") or []
+                    if n.get("id") and (n.get("weight") or 0.0) >= min_weight
+                )
+            return out
+
+        async for doc in self.graph.iter_nodes(batch_size=GRAPH_EXPORT_BATCH_SIZE):
+            docs.append(doc)
+            if len(docs) >= GRAPH_EXPORT_BATCH_SIZE:
+                yield await _emit(docs)
+                docs = []
+        if docs:
+            yield await _emit(docs)
+
+    # -------------------------------------------------
+    # Serialization
+    # -------------------------------------------------
+    async def stream(
+        self,
+        fmt: str,
+        user_id: str | None = None,
+        subject: str | None = None,
+        min_weight: float = 0.0,
+        compress: bool = True,
+    ) -> AsyncIterator[bytes]:
+        """Serialized (and gzip-compressed) export, one chunk per record batch."""
+        if fmt not in GRAPH_EXPORT_FORMATS:
+            raise ValueError("Unsupported export format")
+        to_text = graphml_record if fmt == "graphml" else ndjson_record
+        gz = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+        def _out(parts: Iterable[str]) -> bytes:
+            data = "".join(parts).encode("utf-8")
+            return gz.compress(data) if gz else data
+
+        if fmt == "graphml":
+            yield _out([_GRAPHML_HEAD])
+        async for batch in self.records(user_id=user_id, subject=subject, min_weight=min_weight):
+            chunk = _out(to_text(r) for r in batch)
+            if chunk:
+                yield chunk
+        tail = _out([_GRAPHML_TAIL] if fmt == "graphml" else [])
+        if gz:
+            tail += gz.flush()
+        if tail:
+            yield tail
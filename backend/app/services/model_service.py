@@ -49,11 +49,15 @@ class ModelService:
     def __init__(self, artifacts_dir: str):
         self.artifacts_dir = artifacts_dir
         self.model = None
+        self.version = None
 
     def load(self) -> None:
         keras_path = os.path.join(self.artifacts_dir, "shallow_mlp_model.keras")
         if not os.path.exists(keras_path):
             raise FileNotFoundError(f"Missing model file: {keras_path}")
+        # identifies the artifact for cached predictions
+        stat = os.stat(keras_path)
+        self.version = f"{int(stat.st_mtime)}-{stat.st_size}"
 
         # OK First: load directly with keras v3
         try:
@@ -0,0 +1,198 @@
+# app/services/outbound_rate_limiter.py
+"""
+Outbound rate limiting for external paper providers.
+
+One token bucket per provider. With REDIS_URL set the buckets live in Redis
+and are updated by an atomic Lua script, so every uvicorn worker shares the
+provider's budget; otherwise buckets are kept in process memory.
+
+Callers wait (up to `max_wait`) for a token. Interactive requests have
+priority: background requests (prefetch) do not take tokens while an
+interactive request for the same provider is waiting.
+"""
+import os
+import re
+import time
+import asyncio
+import logging
+try:
+    import redis.asyncio as redis
+except Exception:  # pragma: no cover
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BACKGROUND = "background"
+
+# provider -> (tokens per second, burst)
+DEFAULT_RATES = {
+    "Semantic Scholar": (1.0, 1),
+    "OpenAlex": (10.0, 10),
+    "Crossref": (10.0, 5),
+    "arXiv": (1 / 3, 1),
+}
+
+_MAX_WAIT = {
+    PRIORITY_INTERACTIVE: float(os.getenv("OUTBOUND_MAX_WAIT_SECONDS", "5")),
+    PRIORITY_BACKGROUND: float(os.getenv("OUTBOUND_BACKGROUND_MAX_WAIT_SECONDS", "30")),
+}
+_BACKGROUND_POLL_SECONDS = 0.2
+
+_REDIS = None
+_REDIS_URL = os.getenv("REDIS_URL", "").strip()
+if _REDIS_URL and redis:
+    _REDIS = redis.from_url(_REDIS_URL, decode_responses=True)
+
+# Returns "0" when a token was taken, else the seconds until one is available.
+# Uses the Redis clock so workers on different hosts agree on refill time.
+_TAKE_LUA = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(data[1]) or burst
+local ts = tonumber(data[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= 1 then
+  tokens = tokens - 1
+else
+  wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 600)
+return tostring(wait)
+"""
+
+# Drains the bucket so no token is available for ARGV[2] seconds (429 backoff).
+_BACKOFF_LUA = """
+local rate = tonumber(ARGV[1])
+local seconds = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+redis.call('HSET', KEYS[1], 'tokens', tostring(-rate * seconds), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(seconds) + 600)
+return 1
+"""
+
+
+def _env_key(provider: str) -> str:
+    return re.sub(r"[^A-Z0-9]+", "_", provider.upper()).strip("_")
+
+
+def _load_rates() -> dict[str, tuple[float, float]]:
+    """
+    Override per provider with OUTBOUND_RATE_<PROVIDER>="<per_second>,<burst>",
+    e.g. OUTBOUND_RATE_SEMANTIC_SCHOLAR="1,1".
+    """
+    rates = dict(DEFAULT_RATES)
+    for provider in list(rates):
+        raw = os.getenv(f"OUTBOUND_RATE_{_env_key(provider)}", "").strip()
+        if not raw:
+            continue
+        try:
+            per_second, burst = [float(x) for x in raw.split(",", 1)]
+            rates[provider] = (per_second, max(1.0, burst))
+        except ValueError:
+            logger.warning("Invalid OUTBOUND_RATE for %s: %r", provider, raw)
+    return rates
+
+
+class OutboundRateLimiter:
+    def __init__(self, rates: dict | None = None, redis_client=None):
+        self.rates = rates or _load_rates()
+        self._redis = redis_client
+        self._buckets: dict[str, dict] = {}
+        self._interactive_waiting: dict[str, int] = {}
+
+    def _rate(self, provider: str) -> tuple[float, float]:
+        return self.rates.get(provider) or (5.0, 5)
+
+    # ----------------------- buckets -----------------------
+
+    async def _take(self, provider: str) -> float:
+        rate, burst = self._rate(provider)
+        if self._redis:
+            try:
+                wait = await self._redis.eval(_TAKE_LUA, 1, f"outbound:bucket:{provider}", rate, burst)
+                return float(wait)
+            except Exception:
+                logger.warning("Redis outbound limiter unavailable; using local bucket", exc_info=True)
+        now = time.monotonic()
+        bucket = self._buckets.setdefault(provider, {"tokens": float(burst), "ts": now})
+        bucket["tokens"] = min(burst, bucket["tokens"] + (now - bucket["ts"]) * rate)
+        bucket["ts"] = now
+        if bucket["tokens"] >= 1:
+            bucket["tokens"] -= 1
+            return 0.0
+        return (1 - bucket["tokens"]) / rate
+
+    async def backoff(self, provider: str, seconds: float) -> None:
+        """Provider answered 429: stop handing out tokens for `seconds`."""
+        rate, _ = self._rate(provider)
+        if self._redis:
+            try:
+                await self._redis.eval(_BACKOFF_LUA, 1, f"outbound:bucket:{provider}", rate, seconds)
+                return
+            except Exception:
+                logger.warning("Redis outbound limiter unavailable; using local bucket", exc_info=True)
+        self._buckets[provider] = {"tokens": -rate * seconds, "ts": time.monotonic()}
+
+    # ----------------------- priority -----------------------
+
+    async def _set_interactive_waiting(self, provider: str, delta: int) -> None:
+        if self._redis:
+            try:
+                key = f"outbound:waiting:{provider}"
+                await self._redis.incrby(key, delta)
+                await self._redis.expire(key, 120)
+            except Exception:
+                pass
+        self._interactive_waiting[provider] = self._interactive_waiting.get(provider, 0) + delta
+
+    async def _interactive_is_waiting(self, provider: str) -> bool:
+        if self._redis:
+            try:
+                return int(await self._redis.get(f"outbound:waiting:{provider}") or 0) > 0
+            except Exception:
+                pass
+        return self._interactive_waiting.get(provider, 0) > 0
+
+    # ----------------------- public -----------------------
+
+    async def acquire(
+        self,
+        provider: str,
+        priority: str = PRIORITY_INTERACTIVE,
+        max_wait: float | None = None,
+    ) -> bool:
+        """
+        Wait for a token. Returns False if none became available within
+        `max_wait` seconds (the caller should skip the provider).
+        """
+        if max_wait is None:
+            max_wait = _MAX_WAIT.get(priority, _MAX_WAIT[PRIORITY_INTERACTIVE])
+        deadline = time.monotonic() + max_wait
+        interactive = priority != PRIORITY_BACKGROUND
+
+        if interactive:
+            await self._set_interactive_waiting(provider, 1)
+        try:
+            while True:
+                if not interactive and await self._interactive_is_waiting(provider):
+                    wait = _BACKGROUND_POLL_SECONDS
+                else:
+                    wait = await self._take(provider)
+                    if wait <= 0:
+                        return True
+                if time.monotonic() + wait > deadline:
+                    return False
+                await asyncio.sleep(wait)
+        finally:
+            if interactive:
+                await self._set_interactive_waiting(provider, -1)
+
+
+outbound_limiter = OutboundRateLimiter(redis_client=_REDIS)
@@ -1,11 +1,38 @@
 # app/services/paper_aggregator_service.py
 from typing import List, Dict
+from datetime import timedelta
 import asyncio
+import logging
+import os
+import math
 import httpx
 import hashlib
+import numpy as np
 
+from app.core.time_utils import now_ist
+from app.core.timing import span
+from app.repositories.paper_catalog_repo import PaperCatalogRepo, catalog_key
+from app.repositories.paper_centrality_repo import PaperCentralityRepo
 from app.schemas.assistant import PaperItem
+from app.services.paper_result_cache import get_cached, set_cached, PARTIAL_CACHE_TTL
+from app.services.outbound_rate_limiter import outbound_limiter, PRIORITY_INTERACTIVE
+from app.utils.fast_json import loads as json_loads
 from app.utils.links import google_scholar_search_url
+from app.utils.ranking import tokenize, bm25_scores
+
+logger = logging.getLogger(__name__)
+
+_CATALOG_ENABLED = os.getenv("PAPER_CATALOG_ENABLED", "1") == "1"
+_CATALOG_MAX_AGE_DAYS = int(os.getenv("PAPER_CATALOG_MAX_AGE_DAYS", "30"))
+_CATALOG_MIN_SCORE = float(os.getenv("PAPER_CATALOG_MIN_SCORE", "2.0"))
+# re-ranking: blend of BM25 relevance, provider weight, recency and graph centrality
+_RERANK_W_BM25 = float(os.getenv("RERANK_WEIGHT_BM25", "0.6"))
+_RERANK_W_PROVIDER = float(os.getenv("RERANK_WEIGHT_PROVIDER", "0.25"))
+_RERANK_W_RECENCY = float(os.getenv("RERANK_WEIGHT_RECENCY", "0.15"))
+_RERANK_W_CENTRALITY = float(os.getenv("RERANK_WEIGHT_CENTRALITY", "0.1"))
+_RERANK_RECENCY_YEARS = int(os.getenv("RERANK_RECENCY_YEARS", "15"))
+# fraction of the final limit requested from each provider when re-ranking
+_PROVIDER_FETCH_RATIO = float(os.getenv("AGGREGATOR_PROVIDER_FETCH_RATIO", "0.6"))
 
 
 class PaperAggregatorService:
@@ -13,6 +40,8 @@ class PaperAggregatorService:
     FREE multi-source paper aggregator.
 
     Sources:
+      - Local paper catalog (first tier, no network)
+      - Provider result cache (see paper_result_cache)
       - Semantic Scholar (highest quality)
       - OpenAlex
       - Crossref
@@ -22,7 +51,7 @@ class PaperAggregatorService:
       - Provider weighting
       - Failure isolation
       - Deduplication
-      - Ranking
+      - Ranking (BM25 re-ranking against the user's text)
       - Graph-ready metadata
     """
 
@@ -35,37 +64,179 @@ class PaperAggregatorService:
 
     TIMEOUT = 20
 
-    async def search_all(self, query: str, limit: int = 10) -> List[PaperItem]:
+    # ask providers for only the fields the handlers below read
+    OPENALEX_SELECT = "title,publication_year,authorships,primary_location,doi,abstract_inverted_index"
+    CROSSREF_SELECT = "title,author,issued,container-title,URL"
+
+    def __init__(self, db=None, vectorizer_service=None):
+        self.catalog = PaperCatalogRepo(db=db)
+        self.centrality = PaperCentralityRepo(db=db)
+        self.vectorizer_service = vectorizer_service
+
+    async def search_all(
+        self,
+        query: str,
+        limit: int = 10,
+        rerank_text: str | None = None,
+        refresh: bool = False,
+        priority: str = PRIORITY_INTERACTIVE,
+    ) -> List[PaperItem]:
+        """
+        When `rerank_text` is given, candidates are re-ranked against it with
+        BM25 and each provider is asked for fewer results than `limit`.
+        `refresh=True` skips the catalog and result cache and re-populates
+        the cache from the providers (used by the prefetch worker).
+        `priority` is passed to the outbound rate limiter.
+        """
         query = (query or "").strip()
         if len(query) < 3:
             return []
 
+        local: List[PaperItem] = []
+        if not refresh:
+            with span("catalog"):
+                local = await self._search_catalog(query, limit)
+            if len(local) >= limit:
+                papers = self._finalize(local[:limit])
+                if not rerank_text:
+                    return papers
+                return self._rerank(papers, rerank_text, await self._centrality(papers))
+
+        provider_limit = self._provider_limit(limit) if rerank_text else limit
+        cached = None if refresh else await get_cached(query, provider_limit)
+        if cached is not None:
+            fetched = [PaperItem(**p) for p in cached]
+            for p in fetched:
+                p._from_provider = True
+        else:
+            fetched, complete = await self._fetch_providers(query, provider_limit, priority)
+            if fetched:
+                await set_cached(
+                    query,
+                    provider_limit,
+                    [p.model_dump() for p in fetched],
+                    ttl=None if complete else PARTIAL_CACHE_TTL,
+                )
+
+        results: List[PaperItem] = local + fetched
+        if rerank_text:
+            with span("paper_dedupe"):
+                papers = self._dedupe_and_rank(results, len(results))
+            with span("rerank"):
+                centrality = await self._centrality(papers)
+                papers = self._rerank(papers, rerank_text, centrality)[:limit]
+        else:
+            with span("paper_dedupe"):
+                papers = self._dedupe_and_rank(results, limit)
+        for p in papers:
+            if not p.abstract or not str(p.abstract).strip():
+                p.abstract = "NOT_AVAILABLE"
+        return papers
+
+    @staticmethod
+    def fetched_keys(papers: List[PaperItem]) -> set[str]:
+        """Catalog keys of the papers that came from providers (not the catalog tier)."""
+        return {catalog_key(p.title) for p in papers if p._from_provider}
+
+    async def _fetch_providers(
+        self, query: str, limit: int, priority: str = PRIORITY_INTERACTIVE
+    ) -> tuple[List[PaperItem], bool]:
+        """(results, complete): complete is False when any provider was skipped or failed."""
+        providers = [
+            ("Semantic Scholar", self._search_semantic_scholar),
+            ("OpenAlex", self._search_openalex),
+            ("Crossref", self._search_crossref),
+            ("arXiv", self._search_arxiv),
+        ]
         async with httpx.AsyncClient(timeout=self.TIMEOUT) as client:
             tasks = [
-                self._safe_call(self._search_semantic_scholar, client, query, limit),
-                self._safe_call(self._search_openalex, client, query, limit),
-                self._safe_call(self._search_crossref, client, query, limit),
-                self._safe_call(self._search_arxiv, client, query, limit),
+                self._safe_call(fn, client, query, limit, provider=name, priority=priority)
+                for name, fn in providers
             ]
 
             results: List[PaperItem] = []
+            complete = True
             for chunk in await asyncio.gather(*tasks):
+                if chunk is None:
+                    complete = False
+                    continue
+                for p in chunk:
+                    p._from_provider = True
                 results.extend(chunk)
+        return results, complete
 
-        papers = self._dedupe_and_rank(results, limit)
-        for p in papers:
-            if not p.abstract or not str(p.abstract).strip():
-                p.abstract = "NOT_AVAILABLE"
-        return papers
+    # -------------------------------------------------
+    # Local catalog tier
+    # -------------------------------------------------
+    async def _search_catalog(self, query: str, limit: int) -> List[PaperItem]:
+        """
+        Fresh, sufficiently relevant hits from the deduplicated catalog.
+        Any failure (e.g. text index not built yet) falls through to providers.
+        """
+        if not _CATALOG_ENABLED:
+            return []
+        try:
+            rows = await self.catalog.search_text(
+                query,
+                limit=limit,
+                fresh_since=now_ist() - timedelta(days=_CATALOG_MAX_AGE_DAYS),
+                min_score=_CATALOG_MIN_SCORE,
+            )
+        except Exception:
+            logger.exception("Paper catalog search failed; using providers only")
+            return []
+        return [
+            PaperItem(
+                paper_uid=r.get("paper_uid"),
+                title=r.get("title") or "Untitled",
+                abstract=r.get("abstract") or "NOT_AVAILABLE",
+                url=r.get("url"),
+                authors=r.get("authors") or None,
+                year=r.get("year"),
+                venue=r.get("venue"),
+                source=r.get("source"),
+            )
+            for r in rows
+        ]
 
     # -------------------------------------------------
     # Safe wrapper (no provider can break pipeline)
     # -------------------------------------------------
-    async def _safe_call(self, fn, client: httpx.AsyncClient, query: str, limit: int):
+    async def _safe_call(
+        self,
+        fn,
+        client: httpx.AsyncClient,
+        query: str,
+        limit: int,
+        provider: str | None = None,
+        priority: str = PRIORITY_INTERACTIVE,
+    ):
+        """Provider results, or None when it was skipped or failed (incomplete)."""
+        if provider:
+            with span("outbound_wait"):
+                acquired = await outbound_limiter.acquire(provider, priority=priority)
+            if not acquired:
+                logger.info("Skipping %s: outbound rate limit wait exceeded", provider)
+                return None
         try:
-            return await fn(client, query, limit)
+            with span(f"provider_{provider or fn.__name__}"):
+                return await fn(client, query, limit)
+        except httpx.HTTPStatusError as e:
+            if provider and e.response.status_code == 429:
+                retry_after = self._retry_after(e.response)
+                logger.warning("%s rate limited us; backing off %.0fs", provider, retry_after)
+                await outbound_limiter.backoff(provider, retry_after)
+            else:
+                logger.warning("%s search failed: HTTP %s", provider or fn.__name__, e.response.status_code)
+            return None
         except Exception:
-            return []
+            return None
+
+    def _retry_after(self, response: httpx.Response, default: float = 30.0) -> float:
+        try:
+            return max(1.0, float(response.headers.get("retry-after", default)))
+        except (TypeError, ValueError):
+            return default
 
     # -------------------------------------------------
     # Ranking + Deduplication
@@ -91,19 +262,70 @@ class PaperAggregatorService:
             reverse=True,
         )
 
-        out: List[PaperItem] = []
-        for p in ranked:
+        return self._finalize(ranked[:limit])
+
+    def _provider_limit(self, limit: int) -> int:
+        return max(3, math.ceil(limit * _PROVIDER_FETCH_RATIO))
+
+    async def _centrality(self, papers: List[PaperItem]) -> Dict[str, float]:
+        """PageRank percentiles of the candidates already in the paper graph."""
+        if _RERANK_W_CENTRALITY <= 0 or len(papers) < 2:
+            return {}
+        try:
+            return await self.centrality.percentiles([p.paper_uid for p in papers])
+        except Exception:
+            logger.exception("Failed to load paper centrality")
+            return {}
+
+    def _rerank(
+        self, papers: List[PaperItem], text: str, centrality: Dict[str, float] | None = None
+    ) -> List[PaperItem]:
+        if len(papers) < 2:
+            return papers
+
+        idf = getattr(self.vectorizer_service, "token_idf", None)
+        default_idf = getattr(self.vectorizer_service, "default_idf", 1.0)
+        docs = [
+            tokenize(f"{p.title} {p.abstract if p.abstract != 'NOT_AVAILABLE' else ''}")
+            for p in papers
+        ]
+        bm25 = bm25_scores(tokenize(text), docs, idf=idf, default_idf=default_idf)
+        top = float(bm25.max()) if bm25.size else 0.0
+        if top > 0:
+            bm25 = bm25 / top
+
+        provider = np.array(
+            [self.PROVIDER_WEIGHT.get(p.source, 0.0) for p in papers], dtype=np.float32
+        )
+        this_year = now_ist().year
+        age = np.array(
+            [this_year - p.year if p.year else _RERANK_RECENCY_YEARS for p in papers],
+            dtype=np.float32,
+        )
+        recency = 1.0 - np.clip(age, 0, _RERANK_RECENCY_YEARS) / _RERANK_RECENCY_YEARS
+
+        central = np.array(
+            [(centrality or {}).get(p.paper_uid, 0.0) for p in papers], dtype=np.float32
+        )
+
+        score = (
+            _RERANK_W_BM25 * bm25
+            + _RERANK_W_PROVIDER * provider
+            + _RERANK_W_RECENCY * recency
+            + _RERANK_W_CENTRALITY * central
+        )
+        # stable: ties keep the provider-weight order from _dedupe_and_rank
+        order = np.argsort(-score, kind="stable")
+        return [papers[i] for i in order]
+
+    def _finalize(self, papers: List[PaperItem]) -> List[PaperItem]:
+        for p in papers:
             if not p.url:
                 p.url = google_scholar_search_url(p.title)
 
             # graph-ready stable id
             p.paper_uid = self._paper_uid(p)
-
-            out.append(p)
-            if len(out) >= limit:
-                break
-
-        return out
+        return papers
 
     # -------------------------------------------------
     # Helpers
@@ -130,7 +352,7 @@ class PaperAggregatorService:
 
         r = await client.get(base, params=params)
         r.raise_for_status()
-        data = r.json()
+        data = json_loads(r.content)
 
         out = []
         for p in data.get("data", []):
@@ -149,11 +371,11 @@ class PaperAggregatorService:
         self, client: httpx.AsyncClient, query: str, limit: int
     ) -> List[PaperItem]:
         base = "https://api.openalex.org/works"
-        params = {"search": query, "per_page": limit}
+        params = {"search": query, "per_page": limit, "select": self.OPENALEX_SELECT}
 
         r = await client.get(base, params=params)
         r.raise_for_status()
-        data = r.json()
+        data = json_loads(r.content)
 
         out = []
         for w in data.get("results", []):
@@ -182,11 +404,11 @@ class PaperAggregatorService:
         self, client: httpx.AsyncClient, query: str, limit: int
     ) -> List[PaperItem]:
         base = "https://api.crossref.org/works"
-        params = {"query": query, "rows": limit}
+        params = {"query": query, "rows": limit, "select": self.CROSSREF_SELECT}
 
         r = await client.get(base, params=params)
         r.raise_for_status()
-        data = r.json()
+        data = json_loads(r.content)
 
         out = []
         for it in data.get("message", {}).get("items", []):
@@ -247,13 +469,19 @@ class PaperAggregatorService:
     def _rebuild_openalex_abstract(self, inverted_index: Dict | None) -> str:
         if not inverted_index:
             return ""
-        positions = {}
+        size = 0
+        for pos_list in inverted_index.values():
+            if pos_list:
+                size = max(size, max(pos_list) + 1)
+        if not size:
+            return ""
+        # positions are dense word offsets: fill a preallocated slot array
+        words = [None] * size
         for token, pos_list in inverted_index.items():
             for pos in pos_list or []:
-                positions[pos] = token
-        if not positions:
-            return ""
-        return " ".join(token for _, token in sorted(positions.items()))
+                if pos >= 0:
+                    words[pos] = token
+        return " ".join(w for w in words if w is not None)
 
     def _between(self, text: str, a: str, b: str) -> str:
         try:
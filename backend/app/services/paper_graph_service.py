@@ -1,6 +1,12 @@
 from __future__ import annotations
 
-from datetime import datetime
+import os
+import copy
+import json
+import asyncio
+import hashlib
+import logging
+from datetime import timedelta
 from app.core.time_utils import now_ist
 from typing import List
 
@@ -10,21 +16,171 @@ from app.repositories.graph_repo import GraphRepo
 from app.repositories.query_repo import QueryRepo
 from app.repositories.paper_repo import PaperRepo
 from app.repositories.analytics_repo import AnalyticsRepo
-from app.utils.similarity import cosine_similarity, keyword_overlap_score, year_proximity_score
+from app.repositories.paper_feature_repo import PaperFeatureRepo
+from app.repositories.paper_catalog_repo import PaperCatalogRepo
+from app.repositories.graph_cache_repo import GraphCacheRepo
+from app.schemas.graph import GraphResponse, GraphQueryResponse
+from app.services.graph_centrality_service import GraphCentralityService
+from app.services.graph_adjacency_cache import adjacency_cache, bfs
+from app.utils.graph_layout import force_layout
+from app.utils.graph_scoring import (
+    encode_paper_features,
+    features_from_docs,
+    paper_key,
+    scored_pairs,
+    shared_attribute_pairs,
+)
+
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_GRAPH_ENABLED = os.getenv("GLOBAL_GRAPH_ENABLED", "1") == "1"
+GRAPH_LSH_SCAN_LIMIT = int(os.getenv("GRAPH_LSH_SCAN_LIMIT", "5000"))
+GRAPH_LSH_MAX_CANDIDATES = int(os.getenv("GRAPH_LSH_MAX_CANDIDATES", "300"))
+GRAPH_EDGE_BATCH_SIZE = int(os.getenv("GRAPH_EDGE_BATCH_SIZE", "500"))
+# bump whenever scoring or payload shape changes; old cache rows are ignored
+GRAPH_ALGO_VERSION = 3
+GRAPH_RESPONSE_CACHE_TTL_HOURS = int(os.getenv("GRAPH_RESPONSE_CACHE_TTL_HOURS", "168"))
+GRAPH_SIMPLE_MAX_NODES = int(os.getenv("GRAPH_SIMPLE_MAX_NODES", "2000"))
+
+_LINK_TASKS: set = set()
 
 
 def now_utc():
     return now_ist()
 
 
+async def add_layout(payload: dict, src_key: str, dst_key: str) -> dict:
+    """Add x / y in [0, 1] to the payload's nodes (force layout off the event loop)."""
+    nodes = payload["nodes"]
+    index = {n["id"]: i for i, n in enumerate(nodes)}
+    edges = [
+        (index[e[src_key]], index[e[dst_key]], float(e.get("weight") or 0.0))
+        for e in payload["edges"]
+        if e.get(src_key) in index and e.get(dst_key) in index
+    ]
+    coords = await asyncio.to_thread(force_layout, len(nodes), edges)
+    for node, (x, y) in zip(nodes, coords.tolist()):
+        node["x"], node["y"] = round(x, 4), round(y, 4)
+    return payload
+
+
 class PaperGraphService:
     def __init__(self, db=None):
         self.graph = GraphRepo(db=db)
         self.queries = QueryRepo(db=db)
         self.papers = PaperRepo(db=db)
         self.analytics = AnalyticsRepo(db=db)
+        self.features = PaperFeatureRepo(db=db)
+        self.catalog = PaperCatalogRepo(db=db)
+        self.cache = GraphCacheRepo(db=db)
+        self.centrality = GraphCentralityService(db=db)
+        self.adjacency = adjacency_cache
         self.threshold = 0.55
 
+    # -------------------------------------------------
+    # Cached per-query graphs
+    # -------------------------------------------------
+    async def query_graph(self, user_id: str, query_id: str, layout: bool = False) -> tuple[dict, str]:
+        """(payload, etag) of build_from_query(), memoized in graph_cache."""
+        if layout:
+            build = self._laid_out(self.query_graph, "from", "to")
+            return await self._cached(user_id, query_id, "query:layout", build, GraphResponse)
+        return await self._cached(user_id, query_id, "query", self.build_from_query, GraphResponse)
+
+    async def simple_graph(self, user_id: str, query_id: str, layout: bool = False) -> tuple[dict, str]:
+        """(payload, etag) of build_simple(), memoized in graph_cache."""
+        if layout:
+            build = self._laid_out(self.simple_graph, "source", "target")
+            return await self._cached(user_id, query_id, "simple:layout", build, GraphQueryResponse)
+        return await self._cached(user_id, query_id, "simple", self.build_simple, GraphQueryResponse)
+
+    @staticmethod
+    def _laid_out(cached_graph, src_key: str, dst_key: str):
+        """
+        Builder for the layout variant: lays out a copy of the (cached) plain
+        payload, so the plain graph is never rebuilt for it.
+        """
+
+        async def _build(user_id: str, query_id: str) -> dict:
+            payload, _ = await cached_graph(user_id, query_id)
+            return await add_layout(copy.deepcopy(payload), src_key, dst_key)
+
+        return _build
+
+    async def _cached(self, user_id: str, query_id: str, kind: str, build, model) -> tuple[dict, str]:
+        """
+        A hit is one indexed read and no writes: edge upserts and the
+        graph_built event only happen when the payload is (re)built.
+        """
+        if not ObjectId.is_valid(query_id):
+            raise ValueError("Invalid query id")
+        key = GraphCacheRepo.key(user_id, query_id, kind, GRAPH_ALGO_VERSION)
+        hit = await self.cache.get(key)
+        if hit:
+            return hit["payload"], hit["etag"]
+
+        payload = model.model_validate(await build(user_id, query_id)).model_dump(by_alias=True)
+        body = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        await self.cache.save(
+            key,
+            ObjectId(user_id),
+            ObjectId(query_id),
+            kind,
+            payload,
+            etag,
+            now_utc() + timedelta(hours=GRAPH_RESPONSE_CACHE_TTL_HOURS),
+        )
+        return payload, etag
+
+    async def invalidate(self, user_id: str, query_id: str | None = None):
+        """Drop cached graphs for a user's query (or all of them)."""
+        qid = ObjectId(query_id) if query_id else None
+        return await self.cache.invalidate(ObjectId(user_id), qid)
+
+    async def build_simple(self, user_id: str, query_id: str) -> dict:
+        """Co-author / same-venue / adjacent-year graph over a query's papers."""
+        if not ObjectId.is_valid(query_id):
+            raise ValueError("Invalid query id")
+        doc = await self.queries.get_by_id(ObjectId(query_id), ObjectId(user_id))
+        if not doc:
+            raise ValueError("Query not found")
+
+        papers = doc.get("papers") or []
+        nodes = []
+        seen = set()
+        for p in papers:
+            uid = p.get("paper_uid")
+            if not uid or uid in seen:
+                continue
+            seen.add(uid)
+            nodes.append(
+                {
+                    "id": uid,
+                    "title": p.get("title") or "Untitled",
+                    "year": p.get("year"),
+                    "venue": p.get("venue"),
+                    "authors": p.get("authors"),
+                    "source": p.get("source"),
+                    "url": p.get("url"),
+                }
+            )
+            if len(nodes) >= GRAPH_SIMPLE_MAX_NODES:
+                break
+        nodes = GraphQueryResponse(nodes=nodes, edges=[]).model_dump()["nodes"]
+
+        pairs = shared_attribute_pairs(
+            [{x.strip().lower() for x in (n["authors"] or []) if x and str(x).strip()} for n in nodes],
+            [(n["venue"] or "").strip().lower() for n in nodes],
+            [n["year"] for n in nodes],
+        )
+        edges = [
+            {"source": nodes[i]["id"], "target": nodes[j]["id"], "weight": weight, "type": "similarity"}
+            for (i, j), weight in sorted(pairs.items())
+        ]
+        return {"nodes": nodes, "edges": edges}
+
     async def build_from_query(self, user_id: str, query_id: str):
         if not ObjectId.is_valid(query_id):
             raise ValueError("Invalid query id")
@@ -33,7 +189,8 @@ class PaperGraphService:
             raise ValueError("Query not found")
 
         papers = q.get("papers") or []
-        edges = self._build_edges(papers)
+        items = [p for p in (self._normalize_paper(p) for p in papers) if p["paper_id"]]
+        edges = self._edges_from_features(items, await self._load_features(items))
         await self.graph.bulk_insert(edges)
 
         nodes, edges_out = await self._graph_output(papers, edges, user_id=user_id)
@@ -44,8 +201,68 @@ class PaperGraphService:
         )
         return {"nodes": nodes, "edges": edges_out}
 
+    # -------------------------------------------------
+    # Global graph (incremental)
+    # -------------------------------------------------
+    async def link_papers(self, papers: List[dict]) -> int:
+        """
+        Adds newly saved papers to the global graph: LSH candidates from
+        paper_features are scored against the new papers (and each other)
+        and the edges upserted in batches. Returns the number of pairs linked.
+        """
+        items, seen = [], set()
+        for p in papers:
+            item = self._normalize_paper(p)
+            if item["paper_id"] and item["paper_id"] not in seen:
+                seen.add(item["paper_id"])
+                items.append(item)
+        if not items:
+            return 0
+
+        docs = [encode_paper_features(p) for p in items]
+        buckets = sorted({b for d in docs for b in d.get("lsh") or []})
+        candidates = await self.features.candidates(
+            buckets,
+            exclude=list(seen),
+            scan_limit=GRAPH_LSH_SCAN_LIMIT,
+            limit=GRAPH_LSH_MAX_CANDIDATES,
+        )
+        ids = [p["paper_id"] for p in items] + [c["_id"] for c in candidates]
+        pairs = [
+            (i, j, score, relation)
+            for i, j, score, relation in scored_pairs(features_from_docs(docs + candidates), self.threshold)
+            if i < len(items)
+        ]
+
+        now = now_utc()
+        edges = []
+        for i, j, score, relation in pairs:
+            for a, b in ((ids[i], ids[j]), (ids[j], ids[i])):
+                edges.append(
+                    {"paper_id": a, "related_paper_id": b, "relation_type": relation, "weight": score, "created_at": now}
+                )
+        for k in range(0, len(edges), GRAPH_EDGE_BATCH_SIZE):
+            await self.graph.bulk_insert(edges[k : k + GRAPH_EDGE_BATCH_SIZE])
+        return len(pairs)
+
+    def schedule_link(self, papers: List[dict]) -> None:
+        """Runs link_papers() in the background (off the request path)."""
+        if not GLOBAL_GRAPH_ENABLED or not papers:
+            return
+
+        async def _run():
+            try:
+                await self.link_papers(papers)
+            except Exception:
+                logger.exception("Failed to link papers into the global graph")
+
+        task = asyncio.create_task(_run())
+        _LINK_TASKS.add(task)
+        task.add_done_callback(_LINK_TASKS.discard)
+
     async def get_graph_for_paper(self, user_id: str, paper_id: str, limit: int = 50):
-        related = await self.graph.get_related(paper_id, limit=limit)
+        related = await self.graph.get_related(paper_id, limit=limit * 2)
+        related = await self.centrality.rerank(related, limit=limit)
         paper_uids = [paper_id] + [r.get("related_paper_id") for r in related if r.get("related_paper_id")]
         titles = await self._resolve_titles(ObjectId(user_id), paper_uids)
 
@@ -64,6 +281,52 @@ class PaperGraphService:
         ]
         return {"nodes": nodes, "edges": edges}
 
+    async def expand(
+        self,
+        user_id: str,
+        paper_id: str,
+        depth: int = 2,
+        fan_out: int = 10,
+        min_weight: float = 0.0,
+        max_nodes: int = 200,
+        layout: bool = False,
+    ):
+        """
+        k-hop neighbourhood of a paper: BFS over the in-process adjacency
+        cache, or over a hop-by-hop database fetch when the cache cannot
+        answer. `layout=True` adds x / y to the nodes.
+        """
+        if await self.adjacency.ensure_fresh() and self.adjacency.knows(paper_id):
+            neighbors, source = self.adjacency.neighbors, "cache"
+        else:
+            rows = await self.graph.neighborhood(
+                paper_id, depth=depth, min_weight=min_weight, fan_out=fan_out, limit=max_nodes
+            )
+            adj: dict = {}
+            for r in rows:
+                row = adj.setdefault(r["paper_id"], {})
+                w = float(r.get("weight") or 0.0)
+                if r["related_paper_id"] not in row or w > row[r["related_paper_id"]][0]:
+                    row[r["related_paper_id"]] = (w, r.get("relation_type"))
+            ranked = {
+                k: sorted(((o, w, rel) for o, (w, rel) in v.items()), key=lambda x: -x[1]) for k, v in adj.items()
+            }
+            neighbors, source = (lambda node: ranked.get(node, [])), "database"
+
+        hops, edges = bfs(neighbors, paper_id, depth, fan_out, min_weight, max_nodes)
+        titles = await self._resolve_titles(ObjectId(user_id), list(hops))
+        missing = [pid for pid in hops if not titles.get(pid)]
+        if missing:
+            titles.update({k: v for k, v in (await self.catalog.titles_by_uid(missing)).items() if v})
+        nodes = [
+            {"id": pid, "label": titles.get(pid) or pid, "type": "paper", "depth": hop}
+            for pid, hop in hops.items()
+        ]
+        payload = {"nodes": nodes, "edges": edges, "source": source}
+        if layout:
+            return await add_layout(payload, "from", "to")
+        return payload
+
     async def get_neighbors(self, paper_id: str, limit: int = 20):
         related = await self.graph.get_related(paper_id, limit=limit)
         return [
@@ -76,56 +339,35 @@ class PaperGraphService:
             for r in related
         ]
 
-    def _build_edges(self, papers: List[dict]) -> List[dict]:
-        items = [self._normalize_paper(p) for p in papers]
-        items = [p for p in items if p["paper_id"]]
+    async def _load_features(self, items: List[dict]) -> dict:
+        """Stored features for the papers (computed at ingest); backfills any missing."""
+        stored = await self.features.get_many([p["paper_id"] for p in items])
+        missing = [p for p in items if p["paper_id"] not in stored]
+        if missing:
+            await self.features.upsert_many(missing)
+            for p in missing:
+                stored[p["paper_id"]] = encode_paper_features(p)
+        return features_from_docs([stored[p["paper_id"]] for p in items])
+
+    def _edges_from_features(self, items: List[dict], features: dict) -> List[dict]:
         edges = []
-        for i in range(len(items)):
-            for j in range(i + 1, len(items)):
-                score, relation = self._score(items[i], items[j])
-                if score >= self.threshold:
-                    edges.append(
-                        {
-                            "paper_id": items[i]["paper_id"],
-                            "related_paper_id": items[j]["paper_id"],
-                            "relation_type": relation,
-                            "weight": score,
-                            "created_at": now_utc(),
-                        }
-                    )
-                    edges.append(
-                        {
-                            "paper_id": items[j]["paper_id"],
-                            "related_paper_id": items[i]["paper_id"],
-                            "relation_type": relation,
-                            "weight": score,
-                            "created_at": now_utc(),
-                        }
-                    )
+        now = now_utc()
+        for i, j, score, relation in scored_pairs(features, self.threshold):
+            for a, b in ((items[i], items[j]), (items[j], items[i])):
+                edges.append(
+                    {
+                        "paper_id": a["paper_id"],
+                        "related_paper_id": b["paper_id"],
+                        "relation_type": relation,
+                        "weight": score,
+                        "created_at": now,
+                    }
+                )
         return edges
 
-    def _score(self, a: dict, b: dict) -> tuple[float, str]:
-        text_a = f"{a.get('title','')} {a.get('abstract','')}"
-        text_b = f"{b.get('title','')} {b.get('abstract','')}"
-        keyword = keyword_overlap_score(text_a, text_b)
-        embed = cosine_similarity(self._hash_vec(text_a), self._hash_vec(text_b))
-        author = self._author_overlap(a.get("authors"), b.get("authors"))
-        year = year_proximity_score(a.get("year"), b.get("year"))
-
-        score = (
-            0.35 * keyword
-            + 0.35 * embed
-            + 0.2 * author
-            + 0.1 * year
-        )
-        relation = self._dominant_relation(
-            {"similarity": embed, "same_subject": keyword, "author_overlap": author}
-        )
-        return round(score, 4), relation
-
     def _normalize_paper(self, paper: dict) -> dict:
         return {
-            "paper_id": paper.get("paper_uid") or paper.get("paper_id") or paper.get("url") or paper.get("id"),
+            "paper_id": paper_key(paper),
             "title": paper.get("title") or "",
             "abstract": paper.get("abstract") or "",
             "authors": paper.get("authors") or [],
@@ -133,28 +375,6 @@ class PaperGraphService:
             "subject": paper.get("subject_area"),
         }
 
-    def _hash_vec(self, text: str, dim: int = 256) -> List[float]:
-        import hashlib
-        vec = [0.0] * dim
-        for token in (text or "").lower().split():
-            digest = hashlib.md5(token.encode("utf-8")).hexdigest()
-            idx = int(digest[:8], 16) % dim
-            vec[idx] += 1.0
-        return vec
-
-    def _author_overlap(self, a, b) -> float:
-        if not a or not b:
-            return 0.0
-        a_set = set([x.strip().lower() for x in a if x])
-        b_set = set([x.strip().lower() for x in b if x])
-        if not a_set or not b_set:
-            return 0.0
-        return len(a_set & b_set) / max(1, len(a_set | b_set))
-
-    def _dominant_relation(self, scores: dict) -> str:
-        rel = max(scores.items(), key=lambda x: x[1])[0]
-        return rel
-
     async def _resolve_titles(self, user_id: ObjectId, paper_uids: list) -> dict:
         title_map = {}
         rows = await self.papers.list_by_paper_uids(user_id, paper_uids)
@@ -0,0 +1,88 @@
+# app/services/paper_prefetch_service.py
+import os
+import logging
+from datetime import timedelta
+
+from app.core.time_utils import now_ist
+from app.repositories.query_repo import QueryRepo
+from app.repositories.paper_catalog_repo import PaperCatalogRepo
+from app.services.paper_aggregator_service import PaperAggregatorService
+from app.services.outbound_rate_limiter import PRIORITY_BACKGROUND
+
+logger = logging.getLogger(__name__)
+
+_PREFETCH_RANGE_DAYS = int(os.getenv("PAPER_PREFETCH_RANGE_DAYS", "7"))
+_PREFETCH_TOP_SUBJECTS = int(os.getenv("PAPER_PREFETCH_TOP_SUBJECTS", "6"))
+_PREFETCH_TOP_QUERIES = int(os.getenv("PAPER_PREFETCH_TOP_QUERIES", "10"))
+_PREFETCH_REQUEST_BUDGET = int(os.getenv("PAPER_PREFETCH_REQUEST_BUDGET", "40"))
+
+
+class PaperPrefetchService:
+    """
+    Warms paper caches for popular searches.
+
+    Each run refreshes provider results for the top subject areas and the
+    most frequently repeated query texts of the recent window, spending at
+    most `request_budget` outbound provider requests:
+      - subject searches are upserted into the local paper catalog
+      - frequent queries are refreshed under the exact key run_query uses,
+        so repeats are served from the aggregator result cache
+    """
+
+    REQUESTS_PER_SEARCH = len(PaperAggregatorService.PROVIDER_WEIGHT)
+
+    def __init__(self, paper_search: PaperAggregatorService, db=None):
+        self.paper_search = paper_search
+        self.queries = QueryRepo(db=db)
+        self.catalog = PaperCatalogRepo(db=db)
+
+    async def run_once(self, request_budget: int | None = None) -> dict:
+        budget = _PREFETCH_REQUEST_BUDGET if request_budget is None else request_budget
+        since = now_ist() - timedelta(days=_PREFETCH_RANGE_DAYS)
+
+        plan = []
+        for s in await self.queries.top_subjects_since(since, limit=_PREFETCH_TOP_SUBJECTS):
+            plan.append({"subject": s["subject"], "query": s["subject"], "rerank_text": None})
+        for q in await self.queries.frequent_texts_since(since, limit=_PREFETCH_TOP_QUERIES):
+            text = (q["text"] or "").strip()
+            plan.append(
+                {
+                    "subject": q["subject"],
+                    # must match AssistantService.run_query's search call
+                    "query": f"{q['subject']} {text[:250]}",
+                    "rerank_text": text[:2000],
+                }
+            )
+
+        spent = 0
+        searches = 0
+        papers_total = 0
+        for item in plan:
+            if spent + self.REQUESTS_PER_SEARCH > budget:
+                break
+            spent += self.REQUESTS_PER_SEARCH
+            try:
+                papers = await self.paper_search.search_all(
+                    query=item["query"],
+                    limit=10,
+                    rerank_text=item["rerank_text"],
+                    refresh=True,
+                    priority=PRIORITY_BACKGROUND,
+                )
+            except Exception:
+                logger.exception("Prefetch failed for %r", item["query"][:80])
+                continue
+            searches += 1
+            papers_total += len(papers)
+            if papers and item["rerank_text"] is None:
+                await self.catalog.upsert_papers(
+                    [p.model_dump() for p in papers],
+                    subject_area=item["subject"],
+                    fetched_keys=self.paper_search.fetched_keys(papers),
+                )
+
+        logger.info(
+            "Paper prefetch: %s/%s searches, %s requests, %s papers",
+            searches, len(plan), spent, papers_total,
+        )
+        return {"planned": len(plan), "searches": searches, "requests": spent, "papers": papers_total}
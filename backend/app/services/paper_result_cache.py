@@ -0,0 +1,66 @@
+# app/services/paper_result_cache.py
+"""
+Cache of raw provider candidates for PaperAggregatorService.
+
+Entries are keyed by the normalized provider query and per-provider limit,
+so the same candidates can be re-ranked against different user texts.
+Uses Redis when REDIS_URL is set (shared across workers), else process memory.
+"""
+import os
+import time
+import hashlib
+import logging
+try:
+    import redis.asyncio as redis
+except Exception:  # pragma: no cover
+    redis = None
+
+from app.utils.fast_json import loads as json_loads, dumps as json_dumps
+
+logger = logging.getLogger(__name__)
+
+_CACHE: dict[str, dict] = {}
+_CACHE_TTL = int(os.getenv("PAPER_CACHE_TTL_SECONDS", "21600"))
+# results missing a skipped / failed provider: cached only briefly
+PARTIAL_CACHE_TTL = int(os.getenv("PAPER_CACHE_PARTIAL_TTL_SECONDS", "120"))
+_CACHE_MAX_ENTRIES = int(os.getenv("PAPER_CACHE_MAX_ENTRIES", "2000"))
+_REDIS = None
+_REDIS_URL = os.getenv("REDIS_URL", "").strip()
+if _REDIS_URL and redis:
+    _REDIS = redis.from_url(_REDIS_URL, decode_responses=True)
+
+
+def _key(query: str, limit: int) -> str:
+    normalized = " ".join((query or "").lower().split())
+    digest = hashlib.sha1(f"{normalized}|{limit}".encode("utf-8")).hexdigest()
+    return f"papers:{digest}"
+
+
+async def get_cached(query: str, limit: int) -> list[dict] | None:
+    key = _key(query, limit)
+    if _REDIS:
+        try:
+            raw = await _REDIS.get(key)
+            return json_loads(raw) if raw else None
+        except Exception:
+            logger.warning("Paper cache read failed", exc_info=True)
+            return None
+    cached = _CACHE.get(key)
+    if cached and time.time() < cached["exp"]:
+        return cached["papers"]
+    return None
+
+
+async def set_cached(query: str, limit: int, papers: list[dict], ttl: int | None = None) -> None:
+    key = _key(query, limit)
+    ttl = ttl or _CACHE_TTL
+    if _REDIS:
+        try:
+            await _REDIS.set(key, json_dumps(papers), ex=ttl)
+        except Exception:
+            logger.warning("Paper cache write failed", exc_info=True)
+        return
+    if len(_CACHE) >= _CACHE_MAX_ENTRIES and key not in _CACHE:
+        # dicts keep insertion order: drop the oldest entry
+        _CACHE.pop(next(iter(_CACHE)), None)
+    _CACHE[key] = {"papers": papers, "exp": time.time() + ttl}
@@ -4,11 +4,16 @@ from bson import ObjectId
 from pymongo.errors import DuplicateKeyError
 
 from app.repositories.paper_repo import PaperRepo
+from app.repositories.paper_catalog_repo import PaperCatalogRepo
+from app.repositories.paper_feature_repo import PaperFeatureRepo
+from app.db.write_behind import write_behind
 
 
 class PaperService:
     def __init__(self, db=None):
         self.papers = PaperRepo(db=db)
+        self.catalog = PaperCatalogRepo(db=db)
+        self.features = PaperFeatureRepo(db=db)
 
     async def list_saved(self, user_id: str, limit: int, skip: int = 0):
         uid = ObjectId(str(user_id))
@@ -59,7 +64,16 @@ class PaperService:
         query_created_at: datetime,
         subject_area: str | None,
         papers: list[dict],
+        defer: bool = False,
+        fetched_keys: set[str] | None = None,
     ):
+        """
+        Store one row per result paper, refresh the shared catalog and
+        precompute the papers' graph features (paper_features).
+        With `defer=True` all writes go through the write-behind queue.
+        `fetched_keys` (catalog keys of provider results) refresh the
+        catalog's fetched_at.
+        """
         uid = ObjectId(str(user_id))
         qid = ObjectId(str(query_id))
         now = now_ist()
@@ -87,8 +101,19 @@ class PaperService:
                     "created_at": now,
                 }
             )
-        if docs:
-            await self.papers.insert_many(docs)
+        if not docs:
+            return docs
+        if defer:
+            for d in docs:
+                await write_behind.insert(self.papers.collection_name, d)
+            for f, u in self.catalog.build_upserts(docs, subject_area=subject_area, fetched_keys=fetched_keys):
+                await write_behind.upsert(self.catalog.collection_name, f, u)
+            for f, u in self.features.build_upserts(docs):
+                await write_behind.upsert(self.features.collection_name, f, u)
+            return docs
+        await self.papers.insert_many(docs)
+        await self.catalog.upsert_papers(docs, subject_area=subject_area, fetched_keys=fetched_keys)
+        await self.features.upsert_many(docs)
         return docs
 
     async def list_by_query(self, user_id: str, query_id: str, limit: int = 10):
@@ -1,9 +1,6 @@
-from pypdf import PdfReader
+from app.services.extraction_service import extract_document
 
 
 def extract_text_from_pdf(path: str) -> str:
-    reader = PdfReader(path)
-    chunks = []
-    for page in reader.pages:
-        chunks.append(page.extract_text() or "")
-    return "\n".join(chunks).strip()
+    """Synchronous helper; request paths should use extraction_service."""
+    return extract_document(path, ".pdf")["text"]
@@ -0,0 +1,276 @@
+# app/services/storage_manager.py
+"""
+Upload storage lifecycle.
+
+Files live under a two-level hash-sharded layout per storage area and are
+registered in `upload_blobs`. `storage_ledger` keeps running byte and file
+totals per area, so storage scans no longer walk the directories.
+
+The GC (scheduled from app.main) removes files not used within the
+`data_retention_days` admin setting unless something still references them,
+then sweeps a few shard directories per run for unregistered leftovers
+(legacy flat files, interrupted writes). Deletions are rate limited.
+"""
+import os
+import time
+import asyncio
+import logging
+from datetime import timedelta
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from app.core.time_utils import now_ist
+from app.core.file_serving import remember_etag
+from app.db.mongo import get_db
+from app.repositories.upload_blob_repo import UploadBlobRepo, StorageLedgerRepo
+from app.services.admin_settings_service import AdminSettingsService
+from app.services.file_service import store_upload, shard_dir, name_key
+
+logger = logging.getLogger(__name__)
+
+_APP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STORAGE_AREAS = {
+    "uploads": os.path.join(_APP_DIR, "storage", "uploads"),
+    "feedback": os.path.join(_APP_DIR, "uploads", "feedback"),
+    "compliance": os.path.join(_APP_DIR, "uploads", "compliance"),
+}
+# compliance evidence is never garbage collected
+GC_AREAS = ("uploads", "feedback")
+
+STORAGE_GC_BATCH_SIZE = int(os.getenv("STORAGE_GC_BATCH_SIZE", "200"))
+STORAGE_GC_DELETES_PER_SECOND = float(os.getenv("STORAGE_GC_DELETES_PER_SECOND", "20"))
+STORAGE_GC_SHARDS_PER_RUN = int(os.getenv("STORAGE_GC_SHARDS_PER_RUN", "64"))
+_PART_FILE_GRACE_SECONDS = 3600
+
+
+def now_utc():
+    return now_ist()
+
+
+def _is_shard(name: str) -> bool:
+    return len(name) == 2 and all(c in "0123456789abcdef" for c in name)
+
+
+def _walk_totals(root: str) -> tuple[int, int]:
+    total = files = 0
+    for dirpath, _, names in os.walk(root):
+        for name in names:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+                files += 1
+            except OSError:
+                pass
+    return total, files
+
+
+def _next_shards(root: str, after: str | None, limit: int) -> list[str]:
+    """
+    Up to `limit` shard directories ("ab/cd") after `after`, in order. The
+    area root itself ("") comes first so legacy flat files are swept too.
+    """
+    out = []
+    if after is None:
+        out.append("")
+    if not os.path.isdir(root):
+        return out
+    for top in sorted(n for n in os.listdir(root) if _is_shard(n)):
+        if after and top < after[:2]:
+            continue
+        top_dir = os.path.join(root, top)
+        if not os.path.isdir(top_dir):
+            continue
+        for sub in sorted(n for n in os.listdir(top_dir) if _is_shard(n)):
+            rel = f"{top}/{sub}"
+            if after and rel <= after:
+                continue
+            out.append(rel)
+            if len(out) >= limit:
+                return out
+    return out
+
+
+def _list_files(root: str, shard: str) -> list[tuple[str, int, float]]:
+    """(relative path, size, mtime) of the files directly in a shard."""
+    base = os.path.join(root, shard) if shard else root
+    out = []
+    try:
+        entries = list(os.scandir(base))
+    except FileNotFoundError:
+        return out
+    for entry in entries:
+        if entry.is_file():
+            st = entry.stat()
+            rel = f"{shard}/{entry.name}" if shard else entry.name
+            out.append((rel, st.st_size, st.st_mtime))
+    return out
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class StorageManager:
+    def __init__(self, db=None, settings_service=None):
+        self._db = db
+        self.blobs = UploadBlobRepo(db=db)
+        self.ledger = StorageLedgerRepo(db=db)
+        self.settings = settings_service or AdminSettingsService(db=db)
+
+    @property
+    def db(self):
+        return self._db if self._db is not None else get_db()
+
+    # -------------------------------------------------
+    # Store / resolve
+    # -------------------------------------------------
+    async def store(
+        self,
+        file: UploadFile,
+        area: str,
+        max_bytes: int | None = None,
+        filename: str | None = None,
+        content_addressed: bool = False,
+    ) -> dict:
+        """store_upload() into the area's sharded layout, registered and ledgered."""
+        root = STORAGE_AREAS[area]
+        stored = await store_upload(
+            file,
+            root,
+            filename=filename,
+            max_bytes=max_bytes,
+            content_addressed=content_addressed,
+            sharded=True,
+        )
+        rel_path = os.path.relpath(stored["path"], root).replace(os.sep, "/")
+        previous = await self.blobs.register(area, rel_path, stored["sha256"], stored["size"])
+        if previous is None:
+            await self.ledger.add(area, stored["size"], 1)
+        elif int(previous.get("size") or 0) != stored["size"]:
+            await self.ledger.add(area, stored["size"] - int(previous.get("size") or 0), 0)
+        remember_etag(stored["path"], stored["sha256"])
+        stored["rel_path"] = rel_path
+        return stored
+
+    def resolve(self, area: str, filename: str) -> str | None:
+        """Path of a named file (sharded layout first, then the legacy flat one)."""
+        root = STORAGE_AREAS[area]
+        filename = os.path.basename(filename)
+        for path in (
+            os.path.join(shard_dir(root, name_key(filename)), filename),
+            os.path.join(root, filename),
+        ):
+            if os.path.isfile(path):
+                return path
+        return None
+
+    # -------------------------------------------------
+    # Ledger
+    # -------------------------------------------------
+    async def ensure_baselines(self) -> None:
+        """One-time directory walk per area to seed the ledger."""
+        docs = {d["_id"]: d for d in await self.ledger.all()}
+        for area, root in STORAGE_AREAS.items():
+            if docs.get(area, {}).get("baseline_at"):
+                continue
+            total, files = await run_in_threadpool(_walk_totals, root)
+            await self.ledger.set_baseline(area, total, files)
+
+    async def usage(self) -> dict:
+        docs = {d["_id"]: d for d in await self.ledger.all()}
+        areas = {
+            area: {
+                "bytes": int(docs.get(area, {}).get("bytes") or 0),
+                "files": int(docs.get(area, {}).get("files") or 0),
+            }
+            for area in STORAGE_AREAS
+        }
+        return {
+            "bytes": sum(a["bytes"] for a in areas.values()),
+            "files": sum(a["files"] for a in areas.values()),
+            "areas": areas,
+        }
+
+    # -------------------------------------------------
+    # GC
+    # -------------------------------------------------
+    async def _referenced(self, area: str, rel_path: str) -> bool:
+        if area == "uploads":
+            path = os.path.join(STORAGE_AREAS[area], rel_path)
+            job = await self.db["assistant_jobs"].find_one(
+                {"file_path": path, "status": {"$in": ["queued", "running"]}}, {"_id": 1}
+            )
+            return job is not None
+        if area == "feedback":
+            name = rel_path.rsplit("/", 1)[-1]
+            doc = await self.db["feedback"].find_one(
+                {"attachments": {"$in": [name, f"/feedback/attachments/{name}"]}}, {"_id": 1}
+            )
+            return doc is not None
+        return True
+
+    async def _delete(self, area: str, rel_path: str, size: int, registered: bool) -> None:
+        await run_in_threadpool(_remove, os.path.join(STORAGE_AREAS[area], rel_path))
+        if registered:
+            await self.blobs.remove(area, rel_path)
+        await self.ledger.add(area, -int(size or 0), -1)
+        await asyncio.sleep(1.0 / max(STORAGE_GC_DELETES_PER_SECOND, 0.1))
+
+    async def run_gc(self, max_deletes: int | None = None) -> dict:
+        budget = max_deletes or STORAGE_GC_BATCH_SIZE
+        stats = {"expired": 0, "orphans": 0, "bytes": 0, "retention_days": None}
+        await self.ensure_baselines()
+
+        settings = await self.settings.get_settings()
+        days = int(settings.get("data_retention_days") or 0)
+        stats["retention_days"] = days
+        cutoff = now_utc() - timedelta(days=days) if days > 0 else None
+
+        # 1) registered files past retention
+        if cutoff is not None:
+            for area in GC_AREAS:
+                for blob in await self.blobs.expired(area, cutoff, budget):
+                    if budget <= 0:
+                        break
+                    if await self._referenced(area, blob["rel_path"]):
+                        await self.blobs.touch(area, blob["rel_path"])
+                        continue
+                    await self._delete(area, blob["rel_path"], blob.get("size"), registered=True)
+                    stats["expired"] += 1
+                    stats["bytes"] += int(blob.get("size") or 0)
+                    budget -= 1
+
+        # 2) unregistered files, a few shards per run
+        now_ts = time.time()
+        cutoff_ts = cutoff.timestamp() if cutoff is not None else None
+        ledger = {d["_id"]: d for d in await self.ledger.all()}
+        for area in GC_AREAS:
+            root = STORAGE_AREAS[area]
+            cursor = ledger.get(area, {}).get("gc_cursor")
+            shards = await run_in_threadpool(_next_shards, root, cursor, STORAGE_GC_SHARDS_PER_RUN)
+            for shard in shards:
+                if budget <= 0:
+                    break
+                files = await run_in_threadpool(_list_files, root, shard)
+                known = await self.blobs.known_paths(area, [f[0] for f in files])
+                for rel_path, size, mtime in files:
+                    if budget <= 0 or rel_path in known:
+                        continue
+                    if rel_path.endswith(".part"):
+                        if now_ts - mtime < _PART_FILE_GRACE_SECONDS:
+                            continue
+                    elif cutoff_ts is None or mtime >= cutoff_ts or await self._referenced(area, rel_path):
+                        continue
+                    await self._delete(area, rel_path, size, registered=False)
+                    stats["orphans"] += 1
+                    stats["bytes"] += int(size)
+                    budget -= 1
+                if budget > 0:
+                    cursor = shard
+            # wrap around once the last shard was swept
+            if budget > 0 and len(shards) < STORAGE_GC_SHARDS_PER_RUN:
+                cursor = None
+            await self.ledger.set_cursor(area, cursor)
+        return stats
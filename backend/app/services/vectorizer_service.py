@@ -10,6 +10,9 @@ class VectorizerService:
     def __init__(self, artifacts_dir: str):
         self.artifacts_dir = artifacts_dir
         self.vectorizer: TextVectorization | None = None
+        # unigram -> idf, reused by the paper re-ranker (BM25)
+        self.token_idf: dict[str, float] | None = None
+        self.default_idf: float = 1.0
 
     def load(self) -> None:
         config_path = os.path.join(self.artifacts_dir, "text_vectorizer_config.pkl")
@@ -52,6 +55,14 @@ class VectorizerService:
         tv.set_vocabulary(vocab_list, idf_weights=idf_weights)
         self.vectorizer = tv
 
+        self.token_idf = {
+            str(tok): float(w)
+            for tok, w in zip(vocab_list, idf_weights)
+            if isinstance(tok, str) and " " not in tok and tok != "[UNK]"
+        }
+        # Keras assigns the mean idf to out-of-vocabulary tokens
+        self.default_idf = float(idf_weights.mean()) if idf_weights.size else 1.0
+
     def transform(self, texts: list[str]) -> tf.Tensor:
         if self.vectorizer is None:
             raise RuntimeError("Vectorizer not loaded")
@@ -0,0 +1,23 @@
+# app/utils/fast_json.py
+import json
+
+try:
+    import orjson
+except Exception:  # pragma: no cover
+    orjson = None
+
+
+def loads(data: bytes | str):
+    """
+    Decode JSON with orjson when installed (parses bytes directly, no
+    intermediate str), falling back to the stdlib decoder.
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj) -> str:
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
@@ -0,0 +1,256 @@
+# app/utils/graph_scoring.py
+"""
+Batch edge scoring for the paper graph.
+
+Scores every pair of a batch at once:
+
+    0.35 * keyword Jaccard + 0.35 * hash-embedding cosine
+    + 0.2 * author Jaccard + 0.1 * year proximity
+
+Each paper is tokenized and hashed once. The cosine matrix is one product
+of the row-normalized hash matrix; Jaccard intersections come from a 0/1
+incidence matrix restricted to the terms shared by at least two papers (the
+only ones that can intersect), so its width stays small.
+
+Per-paper features are computed once at ingest (encode_paper_features) and
+stored compactly in `paper_features`: the hash vector as float16 bytes and
+the keyword / author sets as sorted 64-bit term hashes. They also carry
+LSH bucket keys (random-hyperplane signatures of the hash vector, split
+into bands) used to find candidate neighbours for the global graph.
+"""
+import os
+import hashlib
+from functools import lru_cache
+from typing import Iterable, List, Sequence
+
+import numpy as np
+
+HASH_DIM = 256
+# bump when the stored feature encoding changes
+FEATURE_VERSION = 2
+LSH_BANDS = int(os.getenv("GRAPH_LSH_BANDS", "20"))
+LSH_ROWS = int(os.getenv("GRAPH_LSH_ROWS", "10"))
+_LSH_SEED = 1729
+_LSH_PLANES = None
+WEIGHTS = {"keyword": 0.35, "embed": 0.35, "author": 0.2, "year": 0.1}
+# argmax order: ties go to the first relation listed
+RELATIONS = ("similarity", "same_subject", "author_overlap")
+
+
+@lru_cache(maxsize=200_000)
+def hash_index(token: str, dim: int = HASH_DIM) -> int:
+    digest = hashlib.md5(token.encode("utf-8")).hexdigest()
+    return int(digest[:8], 16) % dim
+
+
+def paper_text(paper: dict) -> str:
+    return f"{paper.get('title','')} {paper.get('abstract','')}"
+
+
+def hash_vector(text: str, dim: int = HASH_DIM) -> np.ndarray:
+    vec = np.zeros(dim, dtype=np.float32)
+    tokens = (text or "").lower().split()
+    if tokens:
+        np.add.at(vec, [hash_index(t, dim) for t in tokens], 1.0)
+    return vec
+
+
+def keyword_set(text: str) -> set:
+    return {t for t in (text or "").lower().split() if len(t) > 2}
+
+
+def author_set(authors) -> set:
+    return {str(x).strip().lower() for x in (authors or []) if x}
+
+
+def year_value(year) -> float:
+    try:
+        return float(int(year)) if year else np.nan
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def lsh_buckets(vector: np.ndarray) -> list[str]:
+    """
+    "<band>:<hex>" keys; two papers share a band key with probability
+    (1 - angle / pi) ** LSH_ROWS, so high-cosine pairs collide in some band.
+    """
+    global _LSH_PLANES
+    vector = np.asarray(vector, dtype=np.float32)
+    if not vector.any():
+        return []
+    if _LSH_PLANES is None:
+        rng = np.random.default_rng(_LSH_SEED)
+        _LSH_PLANES = rng.standard_normal((HASH_DIM, LSH_BANDS * LSH_ROWS)).astype(np.float32)
+    bits = (vector @ _LSH_PLANES > 0).reshape(LSH_BANDS, LSH_ROWS)
+    values = bits.astype(np.int64) @ (1 << np.arange(LSH_ROWS, dtype=np.int64))
+    return [f"{band}:{int(v):x}" for band, v in enumerate(values)]
+
+
+def cosine_matrix(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float64)
+    norms = np.linalg.norm(vectors, axis=1)
+    unit = np.divide(vectors, norms[:, None], out=np.zeros_like(vectors), where=norms[:, None] > 0)
+    return unit @ unit.T
+
+
+def jaccard_matrix(sets: Sequence[set]) -> np.ndarray:
+    """Pairwise |A & B| / |A | B| (0 when either set is empty)."""
+    n = len(sets)
+    sizes = np.array([len(s) for s in sets], dtype=np.float64)
+    df: dict = {}
+    for s in sets:
+        for term in s:
+            df[term] = df.get(term, 0) + 1
+    shared = {term: k for k, term in enumerate(t for t, c in df.items() if c > 1)}
+
+    inter = np.zeros((n, n), dtype=np.float64)
+    if shared:
+        incidence = np.zeros((n, len(shared)), dtype=np.float32)
+        for i, s in enumerate(sets):
+            cols = [shared[t] for t in s if t in shared]
+            incidence[i, cols] = 1.0
+        inter = (incidence @ incidence.T).astype(np.float64)
+
+    union = sizes[:, None] + sizes[None, :] - inter
+    empty = (sizes[:, None] == 0) | (sizes[None, :] == 0)
+    out = np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    out[empty] = 0.0
+    return out
+
+
+def year_matrix(years: Iterable) -> np.ndarray:
+    y = np.array([year_value(v) for v in years], dtype=np.float64)
+    diff = np.abs(y[:, None] - y[None, :])
+    out = np.clip(1.0 - diff / 10.0, 0.0, 1.0)
+    return np.nan_to_num(out, nan=0.0)
+
+
+def score_matrices(
+    vectors: np.ndarray,
+    keywords: Sequence[set],
+    authors: Sequence[set],
+    years: Iterable,
+) -> tuple[np.ndarray, np.ndarray]:
+    """(combined score matrix, relation index matrix) from per-paper features."""
+    embed = cosine_matrix(vectors)
+    keyword = jaccard_matrix(keywords)
+    author = jaccard_matrix(authors)
+    year = year_matrix(years)
+    score = (
+        WEIGHTS["keyword"] * keyword
+        + WEIGHTS["embed"] * embed
+        + WEIGHTS["author"] * author
+        + WEIGHTS["year"] * year
+    )
+    relation = np.argmax(np.stack([embed, keyword, author]), axis=0)
+    return score, relation
+
+
+def shared_attribute_pairs(
+    authors: Sequence[set],
+    venues: Sequence[str | None],
+    years: Sequence[int | None],
+) -> dict:
+    """
+    {(i, j): weight} for i < j, one point each for sharing an author, the
+    same venue, or years one apart. Pairs come from inverted indexes
+    (author -> nodes, venue -> nodes, year -> nodes), so only nodes that
+    share a key are ever compared.
+    """
+    by_author: dict = {}
+    by_venue: dict = {}
+    by_year: dict = {}
+    for i, names in enumerate(authors):
+        for name in names:
+            by_author.setdefault(name, []).append(i)
+    for i, venue in enumerate(venues):
+        if venue:
+            by_venue.setdefault(venue, []).append(i)
+    for i, year in enumerate(years):
+        if year:
+            by_year.setdefault(year, []).append(i)
+
+    def _within(groups) -> set:
+        pairs = set()
+        for members in groups:
+            for a in range(len(members)):
+                for b in range(a + 1, len(members)):
+                    pairs.add((members[a], members[b]))
+        return pairs
+
+    weights: dict = {}
+    # a pair sharing several authors still scores one point
+    for pair in _within(by_author.values()):
+        weights[pair] = weights.get(pair, 0.0) + 1.0
+    for pair in _within(by_venue.values()):
+        weights[pair] = weights.get(pair, 0.0) + 1.0
+    for year, members in by_year.items():
+        for i in members:
+            for j in by_year.get(year + 1, ()):
+                pair = (i, j) if i < j else (j, i)
+                weights[pair] = weights.get(pair, 0.0) + 1.0
+    return weights
+
+
+def paper_key(paper: dict) -> str | None:
+    return paper.get("paper_uid") or paper.get("paper_id") or paper.get("url") or paper.get("id")
+
+
+def term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _pack_terms(terms: set) -> bytes:
+    return np.array(sorted(term_hash(t) for t in terms), dtype="<u8").tobytes()
+
+
+def _unpack_terms(raw) -> set:
+    return set(np.frombuffer(raw or b"", dtype="<u8").tolist())
+
+
+def encode_paper_features(paper: dict) -> dict:
+    """Compact, storable features of one paper (see module docstring)."""
+    text = paper_text(paper)
+    year = year_value(paper.get("year"))
+    vec = hash_vector(text)
+    return {
+        "vec": vec.astype("<f2").tobytes(),
+        "lsh": lsh_buckets(vec),
+        "terms": _pack_terms(keyword_set(text)),
+        "authors": _pack_terms(author_set(paper.get("authors"))),
+        "year": None if np.isnan(year) else int(year),
+        "v": FEATURE_VERSION,
+    }
+
+
+def features_from_docs(docs: Sequence[dict]) -> dict:
+    """Stack encoded features (in order) into the inputs of scored_pairs()."""
+    if not docs:
+        return {"vectors": np.zeros((0, HASH_DIM), np.float32), "keywords": [], "authors": [], "years": []}
+    return {
+        "vectors": np.stack([np.frombuffer(d["vec"], dtype="<f2") for d in docs]).astype(np.float32),
+        "keywords": [_unpack_terms(d.get("terms")) for d in docs],
+        "authors": [_unpack_terms(d.get("authors")) for d in docs],
+        "years": [d.get("year") for d in docs],
+    }
+
+
+def paper_features(papers: Sequence[dict]) -> dict:
+    return features_from_docs([encode_paper_features(p) for p in papers])
+
+
+def scored_pairs(features: dict, threshold: float) -> List[tuple]:
+    """[(i, j, score, relation)] for i < j with round(score, 4) >= threshold."""
+    n = len(features["keywords"])
+    if n < 2:
+        return []
+    score, relation = score_matrices(
+        features["vectors"], features["keywords"], features["authors"], features["years"]
+    )
+    rounded = np.round(score, 4)
+    ii, jj = np.nonzero(np.triu(rounded >= threshold, k=1))
+    return [
+        (int(i), int(j), round(float(score[i, j]), 4), RELATIONS[int(relation[i, j])])
+        for i, j in zip(ii, jj)
+    ]
@@ -0,0 +1,54 @@
+import re
+import numpy as np
+
+# keras' DEFAULT_STRIP_REGEX: punctuation is deleted, not treated as a separator
+_STRIP_RE = re.compile(r'[!"#$%&()\*\+,-\./:;<=>?@\[\\\]^_`{|}~\']')
+
+
+def tokenize(text: str) -> list[str]:
+    # same tokens as TextVectorization(standardize="lower_and_strip_punctuation",
+    # split="whitespace"), so they hit the vectorizer's idf vocabulary
+    return _STRIP_RE.sub("", (text or "").lower()).split()
+
+
+def bm25_scores(
+    query_tokens: list[str],
+    docs_tokens: list[list[str]],
+    idf: dict | None = None,
+    default_idf: float = 1.0,
+    k1: float = 1.2,
+    b: float = 0.75,
+) -> np.ndarray:
+    """
+    Okapi BM25 of one query against a small candidate set.
+    The term-frequency matrix is (docs x unique query terms), so the whole
+    scoring step is a handful of array ops plus one mat-vec product.
+    """
+    n_docs = len(docs_tokens)
+    terms = list(dict.fromkeys(query_tokens))
+    if not terms or not n_docs:
+        return np.zeros(n_docs, dtype=np.float32)
+
+    term_index = {t: i for i, t in enumerate(terms)}
+    doc_idx = []
+    term_idx = []
+    for d, tokens in enumerate(docs_tokens):
+        for t in tokens:
+            j = term_index.get(t)
+            if j is not None:
+                doc_idx.append(d)
+                term_idx.append(j)
+
+    tf = np.zeros((n_docs, len(terms)), dtype=np.float32)
+    if doc_idx:
+        np.add.at(tf, (np.asarray(doc_idx), np.asarray(term_idx)), 1.0)
+
+    lengths = np.fromiter((len(t) for t in docs_tokens), dtype=np.float32, count=n_docs)
+    avgdl = float(lengths.mean()) or 1.0
+    norm = k1 * (1.0 - b + b * lengths / avgdl)
+
+    idf = idf or {}
+    idf_vec = np.fromiter(
+        (idf.get(t, default_idf) for t in terms), dtype=np.float32, count=len(terms)
+    )
+    return ((tf * (k1 + 1.0)) / (tf + norm[:, None])) @ idf_vec
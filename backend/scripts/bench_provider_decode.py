@@ -0,0 +1,147 @@
+"""
+Benchmark provider response decoding.
+
+Compares the previous decode path (full OpenAlex payload, stdlib json via
+`r.json()`, dict+sort abstract rebuild, two `model_dump()` passes per paper)
+with the current one (`select`-trimmed payload, fast_json on raw bytes,
+positional abstract rebuild, a single dump).
+
+Run from backend/ (needs the usual .env for app settings):
+    python -m scripts.bench_provider_decode --works 25 --words 300 --rounds 200
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from app.schemas.assistant import PaperItem
+from app.services.paper_aggregator_service import PaperAggregatorService
+from app.utils import fast_json
+
+
+def _make_work(i: int, words: int, full: bool) -> dict:
+    rng = random.Random(i)
+    vocab = [f"token{n}" for n in range(words // 2)]
+    inverted: dict[str, list[int]] = {}
+    for pos in range(words):
+        inverted.setdefault(rng.choice(vocab), []).append(pos)
+    work = {
+        "title": f"Synthetic work {i}",
+        "publication_year": 2000 + i % 24,
+        "doi": f"https://doi.org/10.0000/{i}",
+        "authorships": [
+            {"author": {"display_name": f"Author {i}-{a}"}} for a in range(6)
+        ],
+        "primary_location": {
+            "landing_page_url": f"https://example.org/{i}",
+            "source": {"display_name": "Synthetic Venue"},
+        },
+        "abstract_inverted_index": inverted,
+    }
+    if full:
+        # fields OpenAlex returns by default that the handler never reads
+        work["referenced_works"] = [f"https://openalex.org/W{n}" for n in range(60)]
+        work["related_works"] = [f"https://openalex.org/W{n}" for n in range(20)]
+        work["concepts"] = [
+            {"id": f"C{n}", "display_name": f"concept {n}", "level": n % 4, "score": 0.5}
+            for n in range(25)
+        ]
+        work["counts_by_year"] = [{"year": 2000 + n, "cited_by_count": n} for n in range(20)]
+    return work
+
+
+class _FakeResponse:
+    def __init__(self, payload: bytes):
+        self.content = payload
+        self.text = payload.decode("utf-8")
+
+    def raise_for_status(self):
+        return None
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class _FakeClient:
+    def __init__(self, payload: bytes):
+        self._payload = payload
+
+    async def get(self, url, params=None):
+        return _FakeResponse(self._payload)
+
+
+def _legacy_rebuild(inverted_index):
+    if not inverted_index:
+        return ""
+    positions = {}
+    for token, pos_list in inverted_index.items():
+        for pos in pos_list or []:
+            positions[pos] = token
+    return " ".join(token for _, token in sorted(positions.items()))
+
+
+def _legacy_decode(resp: _FakeResponse) -> list[dict]:
+    data = resp.json()
+    out = []
+    for w in data.get("results", []):
+        authors = [
+            a["author"]["display_name"]
+            for a in w.get("authorships", [])
+            if a.get("author", {}).get("display_name")
+        ]
+        loc = w.get("primary_location") or {}
+        out.append(PaperItem(
+            title=w.get("title") or "Untitled",
+            url=loc.get("landing_page_url") or w.get("doi"),
+            authors=authors or None,
+            year=w.get("publication_year"),
+            venue=(loc.get("source") or {}).get("display_name"),
+            abstract=_legacy_rebuild(w.get("abstract_inverted_index")),
+            source="OpenAlex",
+        ))
+    # run_query dumped every paper twice
+    [p.model_dump() for p in out]
+    return [p.model_dump() for p in out]
+
+
+def _bench(fn, rounds: int) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark provider decoding")
+    parser.add_argument("--works", type=int, default=25)
+    parser.add_argument("--words", type=int, default=300)
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    full = json.dumps({"results": [_make_work(i, args.words, True) for i in range(args.works)]})
+    selected = json.dumps({"results": [_make_work(i, args.words, False) for i in range(args.works)]})
+    full_resp = _FakeResponse(full.encode("utf-8"))
+    svc = PaperAggregatorService(db={})
+    client = _FakeClient(selected.encode("utf-8"))
+    loop = asyncio.new_event_loop()
+
+    def _current():
+        papers = loop.run_until_complete(svc._search_openalex(client, "bench", args.works))
+        return [p.model_dump() for p in papers]
+
+    assert [p["abstract"] for p in _legacy_decode(full_resp)] == [p["abstract"] for p in _current()]
+
+    legacy_ms = _bench(lambda: _legacy_decode(full_resp), args.rounds)
+    current_ms = _bench(_current, args.rounds)
+    loop.close()
+
+    print(f"json backend      : {'orjson' if fast_json.orjson else 'stdlib json'}")
+    print(f"payload bytes     : full={len(full)} selected={len(selected)}")
+    print(f"legacy decode     : {legacy_ms:.3f} ms/response")
+    print(f"current decode    : {current_ms:.3f} ms/response")
+    print(f"speedup           : {legacy_ms / current_ms:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
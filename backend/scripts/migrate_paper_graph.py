@@ -0,0 +1,106 @@
+"""
+Migrate `paper_graph` from one document per directed edge
+({paper_id, related_paper_id, weight | score, relation_type}) to one document
+per paper with a bounded, weight-sorted `neighbors` array (see GraphRepo).
+
+Node documents are built in a scratch collection and renamed over
+`paper_graph`, which also drops the old edge indexes (and the validator, which
+is re-applied). Node documents already
+written by the new code are merged in. Run it before (or while global graph
+linking is paused) starting the new version:
+
+    python -m scripts.migrate_paper_graph [--dry-run]
+"""
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.db.schema_and_indexes import COLLECTION_INDEXES, COLLECTION_SCHEMAS
+from app.repositories.graph_repo import GraphRepo, PAPER_GRAPH_MAX_NEIGHBORS
+
+SCRATCH = "paper_graph_migrating"
+BATCH = 500
+
+
+async def _flush(col, ops: list) -> None:
+    if ops:
+        await col.bulk_write(ops, ordered=True)
+        ops.clear()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Convert paper_graph to node-per-document storage")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would be migrated")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGO_URI)
+    db = client[settings.MONGO_DB]
+    source = db[GraphRepo.collection_name]
+
+    edges = await source.count_documents({"related_paper_id": {"$exists": True}})
+    nodes = await source.count_documents({"neighbors": {"$exists": True}})
+    print(f"paper_graph: {edges} edge documents, {nodes} node documents")
+    if args.dry_run or not edges:
+        return
+
+    scratch = db[SCRATCH]
+    await scratch.drop()
+
+    ops: list = []
+    grouped = source.aggregate(
+        [
+            {"$match": {"related_paper_id": {"$exists": True}}},
+            {
+                "$group": {
+                    "_id": "$paper_id",
+                    "created_at": {"$min": "$created_at"},
+                    "neighbors": {
+                        "$push": {
+                            "id": "$related_paper_id",
+                            "weight": {"$ifNull": ["$weight", {"$ifNull": ["$score", 0.0]}]},
+                            "relation": "$relation_type",
+                        }
+                    },
+                }
+            },
+        ],
+        allowDiskUse=True,
+    )
+    migrated = 0
+    async for group in grouped:
+        if not group["_id"]:
+            continue
+        best: dict = {}
+        for n in group["neighbors"]:
+            if n.get("id") and (n["id"] not in best or n["weight"] > best[n["id"]]["weight"]):
+                best[n["id"]] = {"id": n["id"], "weight": float(n["weight"]), "relation": n.get("relation")}
+        top = sorted(best.values(), key=lambda n: -n["weight"])[:PAPER_GRAPH_MAX_NEIGHBORS]
+        ops.extend(GraphRepo.merge_ops(group["_id"], top, created_at=group.get("created_at")))
+        migrated += 1
+        if len(ops) >= BATCH:
+            await _flush(scratch, ops)
+
+    async for doc in source.find({"neighbors": {"$exists": True}}):
+        if doc.get("neighbors"):
+            ops.extend(GraphRepo.merge_ops(doc["_id"], doc["neighbors"], created_at=doc.get("created_at")))
+        if len(ops) >= BATCH:
+            await _flush(scratch, ops)
+    await _flush(scratch, ops)
+
+    await scratch.rename(GraphRepo.collection_name, dropTarget=True)
+    await db.command(
+        "collMod",
+        GraphRepo.collection_name,
+        validator={"$jsonSchema": COLLECTION_SCHEMAS[GraphRepo.collection_name]},
+        validationLevel="moderate",
+        validationAction="warn",
+    )
+    for idx in COLLECTION_INDEXES.get(GraphRepo.collection_name, []):
+        await source.create_index(idx["keys"], **{k: v for k, v in idx.items() if k != "keys"})
+    print(f"Migrated {edges} edges into {migrated} node documents")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
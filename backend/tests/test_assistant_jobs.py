@@ -0,0 +1,93 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.services.assistant_job_service import AssistantJobService
+
+
+class _FakeJobs:
+    def __init__(self):
+        self.stages = []
+        self.finished = None
+
+    async def set_progress(self, job_id, stage, progress, lease_seconds):
+        self.stages.append((stage, progress))
+
+    async def finish(self, job_id, status, expires_at, result=None, error=None):
+        self.finished = (status, result, error)
+
+
+class _FakeAssistant:
+    def __init__(self, text):
+        self.text = text
+
+    async def document_text(self, stored):
+        return {"text": self.text}
+
+    async def document_predictions(self, sha256, doc):
+        return [{"label": "cs.LG", "score": 0.9}]
+
+    async def run_query(self, user_id, text, input_type, idempotency_key, progress, predictions):
+        self.idempotency_key = idempotency_key
+        self.predictions = predictions
+        for stage in ("searching", "saving"):
+            await progress(stage)
+        return {"query_id": "q1", "top_papers": []}
+
+
+def _service(text):
+    service = AssistantJobService(_FakeAssistant(text))
+    service.jobs = _FakeJobs()
+    return service
+
+
+def test_job_runs_pipeline_stages_and_stores_result():
+    service = _service("a long enough extracted text")
+    job_id = ObjectId()
+    asyncio.run(service._run({"_id": job_id, "user_id": ObjectId(), "file_path": "x.pdf", "sha256": "abc"}))
+
+    assert [s for s, _ in service.jobs.stages] == ["extracting", "classifying", "searching", "saving"]
+    assert service.jobs.finished == ("done", {"query_id": "q1", "top_papers": []}, None)
+    assert service.assistant.idempotency_key == f"job:{job_id}"
+    assert service.assistant.predictions == [{"label": "cs.LG", "score": 0.9}]
+
+
+def test_job_fails_when_no_text_extracted():
+    service = _service("")
+    asyncio.run(service._run({"_id": ObjectId(), "user_id": ObjectId(), "file_path": "x.pdf", "sha256": "abc"}))
+
+    assert service.jobs.finished == ("failed", None, "Could not extract text from file")
+
+
+def test_claim_backs_off_when_a_concurrent_claim_filled_the_user_cap():
+    user, other = ObjectId(), ObjectId()
+
+    class _ClaimJobs:
+        def __init__(self):
+            self.queue = [{"_id": ObjectId(), "user_id": user}, {"_id": ObjectId(), "user_id": other}]
+            self.released = []
+
+        async def saturated_users(self, max_running):
+            return []  # read before the other workers claimed
+
+        async def claim_next(self, worker_id, lease_seconds, exclude_users=None):
+            for job in self.queue:
+                if job["user_id"] not in (exclude_users or []):
+                    self.queue.remove(job)
+                    return job
+            return None
+
+        async def running_before(self, job):
+            return 2 if job["user_id"] == user else 0
+
+        async def release(self, job, worker_id):
+            self.released.append(job["_id"])
+            self.queue.append(job)
+
+    service = _service("text")
+    service.jobs = _ClaimJobs()
+    first = service.jobs.queue[0]["_id"]
+    job = asyncio.run(service._claim())
+
+    assert job["user_id"] == other
+    assert service.jobs.released == [first] and service.jobs.queue[0]["_id"] == first
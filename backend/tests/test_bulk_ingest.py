@@ -0,0 +1,108 @@
+import asyncio
+import io
+import json
+import zipfile
+from types import SimpleNamespace
+
+from bson import ObjectId
+
+from app.services.bulk_ingest_service import BulkIngestService
+
+
+class _FakeDocuments:
+    async def get_text(self, sha256, source, ext=None):
+        text = source.decode()
+        return {"text": text, "pages": 1, "predictions": None, "cached": False}
+
+    @staticmethod
+    def cached_predictions(doc, model_version):
+        return None
+
+    async def save_predictions(self, sha256, model_version, predictions):
+        pass
+
+
+class _FakeQueries:
+    def __init__(self):
+        self.inserted = []
+
+    async def insert_many(self, docs):
+        self.inserted.extend(docs)
+        return SimpleNamespace(inserted_ids=[ObjectId() for _ in docs])
+
+
+class _FakeAssistant:
+    model_version = "v1"
+
+    def __init__(self):
+        self.documents = _FakeDocuments()
+        self.queries = _FakeQueries()
+        self.batches = []
+
+    def analyze_texts(self, texts, top_k=5):
+        self.batches.append(len(texts))
+        return [[{"label": "cs.LG", "score": 0.9}] for _ in texts]
+
+
+def _zip(entries: dict) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        for name, data in entries.items():
+            zf.writestr(name, data)
+    buf.seek(0)
+    return buf
+
+
+async def _collect(service, uploads):
+    return [json.loads(line) async for line in service.ingest(str(ObjectId()), uploads)]
+
+
+def test_ingest_streams_results_for_files_and_zip_entries():
+    assistant = _FakeAssistant()
+    service = BulkIngestService(assistant, concurrency=2, batch_size=8)
+    archive = _zip(
+        {
+            "papers/a.pdf": b"first paper text body",
+            "papers/b.docx": b"second paper text body",
+            "papers/notes.txt": b"not supported",
+            "__MACOSX/._a.pdf": b"junk",
+        }
+    )
+    uploads = [
+        ("reading.zip", "application/zip", archive),
+        ("c.pdf", "application/pdf", io.BytesIO(b"third paper text body")),
+    ]
+    lines = asyncio.run(_collect(service, uploads))
+
+    results = {r["filename"]: r for r in lines if r["type"] == "result"}
+    assert set(results) == {"reading.zip/papers/a.pdf", "reading.zip/papers/b.docx", "reading.zip/papers/notes.txt", "c.pdf"}
+    assert results["reading.zip/papers/notes.txt"]["status"] == "error"
+    ok = [r for r in results.values() if r["status"] == "ok"]
+    assert len(ok) == 3 and all(r["predicted_topics"][0]["label"] == "cs.LG" for r in ok)
+
+    assert lines[-1]["type"] == "summary"
+    assert (lines[-1]["total"], lines[-1]["ok"], lines[-1]["failed"]) == (4, 3, 1)
+    assert sum(assistant.batches) == 3
+    assert len(assistant.queries.inserted) == 3
+    assert archive.closed
+
+
+def test_ingest_reports_unexpected_extraction_errors_per_file():
+    class _CrashingDocuments(_FakeDocuments):
+        async def get_text(self, sha256, source, ext=None):
+            if source.startswith(b"crash"):
+                raise RuntimeError("pool process died")
+            return await super().get_text(sha256, source, ext=ext)
+
+    assistant = _FakeAssistant()
+    assistant.documents = _CrashingDocuments()
+    service = BulkIngestService(assistant, concurrency=1, batch_size=8)
+    uploads = [
+        ("a.pdf", "application/pdf", io.BytesIO(b"crash this one")),
+        ("b.pdf", "application/pdf", io.BytesIO(b"second paper text body")),
+    ]
+    lines = asyncio.run(_collect(service, uploads))
+
+    results = {r["filename"]: r for r in lines if r["type"] == "result"}
+    assert results["a.pdf"]["status"] == "error" and results["b.pdf"]["status"] == "ok"
+    assert (lines[-1]["ok"], lines[-1]["failed"]) == (1, 1)
@@ -80,3 +80,347 @@ def test_arxiv_helpers_parse_basic_fields():
     svc = PaperSearchService()
     assert svc._find_arxiv_link(xml) == "http://arxiv.org/abs/1234.5678"
     assert svc._tag_value(xml, "title") == "Sample Title"
+
+
+def test_stage_spans_feed_server_timing_and_stats():
+    from app.core.timing import span, start_request_timings, server_timing_header, stage_stats
+
+    timings = start_request_timings()
+    with span("Provider Semantic Scholar"):
+        pass
+    with span("rerank"):
+        pass
+
+    assert [name for name, _ in timings] == ["provider_semantic_scholar", "rerank"]
+    header = server_timing_header(timings)
+    assert header.startswith("provider_semantic_scholar;dur=")
+    stages = {s["stage"]: s for s in stage_stats()}
+    assert stages["rerank"]["count"] >= 1
+    assert stages["rerank"]["p50_ms"] == 10.0
+
+    # spans outside a request (e.g. background prefetch) stay out of the histograms
+    import contextvars
+
+    def _background():
+        with span("prefetch_only"):
+            pass
+
+    contextvars.Context().run(_background)
+    assert "prefetch_only" not in {s["stage"] for s in stage_stats()}
+
+
+def test_run_query_returns_existing_query_within_dedup_window():
+    from bson import ObjectId
+    from app.repositories.query_repo import text_fingerprint
+    from app.services.assistant_service import AssistantService
+
+    assert text_fingerprint("  Graph  Neural\nNetworks ") == text_fingerprint("graph neural networks")
+
+    existing = {
+        "_id": ObjectId(),
+        "input_type": "text",
+        "subject_area": "cs.LG",
+        "confidence": 0.9,
+        "top_predictions": [{"label": "cs.LG", "score": 0.9}],
+        "papers": [{"title": "A"}],
+    }
+
+    class _Queries:
+        async def find_duplicate(self, user_id, fingerprint=None, since=None, idempotency_key=None):
+            self.args = (fingerprint, since, idempotency_key)
+            return existing
+
+    service = AssistantService.__new__(AssistantService)
+    service.queries = _Queries()
+    res = asyncio.run(
+        service.run_query(str(ObjectId()), "Graph neural networks", idempotency_key="k1")
+    )
+
+    assert res["query_id"] == str(existing["_id"])
+    assert res["top_papers"] == [{"title": "A"}]
+    assert res["meta"]["deduplicated"] is True
+    assert service.queries.args[0] == text_fingerprint("graph neural networks")
+    assert service.queries.args[2] == "k1"
+
+    # the same key with different text is a client error, not a replay
+    import pytest
+    from app.services.assistant_service import IdempotencyConflictError
+
+    existing["text_fingerprint"] = text_fingerprint("graph neural networks")
+    with pytest.raises(IdempotencyConflictError):
+        asyncio.run(service.run_query(str(ObjectId()), "Sparse attention", idempotency_key="k1"))
+
+
+def test_idempotency_key_is_checked_before_the_fingerprint_window():
+    import pytest
+    from datetime import timedelta
+    from bson import ObjectId
+    from app.core.time_utils import now_ist
+    from app.repositories.query_repo import QueryRepo, text_fingerprint
+    from app.services.assistant_service import AssistantService, IdempotencyConflictError
+
+    def _matches(doc, query):
+        for k, v in query.items():
+            if isinstance(v, dict):
+                if doc.get(k) is None or doc[k] < v["$gte"]:
+                    return False
+            elif doc.get(k) != v:
+                return False
+        return True
+
+    class _Cursor:
+        def __init__(self, rows):
+            self.rows = rows
+
+        def sort(self, key, direction):
+            self.rows.sort(key=lambda r: r[key], reverse=direction < 0)
+            return self
+
+        def limit(self, n):
+            self.rows = self.rows[:n]
+            return self
+
+        async def to_list(self, length):
+            return self.rows[:length]
+
+    class _Col:
+        def __init__(self, rows):
+            self.rows = rows
+
+        async def find_one(self, query):
+            return next((r for r in self.rows if _matches(r, query)), None)
+
+        def find(self, query):
+            return _Cursor([r for r in self.rows if _matches(r, query)])
+
+    uid = ObjectId()
+    now = now_ist()
+    # K was used with text A; text B was then sent without a key
+    keyed = {
+        "_id": ObjectId(),
+        "user_id": uid,
+        "idempotency_key": "K",
+        "text_fingerprint": text_fingerprint("text A"),
+        "created_at": now - timedelta(seconds=5),
+    }
+    unkeyed = {
+        "_id": ObjectId(),
+        "user_id": uid,
+        "text_fingerprint": text_fingerprint("text B"),
+        "created_at": now,
+    }
+    service = AssistantService.__new__(AssistantService)
+    service.queries = QueryRepo(db={"queries": _Col([keyed, unkeyed])})
+
+    with pytest.raises(IdempotencyConflictError):
+        asyncio.run(service.run_query(str(uid), "text B", idempotency_key="K"))
+
+    # without a key row the fingerprint window still applies
+    res = asyncio.run(service.run_query(str(uid), "text B", idempotency_key="other"))
+    assert res["query_id"] == str(unkeyed["_id"])
+    assert res["meta"]["deduplicated"] is True
+
+
+def test_store_upload_streams_hashes_and_enforces_limit(tmp_path):
+    import hashlib
+    import io
+    import pytest
+    from fastapi import UploadFile
+    from app.services.file_service import store_upload, UploadTooLargeError
+
+    payload = b"x" * 3000
+    upload = UploadFile(file=io.BytesIO(payload), filename="paper.pdf")
+    stored = asyncio.run(store_upload(upload, str(tmp_path)))
+
+    assert stored["size"] == 3000
+    assert stored["sha256"] == hashlib.sha256(payload).hexdigest()
+    assert open(stored["path"], "rb").read() == payload
+
+    upload = UploadFile(file=io.BytesIO(payload), filename="big.pdf")
+    with pytest.raises(UploadTooLargeError):
+        asyncio.run(store_upload(upload, str(tmp_path), filename="big.pdf", max_bytes=1000))
+    assert not (tmp_path / "big.pdf").exists()
+    assert not list(tmp_path.glob("*.part"))
+
+
+def test_content_addressed_store_survives_a_concurrent_writer(tmp_path, monkeypatch):
+    import io
+    from app.services import file_service
+
+    payload = b"same content"
+
+    def _racing_copy(src, path, max_bytes):
+        # another writer finished the same file first, then our replace failed
+        with open(path, "wb") as f:
+            f.write(payload)
+        raise FileNotFoundError(path)
+
+    monkeypatch.setattr(file_service, "_copy_to_disk", _racing_copy)
+    path, _, size, sha256, existing = file_service._store_content_addressed(
+        io.BytesIO(payload), str(tmp_path), ".pdf", None, True
+    )
+    assert existing and size == len(payload) and open(path, "rb").read() == payload
+
+
+def test_upload_limit_middleware_rejects_declared_oversize_body():
+    from fastapi import FastAPI, Request
+    from fastapi.testclient import TestClient
+    from app.middleware.upload_limit import UploadLimitMiddleware
+
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        return {"size": len(await request.body())}
+
+    app.add_middleware(UploadLimitMiddleware, limits={"/upload": 100}, overhead_bytes=0)
+    client = TestClient(app)
+
+    assert client.post("/upload", content=b"a" * 50).json() == {"size": 50}
+    assert client.post("/upload", content=b"a" * 500).status_code == 413
+
+    def chunks():
+        for _ in range(5):
+            yield b"a" * 50
+
+    assert client.post("/upload", content=chunks()).status_code == 413
+
+
+def test_content_addressed_upload_reuses_existing_file(tmp_path):
+    import io
+    from fastapi import UploadFile
+    from app.services.file_service import store_upload
+
+    first = asyncio.run(
+        store_upload(UploadFile(file=io.BytesIO(b"same pdf"), filename="a.pdf"), str(tmp_path), content_addressed=True)
+    )
+    second = asyncio.run(
+        store_upload(UploadFile(file=io.BytesIO(b"same pdf"), filename="b.PDF"), str(tmp_path), content_addressed=True)
+    )
+
+    assert first["filename"] == f"{first['sha256']}.pdf"
+    assert first["existing"] is False
+    assert second["existing"] is True
+    assert second["path"] == first["path"]
+
+
+def test_cached_static_files_etag_304_and_range(tmp_path):
+    import hashlib
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+    from app.core.file_serving import CachedStaticFiles
+
+    body = b"evidence-" * 100
+    (tmp_path / "doc.pdf").write_bytes(body)
+    sha = hashlib.sha256(body).hexdigest()
+    (tmp_path / f"{sha}.pdf").write_bytes(body)
+
+    app = FastAPI()
+    app.mount("/uploads", CachedStaticFiles(directory=str(tmp_path)), name="uploads")
+    client = TestClient(app)
+
+    res = client.get("/uploads/doc.pdf")
+    assert res.headers["etag"] == f'"{sha}"'
+    assert res.headers["cache-control"] == "private, no-cache"
+    assert client.get("/uploads/doc.pdf", headers={"If-None-Match": res.headers["etag"]}).status_code == 304
+    assert client.get("/uploads/doc.pdf", headers={"If-Modified-Since": res.headers["last-modified"]}).status_code == 304
+
+    part = client.get("/uploads/doc.pdf", headers={"Range": "bytes=0-8"})
+    assert part.status_code == 206 and part.content == b"evidence-"
+
+    hashed = client.get(f"/uploads/{sha}.pdf")
+    assert hashed.headers["cache-control"].startswith("private,") and "immutable" in hashed.headers["cache-control"]
+
+
+def test_write_behind_moves_failing_operations_to_dead_letter(monkeypatch):
+    from pymongo.errors import BulkWriteError
+
+    from app.db import write_behind as wb
+
+    class _Redis:
+        def __init__(self):
+            self.lists = {}
+            self.kv = {}
+
+        async def rpush(self, key, *values):
+            self.lists.setdefault(key, []).extend(values)
+
+        async def lrange(self, key, start, stop):
+            return self.lists.get(key, [])[start : stop + 1]
+
+        async def ltrim(self, key, start, stop):
+            self.lists[key] = self.lists.get(key, [])[start:]
+
+        async def set(self, key, value, nx=False, px=None):
+            if nx and key in self.kv:
+                return False
+            self.kv[key] = value
+            return True
+
+        async def get(self, key):
+            return self.kv.get(key)
+
+        async def incr(self, key):
+            self.kv[key] = int(self.kv.get(key, 0)) + 1
+            return self.kv[key]
+
+        async def delete(self, key):
+            self.kv.pop(key, None)
+
+    class _Col:
+        def __init__(self):
+            self.ops = []
+
+        async def bulk_write(self, ops, ordered):
+            # unordered: the good ops are applied, the invalid one is reported
+            errors = [
+                {"index": k, "code": 121, "errmsg": "Document failed validation"}
+                for k, op in enumerate(ops)
+                if op._filter.get("title_key") == "poison"
+            ]
+            self.ops.extend(op for op in ops if op._filter.get("title_key") != "poison")
+            if errors:
+                raise BulkWriteError({"writeErrors": errors, "nInserted": 0})
+
+    monkeypatch.setattr(wb, "_MAX_ATTEMPTS", 2)
+    col, redis = _Col(), _Redis()
+    queue = wb.WriteBehindQueue(redis_client=redis, db={"paper_catalog": col})
+
+    async def _run():
+        await queue.upsert("paper_catalog", {"title_key": "poison"}, {"$set": {"title": "x"}})
+        await queue.upsert("paper_catalog", {"title_key": "good"}, {"$set": {"title": "y"}})
+        assert await queue.flush() == 0  # first failure: the batch stays queued
+        assert await queue.flush() == 2
+
+    asyncio.run(_run())
+    # the good op is re-applied on every attempt (upserts are idempotent)
+    assert {tuple(op._filter.items()) for op in col.ops} == {(("title_key", "good"),)}
+    assert len(redis.lists[wb._DEAD_KEY]) == 1 and "poison" in redis.lists[wb._DEAD_KEY][0]
+    assert redis.lists[wb._QUEUE_KEY] == [] and wb._FAILURES_KEY not in redis.kv
+
+
+def test_persist_query_writes_nothing_else_when_the_query_insert_fails():
+    import pytest
+    from bson import ObjectId
+    from app.services.assistant_service import AssistantService
+
+    writes = []
+
+    class _Queries:
+        async def insert(self, doc):
+            raise RuntimeError("insert failed")
+
+    class _Papers:
+        async def save_query_papers(self, **kwargs):
+            writes.append("papers")
+
+    class _Analytics:
+        async def emit(self, *args, **kwargs):
+            writes.append("event")
+
+    service = AssistantService.__new__(AssistantService)
+    service.queries, service.papers, service.analytics = _Queries(), _Papers(), _Analytics()
+    doc = {"created_at": None, "input_type": "text", "confidence": 0.9}
+    with pytest.raises(RuntimeError):
+        asyncio.run(service._persist_query(doc, str(ObjectId()), str(ObjectId()), "cs.LG", [{"title": "A"}]))
+    assert writes == []
@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+from docx import Document
+
+from app.services.extraction_service import ExtractionError, ExtractionService, extract_document
+
+
+def test_docx_extraction_stops_at_char_budget(tmp_path):
+    path = tmp_path / "long.docx"
+    doc = Document()
+    for i in range(200):
+        doc.add_paragraph(f"paragraph {i} " + "word " * 20)
+    doc.save(path)
+
+    res = extract_document(str(path), ".docx", max_chars=500)
+
+    assert len(res["text"]) == 500
+    assert res["truncated"] is True
+    assert res["text"].startswith("paragraph 0")
+
+
+def test_pool_extracts_and_rejects_unsupported(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("plain text body", encoding="utf-8")
+    service = ExtractionService(workers=1, timeout=60)
+    try:
+        assert asyncio.run(service.extract_text(str(path))) == "plain text body"
+        with pytest.raises(ExtractionError):
+            asyncio.run(service.extract(str(tmp_path / "image.png")))
+    finally:
+        service.shutdown()
@@ -0,0 +1,76 @@
+import asyncio
+
+from app.services import graph_adjacency_cache as gac
+from app.services.graph_adjacency_cache import AdjacencyCache, bfs, build_csr
+
+
+def test_adjacency_cache_csr_overlay_and_bfs():
+    cache = AdjacencyCache()
+    edges = [("a", "b", 0.9), ("a", "c", 0.6), ("b", "d", 0.8), ("c", "e", 0.7), ("a", "b", 0.5)]
+    src = [cache._intern(s) for s, _, _ in edges]
+    dst = [cache._intern(d) for _, d, _ in edges]
+    cache.csr = build_csr(len(cache.ids), src, dst, [w for *_, w in edges], [0] * len(edges))
+    cache.ready = True
+
+    assert [(n, round(w, 2)) for n, w, _ in cache.neighbors("a")] == [("b", 0.9), ("c", 0.6)]
+
+    # a node rewritten later replaces its row through the overlay, then compaction
+    cache.overlay = {cache._intern("a"): {cache._intern("f"): (0.95, 1), cache._intern("b"): (0.9, 0)}}
+    cache.overlay_size = 2
+    assert [n for n, *_ in cache.neighbors("a")] == ["f", "b"]
+    assert cache.stats()["edges"] == 4
+
+    class _Repo:
+        async def _none(self):
+            for doc in ():
+                yield doc
+
+        def iter_nodes(self, since=None, batch_size=1000):
+            return self._none()
+
+    cache.repo = _Repo()
+    old_max, gac.GRAPH_CACHE_MAX_OVERLAY = gac.GRAPH_CACHE_MAX_OVERLAY, 1
+    try:
+        asyncio.run(cache.refresh())
+    finally:
+        gac.GRAPH_CACHE_MAX_OVERLAY = old_max
+    assert cache.overlay == {} and [n for n, *_ in cache.neighbors("a")] == ["f", "b"]
+    assert [n for n, *_ in cache.neighbors("b")] == ["d"]
+    assert cache.stats()["edges"] == 4 and cache.stats()["overlay"] == 0
+
+    hops, out = bfs(cache.neighbors, "a", depth=2, fan_out=2, min_weight=0.65, max_nodes=10)
+    assert hops == {"a": 0, "f": 1, "b": 1, "d": 2}
+    assert {(e["from"], e["to"]) for e in out} == {("a", "f"), ("a", "b"), ("b", "d")}
+
+
+def test_adjacency_cache_skips_oversized_graph_and_rechecks_later(monkeypatch):
+    class _Repo:
+        edges = 10
+
+        async def edge_count(self):
+            return self.edges
+
+        async def _iter(self):
+            yield {"_id": "a", "neighbors": [{"id": "b", "weight": 0.5}]}
+
+        def iter_nodes(self, since=None, batch_size=1000):
+            return self._iter()
+
+    monkeypatch.setattr(gac, "GRAPH_CACHE_MAX_EDGES", 5)
+    cache = gac.AdjacencyCache()
+    cache.repo = _Repo()
+
+    async def _run():
+        await cache._build()
+        assert not cache.ready and not cache.disabled and cache.too_large_at is not None
+        assert not await cache.ensure_fresh() and cache._build_task is None
+
+        # the graph shrank: once the recheck interval has passed it is built
+        cache.repo.edges = 1
+        cache.too_large_at -= gac.GRAPH_CACHE_RECHECK_SECONDS
+        await cache.ensure_fresh()
+        await cache._build_task
+        assert cache.ready and cache.too_large_at is None
+        assert [n for n, *_ in cache.neighbors("a")] == ["b"]
+
+    asyncio.run(_run())
@@ -0,0 +1,42 @@
+import asyncio
+
+from bson import ObjectId
+
+from app.services.paper_graph_service import PaperGraphService
+
+
+def test_cached_query_graph_hit_does_no_writes():
+    class _Cache:
+        def __init__(self):
+            self.rows = {}
+            self.saves = 0
+
+        async def get(self, key):
+            return self.rows.get(key)
+
+        async def save(self, key, user_id, query_id, kind, payload, etag, expires_at):
+            self.saves += 1
+            self.rows[key] = {"payload": payload, "etag": etag}
+
+    service = PaperGraphService()
+    service.cache = _Cache()
+    builds = []
+
+    async def build(user_id, query_id):
+        builds.append(query_id)
+        return {"nodes": [{"id": "p1", "label": "P1"}], "edges": [{"from": "p1", "to": "p2", "weight": 0.5}]}
+
+    service.build_from_query = build
+    uid, qid = str(ObjectId()), str(ObjectId())
+
+    first, etag = asyncio.run(service.query_graph(uid, qid))
+    again, etag2 = asyncio.run(service.query_graph(uid, qid))
+
+    assert first == again and etag == etag2 and etag.startswith('"')
+    assert first["edges"][0]["from"] == "p1" and first["nodes"][0]["type"] == "paper"
+    assert builds == [qid] and service.cache.saves == 1
+
+    # the layout variant is derived from the cached plain graph, not rebuilt
+    laid_out, _ = asyncio.run(service.query_graph(uid, qid, layout=True))
+    assert builds == [qid] and service.cache.saves == 2
+    assert laid_out["nodes"][0]["x"] is not None and first["nodes"][0]["x"] is None
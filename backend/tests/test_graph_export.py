@@ -0,0 +1,60 @@
+import asyncio
+import gzip
+import json
+import xml.etree.ElementTree as ET
+
+from bson import ObjectId
+
+from app.services.graph_export_service import GraphExportService
+
+
+def test_graph_export_streams_filtered_graphml_and_ndjson():
+    papers = [
+        {"_id": "p1", "title": "Graphs & <Nets>", "year": 2020, "venue": "NeurIPS", "subject_area": "cs.LG"},
+        {"_id": "p2", "title": "Attention\x0b", "year": "2021", "venue": None, "subject_area": "cs.LG"},
+    ]
+    nodes = {
+        "p1": {"_id": "p1", "neighbors": [{"id": "p2", "weight": 0.8, "relation": "similarity"}, {"id": "x", "weight": 0.9}]},
+        "p2": {"_id": "p2", "neighbors": [{"id": "p1", "weight": 0.2, "relation": "similarity"}]},
+    }
+
+    class _Cursor:
+        def __init__(self, docs):
+            self.docs = docs
+
+        def __aiter__(self):
+            return self._gen()
+
+        async def _gen(self):
+            for d in self.docs:
+                yield d
+
+    class _Papers:
+        def aggregate(self, pipeline, **kwargs):
+            self.match = pipeline[0]["$match"]
+            return _Cursor(papers)
+
+    class _Graph:
+        def nodes_by_ids(self, ids):
+            return _Cursor([nodes[i] for i in ids if i in nodes])
+
+    service = GraphExportService(db={"papers": _Papers()})
+    service.graph = _Graph()
+    uid = str(ObjectId())
+
+    async def _collect(fmt, compress):
+        chunks = [c async for c in service.stream(fmt, user_id=uid, min_weight=0.5, compress=compress)]
+        body = b"".join(chunks)
+        return gzip.decompress(body) if compress else body
+
+    root = ET.fromstring(asyncio.run(_collect("graphml", True)))
+    ns = {"g": "http://graphml.graphdrawing.org/xmlns"}
+    graph = root.find("g:graph", ns)
+    assert [n.get("id") for n in graph.findall("g:node", ns)] == ["p1", "p2"]
+    assert graph.find("g:node/g:data[@key='label']", ns).text == "Graphs & <Nets>"
+    assert [(e.get("source"), e.get("target")) for e in graph.findall("g:edge", ns)] == [("p1", "p2")]
+    assert service.papers.col.match["user_id"] == ObjectId(uid)
+
+    lines = [json.loads(l) for l in asyncio.run(_collect("ndjson", False)).decode().splitlines()]
+    assert [r["type"] for r in lines] == ["node", "node", "edge"]
+    assert lines[1]["year"] == 2021 and lines[2]["weight"] == 0.8
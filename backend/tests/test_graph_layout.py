@@ -0,0 +1,26 @@
+import numpy as np
+
+from app.utils import graph_layout
+from app.utils.graph_layout import force_layout
+
+
+def test_force_layout_is_deterministic_and_separates_components():
+    # two dense clusters joined by nothing
+    edges = [(i, j, 1.0) for i in range(10) for j in range(i + 1, 10)]
+    edges += [(i, j, 1.0) for i in range(10, 20) for j in range(i + 1, 20)]
+    first = force_layout(20, edges)
+    assert (first == force_layout(20, edges)).all()
+    assert first.min() >= 0.0 and first.max() <= 1.0
+
+    a, b = first[:10].mean(axis=0), first[10:].mean(axis=0)
+    spread = max(np.linalg.norm(first[:10] - a, axis=1).max(), np.linalg.norm(first[10:] - b, axis=1).max())
+    assert np.linalg.norm(a - b) > spread
+
+    # the grid approximation path gives a finite, normalized layout too
+    old = graph_layout.GRAPH_LAYOUT_EXACT_MAX_NODES
+    graph_layout.GRAPH_LAYOUT_EXACT_MAX_NODES = 5
+    try:
+        approx = force_layout(20, edges)
+    finally:
+        graph_layout.GRAPH_LAYOUT_EXACT_MAX_NODES = old
+    assert np.isfinite(approx).all() and approx.max() == 1.0
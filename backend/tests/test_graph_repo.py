@@ -0,0 +1,136 @@
+import asyncio
+
+from app.repositories.graph_repo import GraphRepo, PAPER_GRAPH_MAX_NEIGHBORS
+
+
+def _eval(expr, doc, env=None):
+    """Just enough of the aggregation language to run GraphRepo.merge_ops pipelines."""
+    env = env or {}
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, *path = expr[2:].split(".")
+        value = env.get(name)
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        return value
+    if isinstance(expr, str) and expr.startswith("$"):
+        return doc.get(expr[1:])
+    if isinstance(expr, list):
+        return [_eval(e, doc, env) for e in expr]
+    if not isinstance(expr, dict) or len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {k: _eval(v, doc, env) for k, v in expr.items()} if isinstance(expr, dict) else expr
+    (op, arg), = expr.items()
+    if op == "$literal":
+        return arg
+    if op in ("$map", "$filter"):
+        items = _eval(arg["input"], doc, env)
+        body = arg["in"] if op == "$map" else arg["cond"]
+        results = [_eval(body, doc, {**env, arg["as"]: item}) for item in items]
+        return results if op == "$map" else [item for item, keep in zip(items, results) if keep]
+    if op == "$let":
+        scope = {**env, **{k: _eval(v, doc, env) for k, v in arg["vars"].items()}}
+        return _eval(arg["in"], doc, scope)
+    if op == "$sortArray":
+        (key, direction), = arg["sortBy"].items()
+        return sorted(_eval(arg["input"], doc, env), key=lambda x: x[key], reverse=direction < 0)
+    args = _eval(arg, doc, env)
+    if op == "$ifNull":
+        return args[0] if args[0] is not None else args[1]
+    if op == "$first":
+        return args[0] if args else None
+    if op == "$cond":
+        return args[1] if args[0] else args[2]
+    if op == "$gt":
+        return args[0] is not None and args[0] > args[1]
+    if op == "$eq":
+        return args[0] == args[1]
+    if op == "$in":
+        return args[0] in args[1]
+    if op == "$not":
+        return not args[0]
+    if op == "$concatArrays":
+        return [x for a in args for x in a]
+    if op == "$slice":
+        return args[0][: args[1]]
+    raise NotImplementedError(op)
+
+
+def _apply(doc, op):
+    for stage in op._doc:
+        doc = {**doc, **_eval(stage["$set"], doc)}
+    return doc
+
+
+def test_graph_repo_merges_neighbors_in_one_atomic_update():
+    class _Col:
+        async def bulk_write(self, ops, ordered):
+            self.ops, self.ordered = ops, ordered
+
+    col = _Col()
+    repo = GraphRepo(db={"paper_graph": col})
+    edges = [
+        {"paper_id": "a", "related_paper_id": "b", "weight": 0.4, "relation_type": "similarity"},
+        {"paper_id": "a", "related_paper_id": "b", "weight": 0.7, "relation_type": "same_subject"},
+        {"paper_id": "a", "related_paper_id": "c", "weight": 0.5, "relation_type": "similarity"},
+        {"paper_id": "b", "related_paper_id": "a", "weight": 0.7, "relation_type": "same_subject"},
+    ]
+    asyncio.run(repo.bulk_insert(edges))
+
+    ops = col.ops
+    assert col.ordered and len(ops) == 2  # one pipeline update per source paper
+    assert ops[0]._filter == {"_id": "a"} and isinstance(ops[0]._doc, list)
+
+    stored = {
+        "_id": "a",
+        "neighbors": [
+            {"id": "c", "weight": 0.9, "relation": "same_venue"},
+            {"id": "d", "weight": 0.6, "relation": "similarity"},
+        ],
+    }
+    merged = _apply(stored, ops[0])
+    # c keeps its heavier stored edge, b is added, ids stay unique and sorted
+    assert [(n["id"], n["weight"]) for n in merged["neighbors"]] == [("c", 0.9), ("b", 0.7), ("d", 0.6)]
+    # replaying the same update changes nothing
+    assert _apply(merged, ops[0])["neighbors"] == merged["neighbors"]
+
+    fresh = _apply({"_id": "b"}, ops[1])
+    assert fresh["neighbors"] == [{"id": "a", "weight": 0.7, "relation": "same_subject"}]
+    assert fresh["created_at"] == fresh["updated_at"]
+
+    many = [{"id": f"p{k}", "weight": k / 1000} for k in range(PAPER_GRAPH_MAX_NEIGHBORS + 5)]
+    bounded = _apply({"_id": "z"}, GraphRepo.merge_ops("z", many)[0])["neighbors"]
+    assert len(bounded) == PAPER_GRAPH_MAX_NEIGHBORS and bounded[0]["id"] == f"p{PAPER_GRAPH_MAX_NEIGHBORS + 4}"
+
+
+def test_graph_repo_neighborhood_follows_top_edges_hop_by_hop():
+    graph = {
+        "a": [("b", 0.9), ("c", 0.8), ("x", 0.1)],
+        "b": [("d", 0.7), ("a", 0.6)],
+        "c": [("e", 0.3)],
+        "x": [("y", 0.9)],
+    }
+
+    class _Col:
+        def __init__(self):
+            self.queries = []
+
+        async def _docs(self, ids, k):
+            for node in ids:
+                if node in graph:
+                    yield {"_id": node, "neighbors": [{"id": i, "weight": w} for i, w in graph[node][:k]]}
+
+        def find(self, query, projection):
+            ids = query["_id"]["$in"]
+            self.queries.append(ids)
+            return self._docs(ids, projection["neighbors"]["$slice"])
+
+    col = _Col()
+    repo = GraphRepo(db={"paper_graph": col})
+    edges = asyncio.run(repo.neighborhood("a", depth=2, min_weight=0.5, fan_out=2, limit=10))
+
+    # x is outside the fan-out and e below min_weight, so neither is followed
+    assert col.queries == [["a"], ["b", "c"]]
+    assert [(e["paper_id"], e["related_paper_id"]) for e in edges] == [("a", "b"), ("a", "c"), ("b", "d"), ("b", "a")]
+
+    col.queries.clear()
+    asyncio.run(repo.neighborhood("a", depth=3, min_weight=0.0, fan_out=3, limit=2))
+    assert col.queries == [["a"], ["b"]]
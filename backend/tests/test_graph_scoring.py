@@ -0,0 +1,174 @@
+import hashlib
+import random
+import time
+
+import pytest
+
+from app.services.paper_graph_service import PaperGraphService
+from app.utils.graph_scoring import paper_features, scored_pairs, RELATIONS, score_matrices
+from app.utils.similarity import cosine_similarity, keyword_overlap_score, year_proximity_score
+
+_WORDS = "graph neural network learning deep model transformer attention vision language data sparse".split()
+_AUTHORS = ["A. Smith", "b. jones", "C. Lee", "D. Kim", "E. Chen"]
+
+
+def _papers(n, seed=7):
+    rng = random.Random(seed)
+    out = []
+    for k in range(n):
+        out.append(
+            {
+                "paper_id": f"p{k}",
+                "title": " ".join(rng.choices(_WORDS, k=5)),
+                "abstract": " ".join(rng.choices(_WORDS, k=rng.randint(0, 30))),
+                "authors": rng.sample(_AUTHORS, rng.randint(0, 3)),
+                "year": rng.choice([None, 2015, 2018, 2019, 2020, 2024]),
+            }
+        )
+    return out
+
+
+def _hash_vec(text, dim=256):
+    vec = [0.0] * dim
+    for token in (text or "").lower().split():
+        vec[int(hashlib.md5(token.encode("utf-8")).hexdigest()[:8], 16) % dim] += 1.0
+    return vec
+
+
+def _author_overlap(a, b):
+    a_set = {x.strip().lower() for x in a or [] if x}
+    b_set = {x.strip().lower() for x in b or [] if x}
+    if not a_set or not b_set:
+        return 0.0
+    return len(a_set & b_set) / max(1, len(a_set | b_set))
+
+
+def _reference_score(a, b):
+    """Pairwise reference for score_matrices: one pair at a time, in pure Python."""
+    text_a = f"{a.get('title','')} {a.get('abstract','')}"
+    text_b = f"{b.get('title','')} {b.get('abstract','')}"
+    keyword = keyword_overlap_score(text_a, text_b)
+    embed = cosine_similarity(_hash_vec(text_a), _hash_vec(text_b))
+    author = _author_overlap(a.get("authors"), b.get("authors"))
+    year = year_proximity_score(a.get("year"), b.get("year"))
+    score = 0.35 * keyword + 0.35 * embed + 0.2 * author + 0.1 * year
+    relations = {"similarity": embed, "same_subject": keyword, "author_overlap": author}
+    return round(score, 4), max(relations.items(), key=lambda x: x[1])[0]
+
+
+def test_batch_scores_match_pairwise_score():
+    papers = _papers(40)
+    features = paper_features(papers)
+    score, relation = score_matrices(
+        features["vectors"], features["keywords"], features["authors"], features["years"]
+    )
+    for i in range(len(papers)):
+        for j in range(i + 1, len(papers)):
+            expected, expected_rel = _reference_score(papers[i], papers[j])
+            assert score[i, j] == pytest.approx(expected, abs=1e-4)
+            assert RELATIONS[relation[i, j]] == expected_rel or expected == pytest.approx(0.0, abs=1e-9)
+
+
+def test_build_edges_is_symmetric_and_fast():
+    service = PaperGraphService()
+    papers = _papers(400)
+    start = time.perf_counter()
+    items = [service._normalize_paper(p) for p in papers]
+    edges = service._edges_from_features(items, paper_features(items))
+    elapsed = time.perf_counter() - start
+
+    pairs = scored_pairs(paper_features(papers), service.threshold)
+    assert len(edges) == 2 * len(pairs)
+    assert all(e["weight"] >= service.threshold for e in edges)
+    assert elapsed < 2.0
+
+
+def test_stored_features_round_trip_and_backfill():
+    import asyncio
+
+    from app.utils.graph_scoring import encode_paper_features, features_from_docs
+
+    class _FakeFeatures:
+        def __init__(self, stored):
+            self.stored = stored
+            self.upserted = []
+
+        async def get_many(self, keys):
+            return {k: self.stored[k] for k in keys if k in self.stored}
+
+        async def upsert_many(self, papers):
+            self.upserted.extend(p["paper_id"] for p in papers)
+
+    service = PaperGraphService()
+    items = [service._normalize_paper(p) for p in _papers(6)]
+    service.features = _FakeFeatures({p["paper_id"]: encode_paper_features(p) for p in items[:4]})
+
+    loaded = asyncio.run(service._load_features(items))
+
+    assert service.features.upserted == ["p4", "p5"]
+    direct = paper_features(items)
+    assert (loaded["vectors"] == direct["vectors"]).all()
+    assert loaded["keywords"] == direct["keywords"] and loaded["years"] == direct["years"]
+    assert scored_pairs(loaded, service.threshold) == scored_pairs(direct, service.threshold)
+    assert len(features_from_docs([])["keywords"]) == 0
+
+
+def test_link_papers_scores_lsh_candidates_against_new_papers():
+    import asyncio
+
+    from app.utils.graph_scoring import encode_paper_features, lsh_buckets, hash_vector
+
+    text = "graph neural network message passing over citation graph"
+    assert lsh_buckets(hash_vector(text)) == lsh_buckets(hash_vector(text.upper()))
+
+    old = [
+        {"paper_id": "old1", "title": text, "abstract": "", "authors": ["A. Smith"], "year": 2020},
+        {"paper_id": "old2", "title": text, "abstract": "", "authors": ["A. Smith"], "year": 2020},
+    ]
+
+    class _Features:
+        async def candidates(self, buckets, exclude, scan_limit, limit):
+            self.buckets = buckets
+            return [{"_id": p["paper_id"], **encode_paper_features(p)} for p in old]
+
+    class _Graph:
+        def __init__(self):
+            self.batches = []
+
+        async def bulk_insert(self, edges):
+            self.batches.append(edges)
+
+    service = PaperGraphService()
+    service.features = _Features()
+    service.graph = _Graph()
+    new = [{"paper_uid": "new1", "title": text, "abstract": "", "authors": ["a. smith"], "year": 2021}]
+
+    linked = asyncio.run(service.link_papers(new))
+
+    assert linked == 2
+    edges = [e for batch in service.graph.batches for e in batch]
+    assert {(e["paper_id"], e["related_paper_id"]) for e in edges} == {
+        ("new1", "old1"), ("old1", "new1"), ("new1", "old2"), ("old2", "new1")
+    }
+    assert service.features.buckets
+
+
+def test_shared_attribute_pairs_match_pairwise_rules():
+    from app.utils.graph_scoring import shared_attribute_pairs
+
+    rng = random.Random(3)
+    n = 300
+    authors = [{a.lower() for a in rng.sample(_AUTHORS, rng.randint(0, 2))} for _ in range(n)]
+    venues = [rng.choice(["", "neurips", "icml", "acl"]) for _ in range(n)]
+    years = [rng.choice([None, 2018, 2019, 2020, 2022]) for _ in range(n)]
+
+    expected = {}
+    for i in range(n):
+        for j in range(i + 1, n):
+            w = float(bool(authors[i] & authors[j]))
+            w += float(bool(venues[i]) and venues[i] == venues[j])
+            w += float(bool(years[i] and years[j]) and abs(years[i] - years[j]) == 1)
+            if w:
+                expected[(i, j)] = w
+
+    assert shared_attribute_pairs(authors, venues, years) == expected
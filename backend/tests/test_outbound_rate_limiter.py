@@ -0,0 +1,49 @@
+import asyncio
+
+from app.services.outbound_rate_limiter import (
+    OutboundRateLimiter,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+)
+
+
+def test_bucket_allows_burst_then_limits():
+    limiter = OutboundRateLimiter(rates={"p": (0.01, 2)})
+
+    async def _run():
+        return [await limiter.acquire("p", max_wait=0) for _ in range(3)]
+
+    assert asyncio.run(_run()) == [True, True, False]
+
+
+def test_waits_for_refill_within_max_wait():
+    limiter = OutboundRateLimiter(rates={"p": (50.0, 1)})
+
+    async def _run():
+        first = await limiter.acquire("p", max_wait=0)
+        second = await limiter.acquire("p", max_wait=1.0)
+        return first, second
+
+    assert asyncio.run(_run()) == (True, True)
+
+
+def test_background_yields_to_waiting_interactive():
+    limiter = OutboundRateLimiter(rates={"p": (100.0, 5)})
+
+    async def _run():
+        await limiter._set_interactive_waiting("p", 1)
+        background = await limiter.acquire("p", priority=PRIORITY_BACKGROUND, max_wait=0)
+        interactive = await limiter.acquire("p", priority=PRIORITY_INTERACTIVE, max_wait=0)
+        return background, interactive
+
+    assert asyncio.run(_run()) == (False, True)
+
+
+def test_backoff_blocks_provider():
+    limiter = OutboundRateLimiter(rates={"p": (1.0, 5)})
+
+    async def _run():
+        await limiter.backoff("p", 30)
+        return await limiter.acquire("p", max_wait=0)
+
+    assert asyncio.run(_run()) is False
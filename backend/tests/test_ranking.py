@@ -0,0 +1,246 @@
+import numpy as np
+
+from app.schemas.assistant import PaperItem
+from app.services.paper_aggregator_service import PaperAggregatorService
+from app.utils.ranking import bm25_scores, tokenize
+
+
+def test_tokenize_strips_punctuation():
+    # like keras' lower_and_strip_punctuation, punctuation is removed rather than split on
+    assert tokenize("Graph-Neural Networks, 2021!") == ["graphneural", "networks", "2021"]
+    assert tokenize("  Self-supervised\tlearning's  ") == ["selfsupervised", "learnings"]
+
+
+def test_bm25_prefers_matching_document():
+    docs = [
+        tokenize("cooking recipes for pasta"),
+        tokenize("graph neural networks for molecule property prediction"),
+        tokenize("social networks"),
+    ]
+    scores = bm25_scores(tokenize("graph neural networks"), docs)
+    assert scores.shape == (3,)
+    assert scores[0] == 0.0
+    assert int(np.argmax(scores)) == 1
+
+
+def test_bm25_uses_idf_weights():
+    docs = [tokenize("alpha common"), tokenize("beta common")]
+    scores = bm25_scores(tokenize("alpha beta"), docs, idf={"alpha": 5.0, "beta": 1.0})
+    assert scores[0] > scores[1]
+
+
+def test_bm25_empty_inputs():
+    assert bm25_scores([], [["a"]]).tolist() == [0.0]
+    assert bm25_scores(["a"], []).size == 0
+
+
+def test_rerank_relevant_paper_beats_provider_weight():
+    svc = PaperAggregatorService(db={"paper_catalog": None})
+    papers = [
+        PaperItem(title="Unrelated survey of databases", source="Semantic Scholar", year=2020),
+        PaperItem(
+            title="Transformers for protein folding",
+            abstract="protein structure prediction with transformers",
+            source="arXiv",
+            year=2020,
+        ),
+    ]
+    ranked = svc._rerank(papers, "protein folding with transformers")
+    assert ranked[0].source == "arXiv"
+
+
+def test_partial_provider_results_are_cached_briefly(monkeypatch):
+    import asyncio
+
+    from app.services import paper_aggregator_service as agg
+
+    svc = PaperAggregatorService(db={"paper_catalog": None})
+    paper = PaperItem(title="Graph networks", abstract="x", source="OpenAlex")
+    calls = []
+
+    async def _fetch(query, limit, priority):
+        return [paper], len(calls) > 0
+
+    async def _search_catalog(query, limit):
+        return []
+
+    async def _get_cached(query, limit):
+        return None
+
+    async def _set_cached(query, limit, papers, ttl=None):
+        calls.append(ttl)
+
+    monkeypatch.setattr(svc, "_fetch_providers", _fetch)
+    monkeypatch.setattr(svc, "_search_catalog", _search_catalog)
+    monkeypatch.setattr(agg, "get_cached", _get_cached)
+    monkeypatch.setattr(agg, "set_cached", _set_cached)
+
+    asyncio.run(svc.search_all("graph networks"))
+    asyncio.run(svc.search_all("graph networks"))
+    assert calls == [agg.PARTIAL_CACHE_TTL, None]
+
+
+def test_catalog_freshness_tracks_provider_fetches_only():
+    from app.repositories.paper_catalog_repo import PaperCatalogRepo
+
+    repo = PaperCatalogRepo(db={"paper_catalog": None})
+    fetched = PaperItem(title="Graph networks", source="OpenAlex")
+    fetched._from_provider = True
+    hit = PaperItem(title="Sparse attention", source="OpenAlex")
+    keys = PaperAggregatorService.fetched_keys([fetched, hit])
+    (_, fetched_update), (_, hit_update) = repo.build_upserts(
+        [fetched.model_dump(), hit.model_dump()], fetched_keys=keys
+    )
+
+    assert "fetched_at" in fetched_update["$max"]
+    assert "fetched_at" not in hit_update["$max"] and "last_seen_at" in hit_update["$max"]
+    assert "$inc" not in fetched_update  # write-behind replays must be idempotent
+    assert "_from_provider" not in fetched.model_dump()  # provenance stays internal
+
+
+class _FixtureClient:
+    """httpx.AsyncClient stand-in returning a canned provider payload."""
+
+    def __init__(self, payload):
+        self.payload = payload
+        self.params = None
+
+    async def get(self, url, params=None):
+        import httpx
+
+        from app.utils.fast_json import dumps
+
+        self.params = params
+        return httpx.Response(200, content=dumps(self.payload).encode("utf-8"), request=httpx.Request("GET", url))
+
+
+def test_openalex_decoder_rebuilds_abstract_from_positions():
+    import asyncio
+
+    svc = PaperAggregatorService(db={"paper_catalog": None})
+    client = _FixtureClient(
+        {
+            "results": [
+                {
+                    "title": "Sparse attention",
+                    "publication_year": 2021,
+                    "authorships": [{"author": {"display_name": "A. Smith"}}, {"author": {}}],
+                    "primary_location": {
+                        "landing_page_url": "https://example.org/w1",
+                        "source": {"display_name": "NeurIPS"},
+                    },
+                    "doi": "https://doi.org/10.1/x",
+                    # "attention is all you need, attention"
+                    "abstract_inverted_index": {
+                        "attention": [0, 5],
+                        "is": [1],
+                        "all": [2],
+                        "you": [3],
+                        "need,": [4],
+                    },
+                },
+                {"title": None, "primary_location": None, "doi": "https://doi.org/10.1/y"},
+            ]
+        }
+    )
+
+    papers = asyncio.run(svc._search_openalex(client, "attention", 5))
+
+    assert client.params["select"] == svc.OPENALEX_SELECT
+    first, second = papers
+    assert first.abstract == "attention is all you need, attention"
+    assert (first.url, first.venue, first.year, first.authors) == (
+        "https://example.org/w1", "NeurIPS", 2021, ["A. Smith"],
+    )
+    assert (second.title, second.url, second.abstract, second.authors) == (
+        "Untitled", "https://doi.org/10.1/y", "", None,
+    )
+    # gaps in the positions are skipped rather than filled
+    assert svc._rebuild_openalex_abstract({"a": [0], "c": [2]}) == "a c"
+    assert svc._rebuild_openalex_abstract({}) == ""
+
+
+def test_crossref_decoder_reads_only_selected_fields():
+    import asyncio
+
+    svc = PaperAggregatorService(db={"paper_catalog": None})
+    client = _FixtureClient(
+        {
+            "message": {
+                "items": [
+                    {
+                        "title": ["Graph kernels"],
+                        "author": [{"given": "Ada", "family": "Lovelace"}, {"given": "Anon"}],
+                        "issued": {"date-parts": [[2019, 4]]},
+                        "container-title": ["JMLR"],
+                        "URL": "https://doi.org/10.2/z",
+                    },
+                    {"issued": {"date-parts": [[]]}},
+                ]
+            }
+        }
+    )
+
+    papers = asyncio.run(svc._search_crossref(client, "graph kernels", 5))
+
+    assert client.params["select"] == svc.CROSSREF_SELECT
+    first, second = papers
+    assert (first.title, first.authors, first.year, first.venue, first.url) == (
+        "Graph kernels", ["Ada Lovelace"], 2019, "JMLR", "https://doi.org/10.2/z",
+    )
+    assert (second.title, second.year, second.venue) == ("Untitled", None, None)
+
+
+def test_prefetch_refreshes_frequent_queries_within_budget():
+    import asyncio
+
+    from app.services.outbound_rate_limiter import PRIORITY_BACKGROUND
+    from app.services.paper_prefetch_service import PaperPrefetchService
+
+    class _Queries:
+        async def top_subjects_since(self, since, limit=6):
+            return [{"subject": "cs.LG", "count": 9}]
+
+        async def frequent_texts_since(self, since, limit=10, min_count=2):
+            return [
+                {"subject": "cs.CL", "text": " Sparse attention ", "count": 5},
+                {"subject": "cs.CV", "text": "Vision transformers", "count": 3},
+            ]
+
+    class _Catalog:
+        def __init__(self):
+            self.upserts = []
+
+        async def upsert_papers(self, papers, subject_area=None, fetched_keys=None):
+            self.upserts.append((subject_area, len(papers), fetched_keys))
+
+    class _Search:
+        def __init__(self):
+            self.calls = []
+
+        async def search_all(self, **kwargs):
+            self.calls.append(kwargs)
+            return [PaperItem(title=f"Paper for {kwargs['query']}", source="OpenAlex")]
+
+        @staticmethod
+        def fetched_keys(papers):
+            return {"k"}
+
+    search = _Search()
+    service = PaperPrefetchService(search, db={"queries": None, "paper_catalog": None})
+    service.queries = _Queries()
+    service.catalog = _Catalog()
+
+    # room for two of the three planned searches
+    budget = 2 * PaperPrefetchService.REQUESTS_PER_SEARCH + 1
+    res = asyncio.run(service.run_once(request_budget=budget))
+
+    assert res == {"planned": 3, "searches": 2, "requests": 2 * service.REQUESTS_PER_SEARCH, "papers": 2}
+    subject, frequent = search.calls
+    assert subject["query"] == "cs.LG" and subject["rerank_text"] is None
+    # the frequent query is refreshed under the key run_query searches with
+    assert frequent["query"] == "cs.CL Sparse attention"
+    assert frequent["rerank_text"] == "Sparse attention"
+    assert all(c["refresh"] and c["priority"] == PRIORITY_BACKGROUND and c["limit"] == 10 for c in search.calls)
+    # only subject searches feed the catalog
+    assert service.catalog.upserts == [("cs.LG", 1, {"k"})]
@@ -0,0 +1,78 @@
+import asyncio
+import os
+import time
+
+from app.services import storage_manager
+from app.services.storage_manager import StorageManager, _next_shards
+
+
+class _FakeBlobs:
+    def __init__(self, known):
+        self.known = set(known)
+
+    async def expired(self, area, before, limit):
+        return []
+
+    async def known_paths(self, area, rel_paths):
+        return {p for p in rel_paths if p in self.known}
+
+
+class _FakeLedger:
+    def __init__(self):
+        self.deltas = []
+        self.cursor = {}
+
+    async def all(self):
+        return [{"_id": a, "baseline_at": 1, "gc_cursor": self.cursor.get(a)} for a in storage_manager.STORAGE_AREAS]
+
+    async def add(self, area, bytes_delta, files_delta):
+        self.deltas.append((area, bytes_delta, files_delta))
+
+    async def set_cursor(self, area, cursor):
+        self.cursor[area] = cursor
+
+
+class _FakeSettings:
+    async def get_settings(self):
+        return {"data_retention_days": 30}
+
+
+def _write(path, data=b"x", age_days=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    ts = time.time() - age_days * 86400
+    os.utime(path, (ts, ts))
+
+
+def test_next_shards_resumes_after_cursor(tmp_path):
+    for shard in ("aa/01", "aa/02", "bb/00"):
+        os.makedirs(tmp_path / shard)
+    assert _next_shards(str(tmp_path), None, 10) == ["", "aa/01", "aa/02", "bb/00"]
+    assert _next_shards(str(tmp_path), "aa/01", 10) == ["aa/02", "bb/00"]
+
+
+def test_gc_removes_only_old_unregistered_files(tmp_path, monkeypatch):
+    root = tmp_path / "uploads"
+    _write(str(root / "ab" / "cd" / "old.pdf"), b"12345", age_days=60)
+    _write(str(root / "ab" / "cd" / "kept.pdf"), age_days=60)
+    _write(str(root / "ab" / "cd" / "new.pdf"), age_days=1)
+    monkeypatch.setattr(storage_manager, "STORAGE_AREAS", {"uploads": str(root)})
+    monkeypatch.setattr(storage_manager, "GC_AREAS", ("uploads",))
+    monkeypatch.setattr(storage_manager, "STORAGE_GC_DELETES_PER_SECOND", 1000.0)
+
+    manager = StorageManager(db=object(), settings_service=_FakeSettings())
+    manager.blobs = _FakeBlobs({"ab/cd/kept.pdf"})
+    manager.ledger = _FakeLedger()
+
+    async def not_referenced(area, rel_path):
+        return False
+
+    manager._referenced = not_referenced
+    stats = asyncio.run(manager.run_gc())
+
+    assert stats["orphans"] == 1 and stats["bytes"] == 5
+    assert sorted(os.listdir(root / "ab" / "cd")) == ["kept.pdf", "new.pdf"]
+    assert manager.ledger.deltas == [("uploads", -5, -1)]
+    # the whole area was swept, so the next run starts over
+    assert manager.ledger.cursor["uploads"] is None
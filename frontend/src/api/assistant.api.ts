@@ -65,22 +65,121 @@ export type HistoryResponse = {
   limit: number;
 };
 
-export async function apiQueryText(text: string) {
-  const res = await api.post<QueryResponse>("/assistant/query-text", { text });
+// Reuse the same idempotencyKey when retrying a submit; the server returns
+// the stored result instead of running the query again.
+export async function apiQueryText(text: string, idempotencyKey?: string) {
+  const res = await api.post<QueryResponse>(
+    "/assistant/query-text",
+    { text },
+    idempotencyKey ? { headers: { "Idempotency-Key": idempotencyKey } } : undefined
+  );
   return res.data;
 }
 
-export async function apiQueryFile(file: File) {
+export async function apiQueryFile(file: File, idempotencyKey?: string) {
   const form = new FormData();
   form.append("file", file);
 
   const res = await api.post<QueryResponse>("/assistant/query-file", form, {
-    headers: { "Content-Type": "multipart/form-data" },
+    headers: {
+      "Content-Type": "multipart/form-data",
+      ...(idempotencyKey ? { "Idempotency-Key": idempotencyKey } : {}),
+    },
   });
 
   return res.data;
 }
 
+export type AssistantJob = {
+  job_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  stage: string;
+  progress: number;
+  query_id?: string | null;
+  error?: string | null;
+  result?: QueryResponse;
+};
+
+export async function apiGetAssistantJob(jobId: string) {
+  const res = await api.get<AssistantJob>(`/assistant/jobs/${jobId}`);
+  return res.data;
+}
+
+// Uploads as a background job and polls until it finishes, so large files do
+// not hold one request open through extraction and the provider searches.
+export async function apiQueryFileJob(
+  file: File,
+  onProgress?: (job: AssistantJob) => void,
+  pollMs = 1500
+) {
+  const form = new FormData();
+  form.append("file", file);
+
+  const created = await api.post<AssistantJob>("/assistant/query-file/jobs", form, {
+    headers: { "Content-Type": "multipart/form-data" },
+  });
+  let job = created.data;
+  onProgress?.(job);
+  while (job.status !== "done" && job.status !== "failed") {
+    await new Promise((resolve) => setTimeout(resolve, pollMs));
+    job = await apiGetAssistantJob(job.job_id);
+    onProgress?.(job);
+  }
+  if (job.status === "failed" || !job.result) {
+    throw new Error(job.error || "File analysis failed");
+  }
+  return job.result;
+}
+
+export type IngestResult = {
+  type: "result";
+  index: number;
+  filename: string;
+  status: "ok" | "error";
+  error?: string;
+  sha256?: string;
+  predicted_topics?: Prediction[];
+  saved_query_id?: string;
+};
+
+export type IngestSummary = {
+  type: "summary";
+  total: number;
+  ok: number;
+  failed: number;
+  seconds: number;
+};
+
+// Bulk-classifies PDF/DOCX files or ZIP archives; results arrive as NDJSON
+// lines and are handed to onResult as each document finishes.
+export async function apiIngestFiles(files: File[], onResult?: (result: IngestResult) => void) {
+  const form = new FormData();
+  files.forEach((f) => form.append("files", f));
+
+  let seen = 0;
+  const parse = (text: string) =>
+    text
+      .split("\n")
+      .filter((line) => line.trim())
+      .map((line) => JSON.parse(line) as IngestResult | IngestSummary);
+
+  const res = await api.post<string>("/assistant/ingest", form, {
+    headers: { "Content-Type": "multipart/form-data" },
+    responseType: "text",
+    onDownloadProgress: (e) => {
+      const text: string = (e.event?.target as XMLHttpRequest | undefined)?.responseText ?? "";
+      const complete = text.slice(0, text.lastIndexOf("\n") + 1);
+      const items = parse(complete);
+      items.slice(seen).forEach((item) => item.type === "result" && onResult?.(item));
+      seen = items.length;
+    },
+  });
+
+  const items = parse(res.data);
+  items.slice(seen).forEach((item) => item.type === "result" && onResult?.(item));
+  return items.find((item): item is IngestSummary => item.type === "summary") ?? null;
+}
+
 export async function apiHistory(limit = 20, skip = 0) {
   const safeLimit = Math.min(limit, 100);
   const res = await api.get<HistoryResponse>("/assistant/history", {
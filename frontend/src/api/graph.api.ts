@@ -4,6 +4,8 @@ export type GraphNode = {
   id: string;
   label: string;
   type?: string;
+  x?: number | null;
+  y?: number | null;
 };
 
 export type GraphEdge = {
@@ -26,6 +28,8 @@ export type ConnectedNode = {
   authors?: string[] | null;
   source?: string | null;
   url?: string | null;
+  x?: number | null;
+  y?: number | null;
 };
 
 export type ConnectedEdge = {
@@ -40,8 +44,10 @@ export type ConnectedGraphResponse = {
   edges: ConnectedEdge[];
 };
 
-export async function apiGraphForQuery(query_id: string) {
-  const res = await api.get<GraphResponse>(`/graph/query/${query_id}`);
+export async function apiGraphForQuery(query_id: string, layout = false) {
+  const res = await api.get<GraphResponse>(`/graph/query/${query_id}`, {
+    params: { layout },
+  });
   return res.data;
 }
 
@@ -59,7 +65,35 @@ export async function apiGraphNeighbors(paper_id: string, limit = 20) {
   return res.data;
 }
 
-export async function apiConnectedGraph(query_id: string) {
-  const res = await api.get<ConnectedGraphResponse>(`/graph/${query_id}`);
+export type ExpandedGraphResponse = {
+  nodes: (GraphNode & { depth: number })[];
+  edges: GraphEdge[];
+  source: "cache" | "database";
+};
+
+export async function apiGraphExpand(
+  paper_id: string,
+  opts: { depth?: number; fan_out?: number; min_weight?: number; max_nodes?: number; layout?: boolean } = {}
+) {
+  const res = await api.get<ExpandedGraphResponse>("/graph/expand", {
+    params: { paper_id, ...opts },
+  });
+  return res.data;
+}
+
+export async function apiConnectedGraph(query_id: string, layout = false) {
+  const res = await api.get<ConnectedGraphResponse>(`/graph/${query_id}`, {
+    params: { layout },
+  });
+  return res.data;
+}
+
+export async function apiGraphExport(
+  opts: { format?: "graphml" | "ndjson"; subject?: string; min_weight?: number; compress?: boolean } = {}
+) {
+  const res = await api.get<Blob>("/graph/export", {
+    params: { format: "graphml", ...opts },
+    responseType: "blob",
+  });
   return res.data;
 }
@@ -22,6 +22,9 @@ type Node = {
   vy?: number;
   fx?: number | null;
   fy?: number | null;
+  // server-computed layout, normalized to [0, 1]
+  sx?: number | null;
+  sy?: number | null;
 };
 
 type Edge = {
@@ -70,7 +73,7 @@ export default function PaperGraphCanvas({
   onNodeClick,
   lockedNodeId = null,
 }: {
-  nodes?: { id: string; label: string; type?: string }[];
+  nodes?: { id: string; label: string; type?: string; x?: number | null; y?: number | null }[];
   edges?: { from: string; to: string; weight?: number; relation?: string | null }[];
   showLabels?: boolean;
   density?: "sparse" | "dense";
@@ -137,6 +140,8 @@ export default function PaperGraphCanvas({
         group,
         degree,
         type: n.type,
+        sx: n.x,
+        sy: n.y,
       } as Node;
     });
 
@@ -187,13 +192,28 @@ export default function PaperGraphCanvas({
     const filtered =
       density === "dense" ? cleaned : cleaned.filter((_, idx) => idx % 2 === 0);
 
-    const simNodes = normalized.nodes.map((n) => ({
-      ...n,
-      x: bounds.width / 2 + (Math.random() - 0.5) * 140,
-      y: bounds.height / 2 + (Math.random() - 0.5) * 120,
-    }));
+    const pad = 40;
+    const simNodes = normalized.nodes.map((n) =>
+      n.sx != null && n.sy != null
+        ? {
+            ...n,
+            x: pad + n.sx * (bounds.width - 2 * pad),
+            y: pad + n.sy * (bounds.height - 2 * pad),
+          }
+        : {
+            ...n,
+            x: bounds.width / 2 + (Math.random() - 0.5) * 140,
+            y: bounds.height / 2 + (Math.random() - 0.5) * 120,
+          }
+    );
     const nodeIdSet = new Set(simNodes.map((n) => n.id));
     const safeLinks = filtered.filter((e) => nodeIdSet.has(e.from) && nodeIdSet.has(e.to));
+    if (hasRealNodes && normalized.nodes.every((n) => n.sx != null && n.sy != null)) {
+      // laid out server-side: render as-is, no simulation
+      setLayoutNodes(simNodes.map((n) => ({ ...n, fx: n.x, fy: n.y })));
+      setLayoutEdges(safeLinks);
+      return;
+    }
     const simLinks = safeLinks.map((e) => ({
       ...e,
       source: e.from,
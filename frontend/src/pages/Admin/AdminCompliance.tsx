@@ -735,6 +735,7 @@ export default function AdminCompliance() {
           <div className="mt-3 grid gap-2 text-sm text-white/60">
             <div>Disk used: {storageScan?.disk_used ?? "Not scanned"}</div>
             <div>Uploads bytes: {storageScan?.uploads_bytes ?? "Not scanned"}</div>
+            <div>Upload files: {storageScan?.uploads_files ?? "Not scanned"}</div>
             <div>Artifacts bytes: {storageScan?.artifacts_bytes ?? "Not scanned"}</div>
             <div className="text-xs text-white/40">
               Last scan: {storageScan?.created_at ? new Date(storageScan.created_at).toLocaleString() : "Not recorded"}
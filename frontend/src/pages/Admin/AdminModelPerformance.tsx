@@ -33,6 +33,16 @@ type Coverage = {
 
 type LatencyBucket = { bucket: string; count: number };
 
+type StageLatency = {
+  stage: string;
+  count: number;
+  avg_ms: number;
+  max_ms: number;
+  p50_ms: number | null;
+  p95_ms: number | null;
+  p99_ms: number | null;
+};
+
 type SegmentItem = { subject?: string; role?: string; model?: string; source?: string; endpoint?: string; count?: number; tokens?: number };
 
 type ModelPerfResponse = {
@@ -43,6 +53,7 @@ type ModelPerfResponse = {
   latency_p95_ms?: number | null;
   latency_p99_ms?: number | null;
   latency_histogram?: LatencyBucket[];
+  stage_latency?: StageLatency[];
   error_rate?: number;
   errors_daily?: ErrorDaily[];
   status_breakdown?: { '2xx'?: number; '4xx'?: number; '5xx'?: number };
@@ -96,6 +107,7 @@ export default function AdminModelPerformance() {
   const latencyP99 = data?.latency_p99_ms ?? null;
   const errorsDaily = (data?.errors_daily || []) as ErrorDaily[];
   const latencyHistogram = (data?.latency_histogram || []) as LatencyBucket[];
+  const stageLatency = (data?.stage_latency || []) as StageLatency[];
 
   const avgConfidence = num(data?.avg_confidence, 0);
   const dailyValues = sortedDaily.map((d) => num(d.avg, 0));
@@ -351,6 +363,40 @@ export default function AdminModelPerformance() {
         </Card>
       </div>
 
+      <Card>
+        <div className='text-sm font-semibold text-white/80'>Pipeline stage latency</div>
+        <div className='mt-3 overflow-x-auto'>
+          {stageLatency.length === 0 && <div className='text-sm text-white/60'>No stage timings recorded since the last restart.</div>}
+          {stageLatency.length > 0 && (
+            <table className='w-full text-sm text-white/70'>
+              <thead>
+                <tr className='text-xs text-white/40 text-left'>
+                  <th className='py-1'>Stage</th>
+                  <th className='py-1 text-right'>Count</th>
+                  <th className='py-1 text-right'>Avg</th>
+                  <th className='py-1 text-right'>p50</th>
+                  <th className='py-1 text-right'>p95</th>
+                  <th className='py-1 text-right'>Max</th>
+                </tr>
+              </thead>
+              <tbody>
+                {stageLatency.map((s) => (
+                  <tr key={s.stage} className='border-t border-white/5'>
+                    <td className='py-1'>{s.stage}</td>
+                    <td className='py-1 text-right'>{s.count}</td>
+                    <td className='py-1 text-right'>{num(s.avg_ms, 0).toFixed(1)} ms</td>
+                    <td className='py-1 text-right'>{s.p50_ms != null ? `<= ${s.p50_ms} ms` : '-'}</td>
+                    <td className='py-1 text-right'>{s.p95_ms != null ? `<= ${s.p95_ms} ms` : '-'}</td>
+                    <td className='py-1 text-right'>{num(s.max_ms, 0).toFixed(1)} ms</td>
+                  </tr>
+                ))}
+              </tbody>
+            </table>
+          )}
+        </div>
+        <div className='mt-3 text-xs text-white/40'>Per server process; percentiles are bucket upper bounds.</div>
+      </Card>
+
       <Card>
         <div className='flex items-center justify-between'>
           <div className='text-sm font-semibold text-white/80'>Segmented views</div>
@@ -10,7 +10,9 @@ import VoiceButton from "../../components/ui/VoiceButton";
 export default function ConnectedGraph() {
   const [params] = useSearchParams();
   const queryId = params.get("query_id");
-  const [nodes, setNodes] = useState<{ id: string; label: string; type?: string }[]>([]);
+  const [nodes, setNodes] = useState<
+    { id: string; label: string; type?: string; x?: number | null; y?: number | null }[]
+  >([]);
   const [edges, setEdges] = useState<
     { from: string; to: string; weight?: number; relation?: string | null }[]
   >([]);
@@ -44,7 +46,7 @@ export default function ConnectedGraph() {
         setError(null);
         setLoading(true);
         if (selectedQuery) {
-          const res = await apiGraphForQuery(selectedQuery);
+          const res = await apiGraphForQuery(selectedQuery, true);
           setNodes(res.nodes);
           setEdges(
             res.edges.map((e) => ({
@@ -1,6 +1,6 @@
 import { useEffect, useMemo, useRef, useState } from 'react';
 import { Upload, X, FileText } from 'lucide-react';
-import { apiQueryFile, QueryResponse } from '../../api/assistant.api';
+import { apiQueryFileJob, QueryResponse } from '../../api/assistant.api';
 import QueryResult from '../../components/assistant/QueryResult';
 import PageShell from '../../components/layout/PageShell';
 import Button from '../../components/ui/Button';
@@ -16,6 +16,7 @@ export default function QueryFile() {
 
   const [file, setFile] = useState<File | null>(null);
   const [loading, setLoading] = useState(false);
+  const [jobStage, setJobStage] = useState<string | null>(null);
   const [error, setError] = useState<string | null>(null);
   const [data, setData] = useState<QueryResponse | null>(null);
   const [prevData, setPrevData] = useState<QueryResponse | null>(null);
@@ -101,7 +102,7 @@ export default function QueryFile() {
 
     try {
       setLoading(true);
-      const res = await apiQueryFile(file);
+      const res = await apiQueryFileJob(file, (job) => setJobStage(job.stage));
       setData(res);
     } catch (e: unknown) {
       const msg = getErrorMessage(e, "Upload failed");
@@ -112,6 +113,7 @@ export default function QueryFile() {
       }
     } finally {
       setLoading(false);
+      setJobStage(null);
     }
   };
 
@@ -265,7 +267,7 @@ export default function QueryFile() {
           <div className="space-y-6">
             {loading && (
               <div className="flex items-center justify-center py-12 glass rounded-2xl border border-white/10">
-                <Loader size="lg" text="Extracting text and analyzing..." />
+                <Loader size="lg" text={jobStage ? `Job ${jobStage}...` : "Extracting text and analyzing..."} />
               </div>
             )}
 